@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# airtimer.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+import math
+import time
+
+
+class AirTimer:
+    # state of one AIR timer, kept on the monotonic clock
+    # the displayed seconds are derived from it, nothing is counted per tick
+
+    def __init__(self):
+        self.startTime = None  # monotonic start of the running interval
+        self.accumulated = 0.0  # seconds of earlier, stopped intervals
+        self.preset = 0  # countdown start value in seconds, 0 means count up mode
+
+    def isRunning(self):
+        return self.startTime is not None
+
+    def isCountdown(self):
+        return self.preset > 0
+
+    def elapsed(self):
+        if self.startTime is None:
+            return self.accumulated
+        return self.accumulated + time.monotonic() - self.startTime
+
+    def start(self):
+        if self.startTime is None:
+            self.startTime = time.monotonic()
+
+    def stop(self):
+        if self.startTime is not None:
+            self.accumulated += time.monotonic() - self.startTime
+            self.startTime = None
+
+    def reset(self, preset=0):
+        # back to zero (count up) or to preset seconds (countdown), keeps running
+        self.preset = preset
+        self.accumulated = 0.0
+        if self.startTime is not None:
+            self.startTime = time.monotonic()
+
+    def seconds(self):
+        if self.isCountdown():
+            return max(0, int(math.ceil(self.preset - self.elapsed())))
+        return int(self.elapsed())
+
+    def isExpired(self):
+        return self.isCountdown() and self.elapsed() >= self.preset
+
+    def nextChange(self):
+        # seconds until seconds() shows the next value
+        if self.isCountdown():
+            return (self.preset - self.elapsed()) % 1.0
+        return 1.0 - (self.elapsed() % 1.0)
@@ -78,8 +78,14 @@
 #############################################################################
 
 from PyQt5 import QtCore, QtGui, QtWidgets
+import collections
+import math
 import time as pytime
 
+# decimal to segment conversion table
+SEGMENTS = [0b0111111, 0b0000110, 0b1011011, 0b1001111, 0b1100110, 0b1101101, 0b1111101, 0b0000111, 0b1111111,
+            0b1101111]
+
 
 class ClockWidget(QtWidgets.QWidget):
     __pyqtSignals__ = ("timeChanged(QTime)", "timeZoneChanged(int)")
@@ -103,6 +109,24 @@ class ClockWidget(QtWidgets.QWidget):
 
         self.imagepath = ""
 
+        # pre-rendered digit pixmaps, see digitGlyph()
+        self.glyphCache = {}
+        # pre-rendered clock face, see staticLayer()
+        self.useStaticLayer = True
+        self.staticLayerKey = None
+        self.staticLayerPixmap = None
+        # duration of the last paintEvent in seconds and bounding area of the repainted region in pixels
+        self.lastPaintTime = 0.0
+        self.lastPaintArea = 0
+        # optional callable(stage, seconds) told about every paint, e.g. for metrics
+        self.paintObserver = None
+        # time of the last tick, see dirtyRegion()
+        self.lastTick = None
+        # we paint every pixel ourselves, no background compositing needed
+        self.setAttribute(QtCore.Qt.WA_OpaquePaintEvent)
+        self.setAttribute(QtCore.Qt.WA_NoSystemBackground)
+        self.glyphDpr = self.devicePixelRatioF()
+
         self.setLogo()
 
         self.timeZoneOffset = 0
@@ -111,16 +135,65 @@ class ClockWidget(QtWidgets.QWidget):
         self.showSeconds = False
         self.counter = 0
 
+        # single shot timer, re-armed for every half second boundary of the wall clock
         self.timer = QtCore.QTimer(self)
-        self.timer.timeout.connect(self.update)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.timer.timeout.connect(self.timerFired)
+        # how late the last ticks fired in ms, and how often the wall clock jumped
+        self.tickLateness = collections.deque(maxlen=120)
+        self.clockSteps = 0
+        self.nextTickWall = 0.0
+        self.nextTickMono = 0.0
+        # wall and monotonic clock at the last scheduler tick, see schedulerFired()
+        self.lastTickWall = 0.0
+        self.lastTickMono = 0.0
         self.resyncTime()
 
     def resyncTime(self):
-        # sync local timer with system clock
-        while QtCore.QTime.currentTime().msec() > 5:
-            pytime.sleep(0.001)
+        # arm the timer for the next half second boundary of the system clock
+        now = pytime.time()
+        boundary = (math.floor(now * 2) + 1) / 2.0
+        self.nextTickWall = boundary
+        self.nextTickMono = pytime.monotonic() + (boundary - now)
+        self.timer.start(int(math.ceil((boundary - now) * 1000)))
+
+    def timerFired(self):
+        now = pytime.time()
+        mono = pytime.monotonic()
+        if abs((now - self.nextTickWall) - (mono - self.nextTickMono)) > 0.1:
+            # wall clock was stepped (NTP, suspend/resume), realign and repaint everything
+            self.clockSteps += 1
+            self.lastTick = None
+        elif now < self.nextTickWall:
+            # woke up early, wait for the boundary
+            self.timer.start(int(math.ceil((self.nextTickWall - now) * 1000)))
+            return
+        else:
+            self.tickLateness.append((now - self.nextTickWall) * 1000.0)
+        self.tick()
+        self.resyncTime()
+
+    def setScheduler(self, scheduler):
+        # share the wakeups of a TickScheduler instead of running an own timer
+        self.timer.stop()
+        self.timer = scheduler.timer(self.schedulerFired, aligned=True, name="clock")
         self.timer.start(500)
 
+    def schedulerFired(self):
+        now = pytime.time()
+        mono = pytime.monotonic()
+        if self.lastTickMono and abs((now - self.lastTickWall) - (mono - self.lastTickMono)) > 0.1:
+            # wall clock was stepped (NTP, suspend/resume), realign and repaint everything
+            self.clockSteps += 1
+            self.lastTick = None
+            self.timer.start(500)
+        else:
+            self.tickLateness.append(self.timer.lateness * 1000.0)
+        self.lastTickWall = now
+        self.lastTickMono = mono
+        self.tick()
+
     def updateTime(self):
         self.timeChanged.emit(QtCore.QTime.currentTime())
 
@@ -148,6 +221,7 @@ class ClockWidget(QtWidgets.QWidget):
             self.clockMode = 1
         else:
             self.clockMode = 0
+        self.update()
 
     def resetClockMode(self):
         self.clockMode = 1
@@ -160,6 +234,7 @@ class ClockWidget(QtWidgets.QWidget):
     @QtCore.pyqtSlot(bool)
     def setAmPm(self, mode):
         self.isAmPm = mode
+        self.update()
 
     def resetAmPm(self):
         self.isAmPm = False
@@ -172,6 +247,7 @@ class ClockWidget(QtWidgets.QWidget):
     @QtCore.pyqtSlot(bool)
     def setShowSeconds(self, value):
         self.showSeconds = value
+        self.update()
 
     def resetShowSeconds(self):
         self.showSeconds = False
@@ -185,9 +261,10 @@ class ClockWidget(QtWidgets.QWidget):
     @QtCore.pyqtSlot(QtGui.QColor)
     def setDigiHourColor(self, color=QtGui.QColor(50, 50, 255, 255)):
         self.digiHourColor = color
+        self.update()
 
     def resetDigiHourColor(self):
-        self.digiHourColor = QtGui.QColor(50, 50, 255, 255)
+        self.setDigiHourColor(QtGui.QColor(50, 50, 255, 255))
 
     def getDigiHourColor(self):
         return self.digiHourColor
@@ -197,9 +274,10 @@ class ClockWidget(QtWidgets.QWidget):
     @QtCore.pyqtSlot(QtGui.QColor)
     def setDigiSecondColor(self, color=QtGui.QColor(50, 50, 255, 255)):
         self.digiSecondColor = color
+        self.update()
 
     def resetDigiSecondColor(self):
-        self.digiSecondColor = QtGui.QColor(50, 50, 255, 255)
+        self.setDigiSecondColor(QtGui.QColor(50, 50, 255, 255))
 
     def getDigiSecondColor(self):
         return self.digiSecondColor
@@ -209,28 +287,189 @@ class ClockWidget(QtWidgets.QWidget):
     @QtCore.pyqtSlot(QtGui.QColor)
     def setDigiDigitColor(self, color=QtGui.QColor(50, 50, 255, 255)):
         self.digiDigitColor = color
+        self.clearGlyphCache()
+        self.update()
 
     def resetDigiDigitColor(self):
-        self.digiDigitColor = QtGui.QColor(50, 50, 255, 255)
+        self.setDigiDigitColor(QtGui.QColor(50, 50, 255, 255))
 
     def getDigiDigitColor(self):
         return self.digiDigitColor
 
     colorDigiDigit = QtCore.pyqtProperty(QtGui.QColor, getDigiDigitColor, setDigiDigitColor, resetDigiDigitColor)
 
+    def resizeEvent(self, event):
+        self.clearGlyphCache()
+        super(ClockWidget, self).resizeEvent(event)
+
     def paintEvent(self, event):
-        side = min(self.width(), self.height())
+        if self.devicePixelRatioF() != self.glyphDpr:
+            # moved to a screen with a different DPI
+            self.glyphDpr = self.devicePixelRatioF()
+            self.clearGlyphCache()
+
+        paintStart = pytime.perf_counter()
         self.time = QtCore.QTime.currentTime()
 
         painter = QtGui.QPainter(self)
+        # opaque widget, fill the exposed area with the inherited background
+        painter.fillRect(event.rect(), self.palette().color(self.backgroundRole()))
+        if self.useStaticLayer:
+            painter.drawPixmap(0, 0, self.staticLayer())
         painter.setRenderHints(QtGui.QPainter.Antialiasing | QtGui.QPainter.SmoothPixmapTransform)
-        painter.translate(self.width() / 2, self.height() / 2)
-        painter.scale(side / 200.0, side / 200.0)
+        self.setupPainter(painter)
 
         if self.clockMode == 0:
+            if not self.useStaticLayer:
+                self.paintAnalogFace(painter)
+            stage = "paintAnalog"
+            stageStart = pytime.perf_counter()
             self.paintAnalog(painter)
         else:
+            if not self.useStaticLayer:
+                self.paintDigitalFace(painter)
+            stage = "paintDigital"
+            stageStart = pytime.perf_counter()
             self.paintDigital(painter)
+        stageTime = pytime.perf_counter() - stageStart
+        painter.end()
+
+        self.lastPaintTime = pytime.perf_counter() - paintStart
+        if self.paintObserver:
+            self.paintObserver(stage, stageTime)
+            self.paintObserver("paintEvent", self.lastPaintTime)
+        paintRect = event.rect()
+        self.lastPaintArea = paintRect.width() * paintRect.height()
+
+    def setupPainter(self, painter):
+        # center the 200x200 clock coordinate system in the widget
+        side = min(self.width(), self.height())
+        painter.translate(self.width() / 2, self.height() / 2)
+        painter.scale(side / 200.0, side / 200.0)
+
+    def clockTransform(self):
+        # same mapping as setupPainter(), clock coordinates to widget coordinates
+        side = min(self.width(), self.height())
+        transform = QtGui.QTransform()
+        transform.translate(self.width() / 2, self.height() / 2)
+        transform.scale(side / 200.0, side / 200.0)
+        return transform
+
+    def tick(self):
+        # repaint only what changed since the last tick
+        now = QtCore.QTime.currentTime()
+        region = self.dirtyRegion(self.lastTick, now)
+        self.lastTick = now
+        if region is None:
+            self.update()
+        elif not region.isEmpty():
+            self.update(region)
+
+    def dirtyRegion(self, old, new):
+        # region that differs between two times, None if everything has to be repainted
+        if old is None or abs(old.msecsTo(new)) > 1500:
+            # first tick, time step or midnight
+            return None
+
+        rects = []
+        if self.clockMode == 0:
+            if old.second() != new.second():
+                rects += self.handRects(old)
+                rects += self.handRects(new)
+        else:
+            if (old.msec() < 500) != (new.msec() < 500) or old.second() != new.second():
+                rects.append(self.colonRect())
+            for (x, y, oldValue, dotSize, dotOffset), (_, _, newValue, _, _) in zip(self.digitLayout(old),
+                                                                                   self.digitLayout(new)):
+                if oldValue != newValue:
+                    rects.append(self.digitBounds(dotSize, dotOffset).translated(x, y))
+            if old.second() != new.second():
+                if new.second() == 0:
+                    # seconds ring starts over
+                    return None
+                rects.append(self.secondDotRect(new.second()))
+
+        transform = self.clockTransform()
+        region = QtGui.QRegion()
+        for rect in rects:
+            region += transform.mapRect(rect).toAlignedRect().adjusted(-1, -1, 1, 1)
+        return region
+
+    def digitBounds(self, dotSize, dotOffset, slant=19):
+        # bounding box of a fully lit digit, relative to the digit position
+        dots = self._digitDots(8, dotOffset, slant)
+        margin = dotSize + 1.0
+        left = min(dot.x() for dot in dots) - margin
+        top = min(dot.y() for dot in dots) - margin
+        right = max(dot.x() for dot in dots) + margin
+        bottom = max(dot.y() for dot in dots) + margin
+        return QtCore.QRectF(left, top, right - left, bottom - top)
+
+    def colonRect(self):
+        return QtCore.QRectF(-4.0, -10.0, 8.0, 20.0)
+
+    def secondDotRect(self, second):
+        # dot of the seconds ring, see paintDigital()
+        angle = math.radians(-90.0 + 6.0 * second)
+        margin = 1.6 + 1.0
+        return QtCore.QRectF(88 * math.cos(angle) - margin, 88 * math.sin(angle) - margin, 2 * margin, 2 * margin)
+
+    def handRects(self, time):
+        # bounding boxes of the analog hands, see paintAnalog()
+        hands = [(30.0 * (time.hour() + time.minute() / 60.0), QtCore.QRectF(-4, 4, 8, -65)),
+                 (6.0 * time.second(), QtCore.QRectF(-1, 1, 2, -85)),
+                 (6.0 * (time.minute() + time.second() / 60.0), QtCore.QRectF(-4 / 1.3, 4 / 1.3, 8 / 1.3, -85))]
+        rects = []
+        for angle, rect in hands:
+            transform = QtGui.QTransform()
+            transform.rotate(angle)
+            rect = rect.normalized()
+            # split the hand along its length, keeps the boxes of diagonal hands small
+            segments = 4
+            length = rect.height() / segments
+            for i in range(segments):
+                segment = QtCore.QRectF(rect.left(), rect.top() + i * length, rect.width(), length)
+                rects.append(transform.mapRect(segment).adjusted(-1, -1, 1, 1))
+        return rects
+
+    def staticLayer(self):
+        # return the cached clock face, re-rendered when size or colors change
+        dpr = self.devicePixelRatioF()
+        key = (self.width(), self.height(), dpr, self.clockMode, self.showSeconds, self.imagepath,
+               self.digiHourColor.rgba(), self.hourColor.rgba(), self.minuteColor.rgba())
+        if key != self.staticLayerKey:
+            layer = QtGui.QPixmap(math.ceil(self.width() * dpr), math.ceil(self.height() * dpr))
+            layer.setDevicePixelRatio(dpr)
+            layer.fill(QtCore.Qt.transparent)
+            painter = QtGui.QPainter(layer)
+            painter.setRenderHints(QtGui.QPainter.Antialiasing | QtGui.QPainter.SmoothPixmapTransform)
+            self.setupPainter(painter)
+            if self.clockMode == 0:
+                self.paintAnalogFace(painter)
+            else:
+                self.paintDigitalFace(painter)
+            painter.end()
+            self.staticLayerPixmap = layer
+            self.staticLayerKey = key
+        return self.staticLayerPixmap
+
+    def paintAnalogFace(self, painter):
+        # static parts of the analog clock: hour and minute ticks
+        painter.save()
+        painter.setBrush(self.hourColor)
+        painter.setPen(self.hourColor)
+
+        for i in range(12):
+            painter.drawRoundedRect(88, -1, 8, 2, 1.0, 1.0)
+            painter.rotate(30.0)
+
+        painter.setPen(self.minuteColor)
+
+        for j in range(60):
+            if (j % 5) != 0:
+                painter.drawLine(92, 0, 96, 0)
+            painter.rotate(6.0)
+        painter.restore()
 
     def paintAnalog(self, painter):
         time = self.time
@@ -253,21 +492,14 @@ class ClockWidget(QtWidgets.QWidget):
         painter.drawRoundedRect(-1, 1, 2, shl, 1.0, 1.0)
         painter.restore()
 
-        painter.setPen(self.hourColor)
-
-        for i in range(12):
-            painter.drawRoundedRect(88, -1, 8, 2, 1.0, 1.0)
-            painter.rotate(30.0)
-
-        painter.setPen(QtCore.Qt.NoPen)
         painter.setBrush(self.minuteColor)
 
         # draw minute hand
         sizefactor = 1.3
         painter.save()
         painter.rotate(6.0 * (time.minute() + time.second() / 60.0))
-        painter.drawRoundedRect(-4 / sizefactor, 4 / sizefactor, 8 / sizefactor, mhl, 4.0 / sizefactor,
-                                4.0 / sizefactor)
+        painter.drawRoundedRect(QtCore.QRectF(-4 / sizefactor, 4 / sizefactor, 8 / sizefactor, mhl),
+                                4.0 / sizefactor, 4.0 / sizefactor)
         painter.restore()
 
         # draw center circle
@@ -275,19 +507,14 @@ class ClockWidget(QtWidgets.QWidget):
         painter.save()
         painter.drawEllipse(-6, -6, 12, 12)
         painter.restore()
-
-        painter.setPen(self.minuteColor)
-
-        for j in range(60):
-            if (j % 5) != 0:
-                painter.drawLine(92, 0, 96, 0)
-            painter.rotate(6.0)
         # end analog clock mode
 
     @QtCore.pyqtSlot(str)
     def setLogo(self, logofile=""):
         self.imagepath = logofile
         self.image = QtGui.QImage(logofile)
+        self.staticLayerKey = None
+        self.update()
 
     def getLogo(self):
         return self.imagepath
@@ -297,16 +524,43 @@ class ClockWidget(QtWidgets.QWidget):
 
     logoFile = QtCore.pyqtProperty(str, getLogo, setLogo, resetLogo)
 
-    def paintDigital(self, painter):
-        # digital clock mode
-        time = self.time
+    def paintDigitalFace(self, painter):
+        # static parts of the digital clock: hour marks and logo
         dotSize = 1.6
+        painter.save()
+        painter.setBrush(self.digiHourColor)
+        painter.setPen(self.digiHourColor)
 
-        # draw digits and colon
-        painter.setPen(QtCore.Qt.NoPen)
-        painter.setBrush(self.digiDigitColor)
-        painter.setPen(self.digiDigitColor)
+        # draw hour marks
+        for i in range(12):
+            painter.drawEllipse(QtCore.QPointF(95, 0), dotSize, dotSize)
+            painter.rotate(30.0)
+
+        # add logo
+        image = self.image
+        image_w = image.width()
+        image_h = image.height()
+        if image_w > 0 and image_h > 1:
+            if self.showSeconds:
+                # logo position and width when showing seconds
+                paint_x = 0
+                paint_y = -50
+                paint_w = 100
+            else:
+                # logo position and width without seconds
+                paint_x = 0
+                paint_y = 50
+                paint_w = 100
 
+            # calculate height from aspect ratio
+            paint_h = (float(image_h) / float(image_w)) * paint_w
+
+            painter.drawImage(QtCore.QRectF(paint_x - (paint_w / 2), paint_y - (paint_h / 2), paint_w, paint_h), image)
+
+        painter.restore()
+
+    def digitLayout(self, time):
+        # (x, y, value, dotSize, dotOffset) of every digit shown for time
         digitSpacing = 28
         digitSpacingY = 45
         secondsOffsetX = -3.5
@@ -315,33 +569,35 @@ class ClockWidget(QtWidgets.QWidget):
             hourStr = "%02d" % (time.hour()-12)
         else:
             hourStr = "%02d" % time.hour()
-        self.drawDigit(painter, digitSpacing * -2, 0, hourStr[0:1])
-        self.drawDigit(painter, digitSpacing * -1, 0, hourStr[1:2])
-
-        self.drawColon(painter, 0, 0)
-
         minuteStr = "%02d" % time.minute()
-        self.drawDigit(painter, digitSpacing * 1, 0, minuteStr[0:1])
-        self.drawDigit(painter, digitSpacing * 2, 0, minuteStr[1:2])
+        layout = [(digitSpacing * -2, 0, hourStr[0:1], 1.6, 4.5),
+                  (digitSpacing * -1, 0, hourStr[1:2], 1.6, 4.5),
+                  (digitSpacing * 1, 0, minuteStr[0:1], 1.6, 4.5),
+                  (digitSpacing * 2, 0, minuteStr[1:2], 1.6, 4.5)]
 
         if self.showSeconds:
             secondStr = "%02d" % time.second()
-            self.drawDigit(painter, (digitSpacing * -0.3) + secondsOffsetX, digitSpacingY, secondStr[0:1], 0.8, 3)
-            self.drawDigit(painter, (digitSpacing * 0.3) + secondsOffsetX, digitSpacingY, secondStr[1:2], 0.8, 3)
+            layout.append(((digitSpacing * -0.3) + secondsOffsetX, digitSpacingY, secondStr[0:1], 0.8, 3))
+            layout.append(((digitSpacing * 0.3) + secondsOffsetX, digitSpacingY, secondStr[1:2], 0.8, 3))
+        return layout
 
-        # set painter to 12 o'clock position
-        painter.rotate(-90.0)
+    def paintDigital(self, painter):
+        # digital clock mode
+        time = self.time
+        dotSize = 1.6
+
+        # draw digits and colon
         painter.setPen(QtCore.Qt.NoPen)
-        painter.setBrush(self.digiHourColor)
-        painter.setPen(self.digiHourColor)
+        painter.setBrush(self.digiDigitColor)
+        painter.setPen(self.digiDigitColor)
 
-        # draw hour marks
-        painter.save()
-        for i in range(12):
-            painter.drawEllipse(QtCore.QPointF(95, 0), dotSize, dotSize)
-            painter.rotate(30.0)
-        painter.restore()
+        for digitPosX, digitPosY, value, digitDotSize, dotOffset in self.digitLayout(time):
+            self.drawDigit(painter, digitPosX, digitPosY, value, digitDotSize, dotOffset)
+
+        self.drawColon(painter, 0, 0)
 
+        # set painter to 12 o'clock position
+        painter.rotate(-90.0)
         painter.setPen(QtCore.Qt.NoPen)
         painter.setBrush(self.digiSecondColor)
         painter.setPen(self.digiSecondColor)
@@ -358,31 +614,6 @@ class ClockWidget(QtWidgets.QWidget):
             painter.rotate(6.0)
         painter.restore()
 
-        # add logo
-        image = self.image
-        image_w = image.width()
-        image_h = image.height()
-        if image_w > 0 and image_h > 1:
-            painter.save()
-            painter.rotate(90)
-
-            if self.showSeconds:
-                # logo position and width when showing seconds
-                paint_x = 0
-                paint_y = -50
-                paint_w = 100
-            else:
-                # logo position and width without seconds
-                paint_x = 0
-                paint_y = 50
-                paint_w = 100
-
-            # calculate height from aspect ratio
-            paint_h = (float(image_h) / float(image_w)) * paint_w
-
-            painter.drawImage(QtCore.QRectF(paint_x - (paint_w / 2), paint_y - (paint_h / 2), paint_w, paint_h), image)
-            painter.restore()
-
         # end digital clock mode
 
     def drawColon(self, painter, digitStartPosX=0, digitStartPosY=0):
@@ -400,134 +631,100 @@ class ClockWidget(QtWidgets.QWidget):
                 QtCore.QPointF(digitStartPosX + (dotSlant * 2 * currentRow), digitStartPosY - (dotOffset * currentRow)),
                 dotSize, dotSize)
 
-    def drawDigit(self, painter, digitStartPosX=0.0, digitStartPosY=0.0, value=8, dotSize= 1.6, dotOffset = 4.5, slant = 19):
-        value = int(value)
-        # draw dots from one 7segment digit
+    def _digitDots(self, value, dotOffset=4.5, slant=19):
+        # dot centers of one 7segment digit, relative to the digit position
         dotSlant = dotOffset / slant  # horizontal slant of each row
+        dots = []
 
-        # decimal to segment conversion table
-        segments = [0b0111111, 0b0000110, 0b1011011, 0b1001111, 0b1100110, 0b1101101, 0b1111101, 0b0000111, 0b1111111,
-                    0b1101111]
-
-        if segments[value] & 1 << 6:
+        if SEGMENTS[value] & 1 << 6:
             # segment g
-            currentRow = 0  # center row
-            painter.drawEllipse(QtCore.QPointF(digitStartPosX - (dotOffset * 1.5) + (dotSlant * currentRow),
-                                               digitStartPosY - (dotOffset / 2 * currentRow)), dotSize, dotSize)
-            painter.drawEllipse(QtCore.QPointF(digitStartPosX - (dotOffset * 0.5) + (dotSlant * currentRow),
-                                               digitStartPosY - (dotOffset / 2 * currentRow)), dotSize, dotSize)
-            painter.drawEllipse(QtCore.QPointF(digitStartPosX + (dotOffset * 0.5) + (dotSlant * currentRow),
-                                               digitStartPosY - (dotOffset / 2 * currentRow)), dotSize, dotSize)
-            painter.drawEllipse(QtCore.QPointF(digitStartPosX + (dotOffset * 1.5) + (dotSlant * currentRow),
-                                               digitStartPosY - (dotOffset / 2 * currentRow)), dotSize, dotSize)
-
-        if segments[value] & 1 << 0:
+            dots += self._segmentRow(0, dotOffset, dotSlant)
+        if SEGMENTS[value] & 1 << 0:
             # segment a
-            currentRow = 9  # top row
-            painter.drawEllipse(QtCore.QPointF(digitStartPosX - (dotOffset * 1.5) + (dotSlant * currentRow),
-                                               digitStartPosY - (dotOffset / 2 * currentRow)), dotSize, dotSize)
-            painter.drawEllipse(QtCore.QPointF(digitStartPosX - (dotOffset * 0.5) + (dotSlant * currentRow),
-                                               digitStartPosY - (dotOffset / 2 * currentRow)), dotSize, dotSize)
-            painter.drawEllipse(QtCore.QPointF(digitStartPosX + (dotOffset * 0.5) + (dotSlant * currentRow),
-                                               digitStartPosY - (dotOffset / 2 * currentRow)), dotSize, dotSize)
-            painter.drawEllipse(QtCore.QPointF(digitStartPosX + (dotOffset * 1.5) + (dotSlant * currentRow),
-                                               digitStartPosY - (dotOffset / 2 * currentRow)), dotSize, dotSize)
-
-        if segments[value] & 1 << 3:
+            dots += self._segmentRow(9, dotOffset, dotSlant)
+        if SEGMENTS[value] & 1 << 3:
             # segment d
-            currentRow = -9  # bottom row
-            painter.drawEllipse(QtCore.QPointF(digitStartPosX - (dotOffset * 1.5) + (dotSlant * currentRow),
-                                               digitStartPosY - (dotOffset / 2 * currentRow)), dotSize, dotSize)
-            painter.drawEllipse(QtCore.QPointF(digitStartPosX - (dotOffset * 0.5) + (dotSlant * currentRow),
-                                               digitStartPosY - (dotOffset / 2 * currentRow)), dotSize, dotSize)
-            painter.drawEllipse(QtCore.QPointF(digitStartPosX + (dotOffset * 0.5) + (dotSlant * currentRow),
-                                               digitStartPosY - (dotOffset / 2 * currentRow)), dotSize, dotSize)
-            painter.drawEllipse(QtCore.QPointF(digitStartPosX + (dotOffset * 1.5) + (dotSlant * currentRow),
-                                               digitStartPosY - (dotOffset / 2 * currentRow)), dotSize, dotSize)
-
-        if segments[value] & 1 << 5:
+            dots += self._segmentRow(-9, dotOffset, dotSlant)
+        if SEGMENTS[value] & 1 << 5:
             # segment f
-            yOffset = -0.75
-            xOffset = +0.75
-            currentRow = 1
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset - (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-            currentRow = 2
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset - (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-            currentRow = 3
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset - (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-            currentRow = 4
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset - (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-
-        if segments[value] & 1 << 1:
+            dots += self._segmentColumn((1, 2, 3, 4), -0.75, +0.75, -dotOffset * 2.0, dotOffset, dotSlant)
+        if SEGMENTS[value] & 1 << 1:
             # segment b
-            yOffset = -1.2
-            xOffset = -0.5
-            currentRow = 1
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset + (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-            currentRow = 2
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset + (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-            currentRow = 3
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset + (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-            currentRow = 4
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset + (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-
-        if segments[value] & 1 << 4:
+            dots += self._segmentColumn((1, 2, 3, 4), -1.2, -0.5, dotOffset * 2.0, dotOffset, dotSlant)
+        if SEGMENTS[value] & 1 << 4:
             # segment e
-            yOffset = +1.2
-            xOffset = +0.5
-            currentRow = -1
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset - (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-            currentRow = -2
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset - (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-            currentRow = -3
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset - (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-            currentRow = -4
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset - (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-
-        if segments[value] & 1 << 2:
+            dots += self._segmentColumn((-1, -2, -3, -4), +1.2, +0.5, -dotOffset * 2.0, dotOffset, dotSlant)
+        if SEGMENTS[value] & 1 << 2:
             # segment c
-            yOffset = +0.75
-            xOffset = -0.75
-            currentRow = -1
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset + (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-            currentRow = -2
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset + (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-            currentRow = -3
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset + (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
-            currentRow = -4
-            painter.drawEllipse(
-                QtCore.QPointF(digitStartPosX - xOffset + (dotOffset * 2.0) + (dotSlant * 2 * currentRow),
-                               digitStartPosY - yOffset - (dotOffset * currentRow)), dotSize, dotSize)
+            dots += self._segmentColumn((-1, -2, -3, -4), +0.75, -0.75, dotOffset * 2.0, dotOffset, dotSlant)
+        return dots
+
+    @staticmethod
+    def _segmentRow(currentRow, dotOffset, dotSlant):
+        # horizontal segment: four dots in one row
+        return [QtCore.QPointF((dotOffset * column) + (dotSlant * currentRow), -(dotOffset / 2 * currentRow))
+                for column in (-1.5, -0.5, 0.5, 1.5)]
+
+    @staticmethod
+    def _segmentColumn(rows, yOffset, xOffset, columnX, dotOffset, dotSlant):
+        # vertical segment: one dot per row
+        return [QtCore.QPointF(-xOffset + columnX + (dotSlant * 2 * currentRow), -yOffset - (dotOffset * currentRow))
+                for currentRow in rows]
+
+    def clearGlyphCache(self):
+        self.glyphCache = {}
+
+    def digitGlyph(self, value, dotSize, dotOffset, slant, scale, dpr):
+        # return cached (pixmap, bounds) of a digit, bounds are relative to the digit position
+        key = (value, dotSize, dotOffset, slant, scale, self.digiDigitColor.rgba(), dpr)
+        glyph = self.glyphCache.get(key)
+        if glyph is None:
+            glyph = self._renderGlyph(value, dotSize, dotOffset, slant, scale, dpr)
+            self.glyphCache[key] = glyph
+        return glyph
+
+    def _renderGlyph(self, value, dotSize, dotOffset, slant, scale, dpr):
+        dots = self._digitDots(value, dotOffset, slant)
+        # dot radius plus outline pen and antialiasing
+        margin = dotSize + 1.0
+        left = min(dot.x() for dot in dots) - margin
+        top = min(dot.y() for dot in dots) - margin
+        right = max(dot.x() for dot in dots) + margin
+        bottom = max(dot.y() for dot in dots) + margin
+        bounds = QtCore.QRectF(left, top, right - left, bottom - top)
+
+        pixmap = QtGui.QPixmap(math.ceil(bounds.width() * scale * dpr), math.ceil(bounds.height() * scale * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(QtCore.Qt.transparent)
+        painter = QtGui.QPainter(pixmap)
+        painter.setRenderHints(QtGui.QPainter.Antialiasing)
+        painter.scale(scale, scale)
+        painter.translate(-bounds.left(), -bounds.top())
+        painter.setBrush(self.digiDigitColor)
+        painter.setPen(self.digiDigitColor)
+        for dot in dots:
+            painter.drawEllipse(dot, dotSize, dotSize)
+        painter.end()
+        return pixmap, bounds
+
+    def drawDigit(self, painter, digitStartPosX=0.0, digitStartPosY=0.0, value=8, dotSize= 1.6, dotOffset = 4.5, slant = 19):
+        value = int(value)
+        transform = painter.worldTransform()
+        if transform.type() > QtGui.QTransform.TxScale:
+            # rotated or sheared painter, draw dots directly
+            for dot in self._digitDots(value, dotOffset, slant):
+                painter.drawEllipse(QtCore.QPointF(digitStartPosX + dot.x(), digitStartPosY + dot.y()), dotSize, dotSize)
+            return
+
+        dpr = self.devicePixelRatioF()
+        pixmap, bounds = self.digitGlyph(value, dotSize, dotOffset, slant, transform.m11(), dpr)
+        # blit unscaled, snapped to the device pixel grid
+        target = transform.map(QtCore.QPointF(digitStartPosX + bounds.left(), digitStartPosY + bounds.top()))
+        target = QtCore.QPointF(round(target.x() * dpr) / dpr, round(target.y() * dpr) / dpr)
+        painter.save()
+        painter.resetTransform()
+        painter.drawPixmap(target, pixmap)
+        painter.restore()
 
 
 if __name__ == '__main__':
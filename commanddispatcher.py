@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# commanddispatcher.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+import functools
+import threading
+
+
+class CommandBatch:
+    # commands handed from another thread to CommandDispatcher.runBatch,
+    # done is set when results holds one result per line
+    # a batch the sender gave up on with cancel() is not run anymore, so it runs once or not at all
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.results = None
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        self.started = False
+        self.cancelled = False
+
+    def start(self):
+        # returns False if the batch was cancelled before
+        with self.lock:
+            if self.cancelled:
+                return False
+            self.started = True
+            return True
+
+    def cancel(self):
+        # returns False if the batch is already running or done
+        with self.lock:
+            if self.started:
+                return False
+            self.cancelled = True
+            return True
+
+
+class CommandDispatcher:
+    # parses "COMMAND:value" lines of datagrams and calls the registered handlers
+    # "CONF:group:param=content" lines are looked up by (group, param)
+    # lines are sliced as memoryviews of the datagram, which hash like bytes keys
+    #
+    # with a scheduler, commands are collected and run once per frame: of several
+    # coalescable commands for the same target only the last one runs, all other
+    # commands keep their order and nothing is merged across them
+    frameInterval = 16
+
+    def __init__(self, scheduler=None):
+        self.handlers = {}
+        self.confHandlers = {}
+        self.counters = {}
+        self.parseErrors = 0
+        self.unknownCommands = 0
+        self.coalesced = 0
+        self.handlerErrors = 0
+        self.handlers[b"CONF"] = ("CONF", self.resolveConf, True, False, False)
+        self.counters["CONF"] = 0
+
+        self.batch = []
+        self.targets = {}  # target -> index of its command in the batch
+        self.flushTimer = None
+        if scheduler is not None:
+            self.flushTimer = scheduler.timer(self.flush, name="commandFlush")
+            self.flushTimer.setSingleShot(True)
+
+    def register(self, command, handler, coalesce=False, withSender=False):
+        # handler is called with the decoded value, or with the sender given to
+        # dispatch() and the value if withSender is set
+        # coalesce is set for commands that only set the state of their target
+        self.handlers[command.encode()] = (command, handler, False, coalesce, withSender)
+        self.counters[command] = 0
+
+    def registerValues(self, command, actions):
+        # handlers for single values like ON/OFF, other values are ignored
+        def handler(value):
+            action = actions.get(value)
+            if action is not None:
+                action()
+
+        self.register(command, handler)
+
+    def registerConf(self, group, param, handler):
+        # handler is called with the decoded content
+        self.confHandlers[(group.encode(), param.encode())] = handler
+
+    def dispatch(self, data, sender=None):
+        data = bytes(data)
+        view = memoryview(data)
+        start = 0
+        end = len(data)
+        while start < end:
+            eol = data.find(b"\n", start)
+            if eol < 0:
+                eol = end
+            self.dispatchLine(data, view, start, eol, sender=sender)
+            start = eol + 1
+
+    def dispatchLine(self, data, view, start, end, run=None, sender=None):
+        # returns the result of the line, "ok" or "error: ..."
+        # run executes the command at once instead of adding it to the frame batch
+        if end > start and data[end - 1] == 13:
+            end -= 1
+        if start == end:
+            return "error: empty line"
+        colon = data.find(b":", start, end)
+        if colon < 0:
+            self.parseErrors += 1
+            return "error: no command"
+        entry = self.handlers.get(view[start:colon])
+        if entry is None:
+            self.unknownCommands += 1
+            return "error: unknown command"
+        name, handler, raw, coalesce, withSender = entry
+        try:
+            if raw:
+                handler, value = handler(data, view, colon + 1, end)
+            else:
+                value = str(view[colon + 1:end], "utf_8")
+        except ValueError:
+            # broken line or value encoding, skip only this line
+            self.parseErrors += 1
+            return "error: malformed line"
+        if handler is None:
+            return "error: unknown setting"
+        self.counters[name] += 1
+        if withSender:
+            handler = functools.partial(handler, sender)
+        if run is not None:
+            return run(handler, value)
+        if coalesce:
+            self.submit(handler, value, name)
+        else:
+            self.submit(handler, value)
+        return "ok"
+
+    def dispatchBatch(self, lines):
+        # runs the commands at once and in order, after those waiting for the frame
+        # returns one result per line
+        self.flush()
+        results = []
+        for line in lines:
+            data = line.encode()
+            results.append(self.dispatchLine(data, memoryview(data), 0, len(data), self.execute))
+        return results
+
+    def runBatch(self, batch):
+        # slot for a CommandBatch sent from another thread
+        if not batch.start():
+            return
+        try:
+            batch.results = self.dispatchBatch(batch.lines)
+        finally:
+            batch.done.set()
+
+    def resolveConf(self, data, view, start, end):
+        colon = data.find(b":", start, end)
+        equals = data.find(b"=", colon + 1, end)
+        if colon < 0 or equals < 0:
+            raise ValueError("malformed CONF line")
+        handler = self.confHandlers.get((view[start:colon], view[colon + 1:equals]))
+        return handler, str(view[equals + 1:end], "utf_8")
+
+    def submit(self, handler, value, target=None):
+        if self.flushTimer is None:
+            self.execute(handler, value)
+            return
+        if target is not None:
+            index = self.targets.get(target)
+            if index is not None:
+                self.batch[index] = (handler, value)
+                self.coalesced += 1
+                return
+            self.targets[target] = len(self.batch)
+        else:
+            # stateful command, later commands must not move before it
+            self.targets.clear()
+        self.batch.append((handler, value))
+        if not self.flushTimer.isActive():
+            self.flushTimer.start(self.frameInterval)
+
+    def flush(self):
+        # runs from the scheduler, execute() keeps a failing command from dropping the rest of the frame
+        if self.flushTimer is not None:
+            self.flushTimer.stop()
+        batch = self.batch
+        self.batch = []
+        self.targets = {}
+        for handler, value in batch:
+            self.execute(handler, value)
+
+    def execute(self, handler, value):
+        # a failing handler only loses its own command, never the rest of the datagram or frame
+        try:
+            handler(value)
+        except ValueError as e:
+            # e.g. no number for AIR3TIME
+            self.parseErrors += 1
+            return "error: %s" % e
+        except Exception as e:
+            self.handlerErrors += 1
+            print("command handler error: %r" % e)
+            return "error: %s" % e
+        return "ok"
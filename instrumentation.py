@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# instrumentation.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+# timing probes that can be switched on at runtime, recorded into fixed size
+# ring buffers and dumped as percentile summaries
+
+import array
+import os
+import tempfile
+import time
+
+
+class RingBuffer:
+    def __init__(self, size):
+        self.samples = array.array('d', bytes(8 * size))
+        self.size = size
+        self.index = 0
+        self.count = 0
+
+    def add(self, value):
+        self.samples[self.index] = value
+        self.index = (self.index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def values(self):
+        if self.count < self.size:
+            return self.samples[:self.count].tolist()
+        return self.samples[self.index:].tolist() + self.samples[:self.index].tolist()
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Instrumentation:
+    # record(name, seconds) is a no-op while disabled
+    bufferSize = 2048
+
+    def __init__(self):
+        self.enabled = False
+        self.series = {}
+        self.enabledSince = None
+
+    def setEnabled(self, enabled):
+        if enabled and not self.enabled:
+            # start a fresh measurement
+            self.series = {}
+            self.enabledSince = time.time()
+        self.enabled = enabled
+        print("instrumentation %s" % ("enabled" if enabled else "disabled"))
+
+    def toggle(self):
+        self.setEnabled(not self.enabled)
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        buffer = self.series.get(name)
+        if buffer is None:
+            buffer = self.series[name] = RingBuffer(self.bufferSize)
+        buffer.add(seconds)
+
+    def summary(self):
+        # name -> (count, p50, p90, p99, max) in seconds
+        result = {}
+        for name, buffer in sorted(self.series.items()):
+            ordered = sorted(buffer.values())
+            if ordered:
+                result[name] = (len(ordered), percentile(ordered, 0.5), percentile(ordered, 0.9),
+                                percentile(ordered, 0.99), ordered[-1])
+        return result
+
+    def dump(self, path=None):
+        # writes the summary in ms to path or a new file in the temp dir, returns the path
+        if path is None:
+            path = os.path.join(tempfile.gettempdir(), time.strftime("oas-profile-%Y%m%d-%H%M%S.txt"))
+        with open(path, "w") as output:
+            if self.enabledSince:
+                output.write("# since %s\n" % time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.enabledSince)))
+            output.write("%-32s %8s %9s %9s %9s %9s\n" % ("probe (ms)", "count", "p50", "p90", "p99", "max"))
+            for name, (count, p50, p90, p99, maximum) in self.summary().items():
+                output.write("%-32s %8d %9.3f %9.3f %9.3f %9.3f\n" % (name, count, p50 * 1000, p90 * 1000,
+                                                                       p99 * 1000, maximum * 1000))
+        print("instrumentation summary written to %s" % path)
+        return path
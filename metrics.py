@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# metrics.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+# metrics in the Prometheus text format
+# values are plain attributes updated in place, so observing allocates nothing
+# counters are incremented from the GUI thread and the HTTP server threads, updates hold a lock
+
+import bisect
+import os
+import threading
+import time
+
+# seconds, from sub millisecond paints up to slow NTP checks
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def formatValue(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class Counter:
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def set(self, value):
+        # for counters kept by other objects and copied on every scrape
+        with self.lock:
+            self.value = value
+
+    def render(self, lines):
+        lines.append("# HELP %s %s" % (self.name, self.help))
+        lines.append("# TYPE %s counter" % self.name)
+        lines.append("%s %s" % (self.name, formatValue(self.value)))
+
+
+class Gauge(Counter):
+    def render(self, lines):
+        lines.append("# HELP %s %s" % (self.name, self.help))
+        lines.append("# TYPE %s gauge" % self.name)
+        lines.append("%s %s" % (self.name, formatValue(self.value)))
+
+
+class LabeledCounter:
+    # counter per value of one label, the values are known up front
+    def __init__(self, name, help, label, values=()):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.values = dict.fromkeys(values, 0)
+        self.lock = threading.Lock()
+
+    def inc(self, key, amount=1):
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def update(self, values):
+        # copy a dict of counts kept by another object
+        with self.lock:
+            self.values.update(values)
+
+    def render(self, lines):
+        lines.append("# HELP %s %s" % (self.name, self.help))
+        lines.append("# TYPE %s counter" % self.name)
+        with self.lock:
+            values = list(self.values.items())
+        for key, value in values:
+            lines.append('%s{%s="%s"} %s' % (self.name, self.label, key, formatValue(value)))
+
+
+class Histogram:
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # last slot counts values above the largest bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self, lines):
+        lines.append("# HELP %s %s" % (self.name, self.help))
+        lines.append("# TYPE %s histogram" % self.name)
+        # consistent copy, the buckets have to add up to the count
+        with self.lock:
+            counts = list(self.counts)
+            total = self.sum
+            count = self.count
+        cumulative = 0
+        for bound, bucketCount in zip(self.buckets, counts):
+            cumulative += bucketCount
+            lines.append('%s_bucket{le="%s"} %d' % (self.name, bound, cumulative))
+        lines.append('%s_bucket{le="+Inf"} %d' % (self.name, count))
+        lines.append("%s_sum %s" % (self.name, repr(total)))
+        lines.append("%s_count %d" % (self.name, count))
+
+
+class MetricsRegistry:
+    # collectors are called with the registry on every scrape, to copy values
+    # that are kept elsewhere into gauges and counters
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+        self.startTime = time.time()
+        self.uptime = self.gauge("process_uptime_seconds", "Seconds since OnAirScreen was started")
+        self.rss = self.gauge("process_resident_memory_bytes", "Resident memory size in bytes")
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help):
+        return self.add(Counter(name, help))
+
+    def gauge(self, name, help):
+        return self.add(Gauge(name, help))
+
+    def labeledCounter(self, name, help, label, values=()):
+        return self.add(LabeledCounter(name, help, label, values))
+
+    def histogram(self, name, help, buckets=DEFAULT_BUCKETS):
+        return self.add(Histogram(name, help, buckets))
+
+    def addCollector(self, collector):
+        self.collectors.append(collector)
+
+    def collectProcess(self):
+        self.uptime.set(time.time() - self.startTime)
+        try:
+            with open("/proc/self/statm") as statm:
+                self.rss.set(int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"))
+        except (OSError, ValueError, AttributeError):
+            # no procfs
+            pass
+
+    def render(self):
+        self.collectProcess()
+        for collector in self.collectors:
+            collector(self)
+        lines = []
+        for metric in self.metrics:
+            metric.render(lines)
+        lines.append("")
+        return "\n".join(lines).encode()
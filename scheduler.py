@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# scheduler.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+import collections
+import heapq
+import itertools
+import math
+import time
+
+from PyQt5.QtCore import Qt, QObject, QTimer
+
+
+class ScheduledTimer:
+    # QTimer like handle of a job in the TickScheduler, intervals are given in ms
+
+    def __init__(self, scheduler, callback, aligned=False, name=None):
+        self.scheduler = scheduler
+        self.callback = callback
+        self.name = name or getattr(callback, "__name__", "job")
+        # aligned jobs fire on multiples of the interval on the wall clock
+        self.aligned = aligned
+        self.interval = 0.0
+        self.singleShot = False
+        self.active = False
+        self.generation = 0
+        self.deadline = 0.0  # monotonic
+        # seconds the last run was behind its deadline
+        self.lateness = 0.0
+
+    def setSingleShot(self, value):
+        self.singleShot = value
+
+    def setInterval(self, msec):
+        self.interval = msec / 1000.0
+
+    def start(self, msec=None):
+        if msec is not None:
+            self.setInterval(msec)
+        self.scheduler.schedule(self)
+
+    def stop(self):
+        self.scheduler.cancel(self)
+
+    def isActive(self):
+        return self.active
+
+
+class TickScheduler(QObject):
+    # one precise single shot QTimer serves all registered jobs
+    # jobs due within coalesceWindow of each other run in one wakeup, never early
+    coalesceWindow = 0.005
+
+    def __init__(self, parent=None):
+        QObject.__init__(self, parent)
+        self.queue = []  # heap of (deadline, seq, job, generation)
+        # queued entries of an older generation of their job, see compact()
+        self.stale = 0
+        self.sequence = itertools.count()
+        self.wakeupTimer = QTimer(self)
+        self.wakeupTimer.setSingleShot(True)
+        self.wakeupTimer.setTimerType(Qt.PreciseTimer)
+        self.wakeupTimer.timeout.connect(self.run)
+        self.wakeups = 0
+        self.wakeupTimes = collections.deque(maxlen=512)
+        # optional callable(job, lateness, duration) told about every run of a job
+        self.jobObserver = None
+
+    def timer(self, callback, aligned=False, name=None):
+        return ScheduledTimer(self, callback, aligned, name)
+
+    def singleShot(self, msec, callback, name=None):
+        job = ScheduledTimer(self, callback, name=name)
+        job.setSingleShot(True)
+        job.start(msec)
+        return job
+
+    def schedule(self, job):
+        if job.active:
+            # the queued entry of the previous start() becomes stale
+            self.stale += 1
+        job.generation += 1
+        job.active = True
+        job.deadline = self.nextDeadline(job, time.monotonic())
+        heapq.heappush(self.queue, (job.deadline, next(self.sequence), job, job.generation))
+        self.arm()
+
+    def cancel(self, job):
+        # queued entries of the job are dropped lazily
+        if job.active:
+            self.stale += 1
+        job.generation += 1
+        job.active = False
+        self.arm()
+
+    def nextDeadline(self, job, now):
+        if job.aligned and job.interval > 0:
+            wallclock = time.time()
+            boundary = (math.floor(wallclock / job.interval) + 1) * job.interval
+            return now + (boundary - wallclock)
+        return now + job.interval
+
+    def run(self):
+        now = time.monotonic()
+        self.wakeups += 1
+        self.wakeupTimes.append(now)
+
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            deadline, seq, job, generation = heapq.heappop(self.queue)
+            if generation == job.generation:
+                due.append(job)
+            else:
+                self.stale -= 1
+
+        for job in due:
+            job.lateness = now - job.deadline
+            if job.singleShot:
+                job.active = False
+            else:
+                if job.aligned:
+                    job.deadline = self.nextDeadline(job, now)
+                else:
+                    # keep the phase of periodic jobs, skip missed runs
+                    job.deadline += job.interval
+                    if job.deadline <= now:
+                        job.deadline = now + job.interval
+                heapq.heappush(self.queue, (job.deadline, next(self.sequence), job, job.generation))
+
+        observer = self.jobObserver
+        for job in due:
+            if observer:
+                start = time.perf_counter()
+                job.callback()
+                observer(job, job.lateness, time.perf_counter() - start)
+            else:
+                job.callback()
+        self.arm()
+
+    def arm(self):
+        # drop cancelled entries, then sleep until the next deadline
+        if self.stale > 64 and self.stale * 2 > len(self.queue):
+            self.compact()
+        queue = self.queue
+        while queue and queue[0][3] != queue[0][2].generation:
+            heapq.heappop(queue)
+            self.stale -= 1
+        if not queue:
+            self.wakeupTimer.stop()
+            return
+
+        # wake up once for all jobs due shortly after the first one, only the top
+        # of the heap holding entries within the window is visited
+        limit = queue[0][0] + self.coalesceWindow
+        target = queue[0][0]
+        pending = [0]
+        while pending:
+            index = pending.pop()
+            deadline, seq, job, generation = queue[index]
+            if deadline > limit:
+                continue
+            if generation == job.generation and deadline > target:
+                target = deadline
+            pending.extend(child for child in (2 * index + 1, 2 * index + 2) if child < len(queue))
+        delay = max(0.0, target - time.monotonic())
+        self.wakeupTimer.start(int(math.ceil(delay * 1000)))
+
+    def compact(self):
+        # rebuild the heap without stale entries once they make up most of it
+        self.queue = [entry for entry in self.queue if entry[3] == entry[2].generation]
+        heapq.heapify(self.queue)
+        self.stale = 0
+
+    def wakeupsPerSecond(self, window=10.0):
+        # also called from the HTTP threads, the copy keeps the GUI thread from changing the deque underneath
+        now = time.monotonic()
+        return sum(1 for wakeup in list(self.wakeupTimes) if wakeup > now - window) / window
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# screenstate.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+import collections
+import json
+import socket
+import threading
+
+from websocketserver import encodeFrame
+
+
+class Subscriber:
+    # queue of encoded frames for one connection, the socket pair wakes up its
+    # sending thread without polling
+    maxQueued = 256
+
+    def __init__(self):
+        self.frames = collections.deque()
+        self.overflow = False
+        self.wakeupReader, self.wakeupWriter = socket.socketpair()
+        self.wakeupReader.setblocking(False)
+        self.wakeupWriter.setblocking(False)
+
+    def push(self, frame):
+        if len(self.frames) >= self.maxQueued:
+            # client does not keep up, its thread closes the connection
+            self.overflow = True
+        else:
+            self.frames.append(frame)
+        try:
+            self.wakeupWriter.send(b"\0")
+        except (BlockingIOError, OSError):
+            # a wakeup is already pending
+            pass
+
+    def take(self):
+        try:
+            while self.wakeupReader.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        frames = []
+        while self.frames:
+            frames.append(self.frames.popleft())
+        return frames
+
+    def close(self):
+        self.wakeupReader.close()
+        self.wakeupWriter.close()
+
+
+class ScreenState:
+    # thread safe copy of what the screen shows, updated from the GUI thread
+    # every change increments the version and is pushed once encoded to all subscribers
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.state = {}
+        self.version = 0
+        self.subscribers = set()
+        # (version, encoded full state) of the last snapshot
+        self.snapshotCache = (-1, b"")
+
+    def update(self, values):
+        with self.lock:
+            delta = {key: value for key, value in values.items()
+                     if key not in self.state or self.state[key] != value}
+            if not delta:
+                return
+            self.state.update(delta)
+            self.version += 1
+            if self.subscribers:
+                frame = encodeFrame(self.encode({"version": self.version, "changes": delta}))
+                for subscriber in self.subscribers:
+                    subscriber.push(frame)
+            self.changed.notify_all()
+
+    def set(self, key, value):
+        self.update({key: value})
+
+    def snapshot(self):
+        with self.lock:
+            return self.version, dict(self.state)
+
+    def snapshotJson(self):
+        # returns (version, json) of the full state, encoded once per version
+        with self.lock:
+            return self.encodedSnapshot()
+
+    def encodedSnapshot(self):
+        if self.snapshotCache[0] != self.version:
+            self.snapshotCache = (self.version, self.encode({"version": self.version, "state": self.state}))
+        return self.snapshotCache
+
+    def waitForChange(self, version, timeout):
+        # blocks until the version differs from the given one, returns the current version
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def subscribe(self):
+        # returns the subscriber and the frame with the full state it starts from
+        subscriber = Subscriber()
+        with self.lock:
+            self.subscribers.add(subscriber)
+            frame = encodeFrame(self.encodedSnapshot()[1])
+        return subscriber, frame
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+        subscriber.close()
+
+    @staticmethod
+    def encode(message):
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode()
@@ -37,9 +37,9 @@
 
 from PyQt5.QtGui import QPalette, QColor
 from PyQt5.QtWidgets import QWidget, QColorDialog, QFileDialog
-from PyQt5.QtCore import QSettings, QVariant, pyqtSignal
+from PyQt5.QtCore import QSettings, pyqtSignal
 from settings import Ui_Settings
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import json
 
 versionString = "0.9.1beta2"
@@ -51,10 +51,19 @@ weatherWidgetFallback = """
 """
 
 # class OASSettings for use from OAC
+# the config is versioned, every applied change set bumps the version by one. changes are exchanged as
+# JSON-patch style deltas: {"base": 4, "version": 5, "ops": [{"op": "replace", "path": "/LED1/text", "value": ...}]}
+# ops are computed against the config of the base version, so a key added and changed since then is one "add"
+# and a key added and removed again is no op at all. deltas come from the network, a delta with a malformed op
+# is not applied at all and treated like a delta that does not fit the local version
 class OASSettings:
     def __init__(self):
         self.config = defaultdict(dict)
         self.currentgroup = None
+        self.version = 0
+        # values of the base version per (group, key), and the keys touched since
+        self.base = {}
+        self.pending = set()
 
     def beginGroup(self, group):
         self.currentgroup = group
@@ -64,18 +73,218 @@ class OASSettings:
 
     def setValue(self, name, value):
         if self.currentgroup:
-            self.config[self.currentgroup][name] = value
-        pass
+            content = self.config[self.currentgroup]
+            if name in content and content[name] == value:
+                return
+            self.pending.add((self.currentgroup, name))
+            content[name] = value
+
+    def remove(self, name):
+        if self.currentgroup and name in self.config[self.currentgroup]:
+            del self.config[self.currentgroup][name]
+            self.pending.add((self.currentgroup, name))
+
+    def value(self, name, default=None, type=None):
+        value = self.config[self.currentgroup].get(name, default) if self.currentgroup else default
+        if value is None or type is None:
+            return value
+        if type is bool and isinstance(value, str):
+            return value.lower() == 'true'
+        return type(value)
+
+    def load(self, config, version=0):
+        # replace the whole config, used for a full resync
+        self.config = defaultdict(dict)
+        for group, content in config.items():
+            self.config[group].update(content)
+        self.version = version
+        self.rebase()
+
+    def normalize(self, group, name, value):
+        # store value as it is read back from the dialog, without recording a change
+        self.config[group][name] = value
+        self.base[(group, name)] = value
+
+    def rebase(self):
+        # the current config becomes the base of the next delta
+        self.base = {(group, name): value for group, content in self.config.items() for name, value in content.items()}
+        self.pending = set()
+
+    def takeDelta(self):
+        # return the pending changes as delta against the current version or None if nothing changed
+        ops = []
+        for group, name in sorted(self.pending):
+            path = encodePointer(group, name)
+            content = self.config.get(group, {})
+            inBase = (group, name) in self.base
+            if name not in content:
+                if inBase:
+                    ops.append({"op": "remove", "path": path})
+            elif not inBase:
+                ops.append({"op": "add", "path": path, "value": content[name]})
+            elif content[name] != self.base[(group, name)]:
+                ops.append({"op": "replace", "path": path, "value": content[name]})
+            if name in content:
+                self.base[(group, name)] = content[name]
+            else:
+                self.base.pop((group, name), None)
+        self.pending = set()
+        if not ops:
+            return None
+        delta = {"base": self.version, "version": self.version + 1, "ops": ops}
+        self.version += 1
+        return delta
+
+    def applyDelta(self, delta):
+        # apply a delta, returns the changed (group, key) pairs or None if the delta does not fit our version
+        if not isinstance(delta, dict) or delta.get("base") != self.version or not isinstance(delta.get("version"), int):
+            return None
+        ops = []
+        for op in delta.get("ops", ()):
+            if not isinstance(op, dict) or not isinstance(op.get("path"), str):
+                return None
+            try:
+                group, name = decodePointer(op["path"])
+            except ValueError:
+                return None
+            if op.get("op") == "remove" or (op.get("op") in ("add", "replace") and "value" in op):
+                ops.append((op["op"], group, name, op.get("value")))
+            else:
+                return None
+        changed = []
+        for kind, group, name, value in ops:
+            if kind == "remove":
+                self.config[group].pop(name, None)
+            else:
+                self.config[group][name] = value
+            changed.append((group, name))
+        self.version = delta["version"]
+        self.rebase()
+        return changed
+
+
+def encodePointer(group, name):
+    # JSON pointer "/group/name" with RFC 6901 escaping
+    return "/%s/%s" % tuple(part.replace('~', '~0').replace('/', '~1') for part in (group, name))
+
+
+def decodePointer(path):
+    # raises ValueError if path is not of the form "/group/name"
+    parts = path.split('/')
+    if len(parts) != 3 or parts[0]:
+        raise ValueError("invalid settings pointer %r" % path)
+    group, name = parts[1:]
+    return tuple(part.replace('~1', '/').replace('~0', '~') for part in (group, name))
+
+
+# class SettingsCache: typed in-memory snapshot of the config used by MainScreen
+# values are read from the backend once in load(), hot paths only read attributes
+class SettingsCache:
+    # default active LED texts and colors per LED number
+    ledDefaults = {
+        1: ('ON AIR', '#FF0000'),
+        2: ('PHONE', '#DCDC00'),
+        3: ('DOORBELL', '#00C8C8'),
+        4: ('ARI', '#FF00FF'),
+    }
 
-    def value(self, name, default=None):
-        try:
-            return QVariant(self.config[self.currentgroup][name])
-        except KeyError:
-            return QVariant(default)
+    def __init__(self):
+        # number of values read from the QSettings backend
+        self.backendReads = 0
+        self.load()
+
+    def _value(self, settings, name, default, valuetype=str):
+        self.backendReads += 1
+        return settings.value(name, default, type=valuetype)
+
+    def load(self):
+        # re-read the config, returns the names of the attributes whose value changed
+        previous = self.snapshot()
+        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
+
+        settings.beginGroup("General")
+        self.fullscreen = self._value(settings, 'fullscreen', True, bool)
+        self.stationName = self._value(settings, 'stationname', 'Radio Eriwan')
+        self.slogan = self._value(settings, 'slogan', 'Your question is our motivation')
+        self.stationColor = self._value(settings, 'stationcolor', '#FFAA00')
+        self.sloganColor = self._value(settings, 'slogancolor', '#FFAA00')
+        settings.endGroup()
+
+        settings.beginGroup("NTP")
+        self.ntpCheck = self._value(settings, 'ntpcheck', True, bool)
+        self.ntpCheckServer = self._value(settings, 'ntpcheckserver', 'pool.ntp.org')
+        settings.endGroup()
+
+        settings.beginGroup("LEDS")
+        self.ledInactiveBGColor = self._value(settings, 'inactivebgcolor', '#222222')
+        self.ledInactiveTextColor = self._value(settings, 'inactivetextcolor', '#555555')
+        settings.endGroup()
+
+        self.ledText = {}
+        self.ledActiveBGColor = {}
+        self.ledActiveTextColor = {}
+        for led, (text, bgcolor) in self.ledDefaults.items():
+            settings.beginGroup("LED%d" % led)
+            self.ledText[led] = self._value(settings, 'text', text)
+            self.ledActiveBGColor[led] = self._value(settings, 'activebgcolor', bgcolor)
+            self.ledActiveTextColor[led] = self._value(settings, 'activetextcolor', '#FFFFFF')
+            settings.endGroup()
+
+        settings.beginGroup("Clock")
+        self.clockDigital = self._value(settings, 'digital', True, bool)
+        self.showSeconds = self._value(settings, 'showSeconds', False, bool)
+        self.digitalHourColor = self._value(settings, 'digitalhourcolor', '#3232FF')
+        self.digitalSecondColor = self._value(settings, 'digitalsecondcolor', '#FF9900')
+        self.digitalDigitColor = self._value(settings, 'digitaldigitcolor', '#3232FF')
+        self.logoPath = self._value(settings, 'logopath', ':/astrastudio_logo/images/astrastudio_transparent.png')
+        settings.endGroup()
+
+        settings.beginGroup("Network")
+        self.udpPort = int(self._value(settings, 'udpport', '3310'))
+        self.httpPort = int(self._value(settings, 'httpport', '8010'))
+        self.multicast = self._value(settings, 'multicast', False, bool)
+        self.multicastGroup = self._value(settings, 'multicastgroup', '239.255.33.10')
+        # additional groups of this screen, comma separated
+        self.multicastGroups = [group.strip() for group in self._value(settings, 'multicastgroups', '').split(',')
+                                if group.strip()]
+        settings.endGroup()
+
+        settings.beginGroup("Formatting")
+        self.dateFormat = self._value(settings, 'dateFormat', 'dddd, dd. MMMM yyyy')
+        self.textClockLanguage = self._value(settings, 'textClockLanguage', 'English')
+        self.isAmPm = self._value(settings, 'isAmPm', False, bool)
+        settings.endGroup()
+
+        settings.beginGroup("WeatherWidget")
+        self.weatherWidgetEnabled = self._value(settings, 'WeatherWidgetEnabled', False, bool)
+        self.weatherWidgetCode = self._value(settings, 'WeatherWidgetCode', weatherWidgetFallback)
+        # JSON file or URL for the native weather panel, the web widget is used if empty
+        self.weatherWidgetSource = self._value(settings, 'WeatherWidgetSource', '')
+        settings.endGroup()
+
+        return {name for name, value in self.snapshot().items() if name not in previous or previous[name] != value}
+
+    def snapshot(self):
+        # copy of all config attributes, the per LED dicts are copied as well
+        return {name: dict(value) if isinstance(value, dict) else value for name, value in vars(self).items()
+                if name != 'backendReads'}
+
+    def setFullscreen(self, value):
+        # write through to the backend and keep the snapshot in sync
+        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
+        settings.beginGroup("General")
+        settings.setValue('fullscreen', value)
+        settings.endGroup()
+        self.fullscreen = value
 
 
 class Settings(QWidget, Ui_Settings):
+    # OAC mode: on every apply sigConfigChanged carries the changed keys as versioned delta (see OASSettings),
+    # nothing is emitted if no key changed. readConfigFromJson() takes a full dump or a delta, a delta that does
+    # not fit the local version is dropped and sigConfigResync asks the peer for the full config, which the peer
+    # sends with sendFullConfig()
     sigConfigChanged = pyqtSignal(int, str)
+    sigConfigResync = pyqtSignal(int)
     sigExitOAS = pyqtSignal()
     sigRebootHost = pyqtSignal()
     sigShutdownHost = pyqtSignal()
@@ -95,6 +304,7 @@ class Settings(QWidget, Ui_Settings):
 
         self.setupUi(self)
         self._connectSlots()
+        self._setupBindings()
         self.hide()
         # create settings object for use with OAC
         self.settings = OASSettings()
@@ -139,6 +349,8 @@ class Settings(QWidget, Ui_Settings):
     def resetSettings(self):
         resetSettings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
         resetSettings.clear()
+        # the backend no longer holds what the dialog shows, the next apply has to write every value
+        self.savedValues.clear()
         self.sigConfigFinished.emit()
         self.close()
 
@@ -176,113 +388,148 @@ class Settings(QWidget, Ui_Settings):
     def readConfigFromJson(self, row, config):
         # remember which row we are
         self.row = row
-        confdict = json.loads(unicode(config))
-        for group, content in confdict.items():
-            self.settings.beginGroup(group)
-            for key, value in content.items():
-                self.settings.setValue(key, value)
-            self.settings.endGroup()
+        try:
+            confdict = json.loads(config)
+        except ValueError:
+            confdict = None
+        if isinstance(confdict, dict) and "ops" in confdict:
+            self.readConfigDelta(confdict)
+            return
+        if isinstance(confdict, dict) and "config" in confdict:
+            content, version = confdict["config"], confdict.get("version", 0)
+        else:
+            # plain unversioned config dump
+            content, version = confdict, 0
+        if (not isinstance(content, dict) or not isinstance(version, int)
+                or not all(isinstance(group, dict) for group in content.values())):
+            # the config comes from the network, keep ours and ask again
+            self.sigConfigResync.emit(self.row)
+            return
+        self.settings.load(content, version)
         self.restoreSettingsFromConfig()
 
+    def readConfigDelta(self, delta):
+        changed = self.settings.applyDelta(delta)
+        if changed is None:
+            # we missed a change or the delta is malformed, ask for the full config
+            self.sigConfigResync.emit(self.row)
+            return
+        self.restoreSettingsFromConfig(changed)
+
     def readJsonFromConfig(self):
         # return json representation of config
         return json.dumps(self.settings.config)
 
-    def restoreSettingsFromConfig(self):
+    def readVersionedJsonFromConfig(self):
+        # full config with its version, the starting point for following deltas
+        return json.dumps({"version": self.settings.version, "config": self.settings.config})
+
+    def sendFullConfig(self):
+        # answer to sigConfigResync of the peer
+        self.sigConfigChanged.emit(self.row, self.readVersionedJsonFromConfig())
+
+    def _setupBindings(self):
+        # map every (group, key) to its default, value type and the dialog widget setter/getter
+        self.bindings = OrderedDict()
+        # last value read from or written to the backend per (group, key)
+        self.savedValues = {}
+
+        def bind(group, key, default, setter, getter, valuetype=str):
+            self.bindings[(group, key)] = (default, valuetype, setter, getter)
+
+        def bindColor(group, key, default, setter, getter):
+            bind(group, key, default, lambda value: setter(self.getColorFromName(value)),
+                 lambda: getter().name())
+
+        def bindText(group, key, default, widget):
+            bind(group, key, default, widget.setText, widget.displayText)
+
+        def bindCheckBox(group, key, default, widget):
+            bind(group, key, default, widget.setChecked, widget.isChecked, bool)
+
+        bindText("General", 'stationname', 'Radio Eriwan', self.StationName)
+        bindText("General", 'slogan', 'Your question is our motivation', self.Slogan)
+        bindColor("General", 'stationcolor', '#FFAA00', self.setStationNameColor, self.getStationNameColor)
+        bindColor("General", 'slogancolor', '#FFAA00', self.setSloganColor, self.getSloganColor)
+
+        bindCheckBox("NTP", 'ntpcheck', True, self.checkBox_NTPCheck)
+        bindText("NTP", 'ntpcheckserver', 'pool.ntp.org', self.NTPCheckServer)
+
+        bindColor("LEDS", 'inactivebgcolor', '#222222', self.setLEDInactiveBGColor, self.getLEDInactiveBGColor)
+        bindColor("LEDS", 'inactivetextcolor', '#555555', self.setLEDInactiveFGColor, self.getLEDInactiveFGColor)
+
+        for led, (text, bgcolor) in SettingsCache.ledDefaults.items():
+            group = "LED%d" % led
+            textWidget = getattr(self, "LED%dText" % led)
+            demoWidget = getattr(self, "LED%dDemo" % led)
+            bindCheckBox(group, 'used', True, getattr(self, "LED%d" % led))
+            bind(group, 'text', text, lambda value, textWidget=textWidget, demoWidget=demoWidget: (
+                textWidget.setText(value), demoWidget.setText(value)), textWidget.displayText)
+            bindColor(group, 'activebgcolor', bgcolor, getattr(self, "setLED%dBGColor" % led),
+                      getattr(self, "getLED%dBGColor" % led))
+            bindColor(group, 'activetextcolor', '#FFFFFF', getattr(self, "setLED%dFGColor" % led),
+                      getattr(self, "getLED%dFGColor" % led))
+            bindCheckBox(group, 'autoflash', False, getattr(self, "LED%dAutoflash" % led))
+            bindCheckBox(group, 'timedflash', False, getattr(self, "LED%dTimedflash" % led))
+
+        bind("Clock", 'digital', True, lambda value: (
+            self.clockDigital.setChecked(value), self.clockAnalog.setChecked(not value)),
+             self.clockDigital.isChecked, bool)
+        bindCheckBox("Clock", 'showSeconds', False, self.showSeconds)
+        bindColor("Clock", 'digitalhourcolor', '#3232FF', self.setDigitalHourColor, self.getDigitalHourColor)
+        bindColor("Clock", 'digitalsecondcolor', '#FF9900', self.setDigitalSecondColor, self.getDigitalSecondColor)
+        bindColor("Clock", 'digitaldigitcolor', '#3232FF', self.setDigitalDigitColor, self.getDigitalDigitColor)
+        bind("Clock", 'logopath', ':/astrastudio_logo/images/astrastudio_transparent.png', self.logoPath.setText,
+             self.logoPath.text)
+
+        bindText("Network", 'udpport', '3310', self.udpport)
+        bindText("Network", 'httpport', '8010', self.httpport)
+        bindCheckBox("Network", 'multicast', False, self.multicast)
+        bindText("Network", 'multicastgroup', '239.255.33.10', self.multicastgroup)
+        bindText("Network", 'multicastgroups', '', self.multicastgroups)
+
+        bindText("Formatting", 'dateFormat', 'dddd, dd. MMMM yyyy', self.dateFormat)
+        bind("Formatting", 'textClockLanguage', 'English', lambda value: self.textClockLanguage.setCurrentIndex(
+            self.textClockLanguage.findText(value)), self.textClockLanguage.currentText)
+        bind("Formatting", 'isAmPm', False, lambda value: (
+            self.time_am_pm.setChecked(value), self.time_24h.setChecked(not value)),
+             self.time_am_pm.isChecked, bool)
+
+        bind("WeatherWidget", 'WeatherWidgetEnabled', False, lambda value: (
+            self.weatherWidgetEnabled.setChecked(value), self.weatherWidgetCode.setEnabled(value)),
+             self.weatherWidgetEnabled.isChecked, bool)
+        bind("WeatherWidget", 'WeatherWidgetCode', weatherWidgetFallback, self.weatherWidgetCode.setPlainText,
+             self.weatherWidgetCode.toPlainText)
+        bindText("WeatherWidget", 'WeatherWidgetSource', '', self.weatherWidgetSource)
+
+    def restoreSettingsFromConfig(self, keys=None):
+        # restore the given (group, key) pairs into the dialog, all of them if keys is None
         if self.oacmode == True:
             settings = self.settings
         else:
             settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
 
-        # polulate text clock languages
-        self.textClockLanguage.clear()
-        self.textClockLanguage.addItems(self.textClockLanguages)
-
-        settings.beginGroup("General")
-        self.StationName.setText(settings.value('stationname', 'Radio Eriwan'))
-        self.Slogan.setText(settings.value('slogan', 'Your question is our motivation'))
-        self.setStationNameColor(self.getColorFromName(settings.value('stationcolor', '#FFAA00')))
-        self.setSloganColor(self.getColorFromName(settings.value('slogancolor', '#FFAA00')))
-        settings.endGroup()
-
-        settings.beginGroup("NTP")
-        self.checkBox_NTPCheck.setChecked(settings.value('ntpcheck', True, type=bool))
-        self.NTPCheckServer.setText(settings.value('ntpcheckserver', 'pool.ntp.org'))
-        settings.endGroup()
-
-        settings.beginGroup("LEDS")
-        self.setLEDInactiveBGColor(self.getColorFromName(settings.value('inactivebgcolor', '#222222')))
-        self.setLEDInactiveFGColor(self.getColorFromName(settings.value('inactivetextcolor', '#555555')))
-        settings.endGroup()
-
-        settings.beginGroup("LED1")
-        self.LED1.setChecked(settings.value('used', True, type=bool))
-        self.LED1Text.setText(settings.value('text', 'ON AIR'))
-        self.LED1Demo.setText(settings.value('text', 'ON AIR'))
-        self.setLED1BGColor(self.getColorFromName(settings.value('activebgcolor', '#FF0000')))
-        self.setLED1FGColor(self.getColorFromName(settings.value('activetextcolor', '#FFFFFF')))
-        self.LED1Autoflash.setChecked(settings.value('autoflash', False, type=bool))
-        self.LED1Timedflash.setChecked(settings.value('timedflash', False, type=bool))
-        settings.endGroup()
-
-        settings.beginGroup("LED2")
-        self.LED2.setChecked(settings.value('used', True, type=bool))
-        self.LED2Text.setText(settings.value('text', 'PHONE'))
-        self.LED2Demo.setText(settings.value('text', 'PHONE'))
-        self.setLED2BGColor(self.getColorFromName(settings.value('activebgcolor', '#DCDC00')))
-        self.setLED2FGColor(self.getColorFromName(settings.value('activetextcolor', '#FFFFFF')))
-        self.LED2Autoflash.setChecked(settings.value('autoflash', False, type=bool))
-        self.LED2Timedflash.setChecked(settings.value('timedflash', False, type=bool))
-        settings.endGroup()
-
-        settings.beginGroup("LED3")
-        self.LED3.setChecked(settings.value('used', True, type=bool))
-        self.LED3Text.setText(settings.value('text', 'DOORBELL'))
-        self.LED3Demo.setText(settings.value('text', 'DOORBELL'))
-        self.setLED3BGColor(self.getColorFromName(settings.value('activebgcolor', '#00C8C8')))
-        self.setLED3FGColor(self.getColorFromName(settings.value('activetextcolor', '#FFFFFF')))
-        self.LED3Autoflash.setChecked(settings.value('autoflash', False, type=bool))
-        self.LED3Timedflash.setChecked(settings.value('timedflash', False, type=bool))
-        settings.endGroup()
-
-        settings.beginGroup("LED4")
-        self.LED4.setChecked(settings.value('used', True, type=bool))
-        self.LED4Text.setText(settings.value('text', 'ARI'))
-        self.LED4Demo.setText(settings.value('text', 'ARI'))
-        self.setLED4BGColor(self.getColorFromName(settings.value('activebgcolor', '#FF00FF')))
-        self.setLED4FGColor(self.getColorFromName(settings.value('activetextcolor', '#FFFFFF')))
-        self.LED4Autoflash.setChecked(settings.value('autoflash', False, type=bool))
-        self.LED4Timedflash.setChecked(settings.value('timedflash', False, type=bool))
-        settings.endGroup()
-
-        settings.beginGroup("Clock")
-        self.clockDigital.setChecked(settings.value('digital', True, type=bool))
-        self.clockAnalog.setChecked(not settings.value('digital', True, type=bool))
-        self.showSeconds.setChecked(settings.value('showSeconds', False, type=bool))
-        self.setDigitalHourColor(self.getColorFromName(settings.value('digitalhourcolor', '#3232FF')))
-        self.setDigitalSecondColor(self.getColorFromName(settings.value('digitalsecondcolor', '#FF9900')))
-        self.setDigitalDigitColor(self.getColorFromName(settings.value('digitaldigitcolor', '#3232FF')))
-        self.logoPath.setText(
-            settings.value('logopath', ':/astrastudio_logo/images/astrastudio_transparent.png'))
-        settings.endGroup()
-
-        settings.beginGroup("Network")
-        self.udpport.setText(settings.value('udpport', '3310'))
-        self.httpport.setText(settings.value('httpport', '8010'))
-        settings.endGroup()
-
-        settings.beginGroup("Formatting")
-        self.dateFormat.setText(settings.value('dateFormat', 'dddd, dd. MMMM yyyy'))
-        self.textClockLanguage.setCurrentIndex(self.textClockLanguage.findText(settings.value('textClockLanguage', 'English')))
-        self.time_am_pm.setChecked(settings.value('isAmPm', False, type=bool))
-        self.time_24h.setChecked(not settings.value('isAmPm', False, type=bool))
-        settings.endGroup()
-
-        settings.beginGroup("WeatherWidget")
-        self.weatherWidgetEnabled.setChecked(settings.value('WeatherWidgetEnabled', False, type=bool))
-        self.weatherWidgetCode.setEnabled(settings.value('WeatherWidgetEnabled', False, type=bool))
-        self.weatherWidgetCode.setPlainText(settings.value('WeatherWidgetCode', weatherWidgetFallback))
-        settings.endGroup()
+        if keys is None:
+            # polulate text clock languages
+            self.textClockLanguage.clear()
+            self.textClockLanguage.addItems(self.textClockLanguages)
+            keys = self.bindings.keys()
+
+        for group, key in keys:
+            try:
+                default, valuetype, setter, getter = self.bindings[(group, key)]
+            except KeyError:
+                continue
+            settings.beginGroup(group)
+            value = settings.value(key, default, type=valuetype)
+            settings.endGroup()
+            setter(value)
+            # remember what the widget shows, getSettingsFromDialog only writes values that differ
+            self.savedValues[(group, key)] = getter()
+            if self.oacmode == True:
+                # keep the config in the form the dialog writes back ('#ffaa00', True), so the next
+                # delta does not carry every colour and bool of a loaded config
+                self.settings.normalize(group, key, self.savedValues[(group, key)])
 
     def getSettingsFromDialog(self):
         if self.oacmode == True:
@@ -290,87 +537,21 @@ class Settings(QWidget, Ui_Settings):
         else:
             settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
 
-        settings.beginGroup("General")
-        settings.setValue('stationname', self.StationName.displayText())
-        settings.setValue('slogan', self.Slogan.displayText())
-        settings.setValue('stationcolor', self.getStationNameColor().name())
-        settings.setValue('slogancolor', self.getSloganColor().name())
-        settings.endGroup()
-
-        settings.beginGroup("NTP")
-        settings.setValue('ntpcheck', self.checkBox_NTPCheck.isChecked())
-        settings.setValue('ntpcheckserver', self.NTPCheckServer.displayText())
-        settings.endGroup()
-
-        settings.beginGroup("LEDS")
-        settings.setValue('inactivebgcolor', self.getLEDInactiveBGColor().name())
-        settings.setValue('inactivetextcolor', self.getLEDInactiveFGColor().name())
-        settings.endGroup()
-
-        settings.beginGroup("LED1")
-        settings.setValue('used', self.LED1.isChecked())
-        settings.setValue('text', self.LED1Text.displayText())
-        settings.setValue('activebgcolor', self.getLED1BGColor().name())
-        settings.setValue('activetextcolor', self.getLED1FGColor().name())
-        settings.setValue('autoflash', self.LED1Autoflash.isChecked())
-        settings.setValue('timedflash', self.LED1Timedflash.isChecked())
-        settings.endGroup()
-
-        settings.beginGroup("LED2")
-        settings.setValue('used', self.LED2.isChecked())
-        settings.setValue('text', self.LED2Text.displayText())
-        settings.setValue('activebgcolor', self.getLED2BGColor().name())
-        settings.setValue('activetextcolor', self.getLED2FGColor().name())
-        settings.setValue('autoflash', self.LED2Autoflash.isChecked())
-        settings.setValue('timedflash', self.LED2Timedflash.isChecked())
-        settings.endGroup()
-
-        settings.beginGroup("LED3")
-        settings.setValue('used', self.LED3.isChecked())
-        settings.setValue('text', self.LED3Text.displayText())
-        settings.setValue('activebgcolor', self.getLED3BGColor().name())
-        settings.setValue('activetextcolor', self.getLED3FGColor().name())
-        settings.setValue('autoflash', self.LED3Autoflash.isChecked())
-        settings.setValue('timedflash', self.LED3Timedflash.isChecked())
-        settings.endGroup()
-
-        settings.beginGroup("LED4")
-        settings.setValue('used', self.LED4.isChecked())
-        settings.setValue('text', self.LED4Text.displayText())
-        settings.setValue('activebgcolor', self.getLED4BGColor().name())
-        settings.setValue('activetextcolor', self.getLED4FGColor().name())
-        settings.setValue('autoflash', self.LED4Autoflash.isChecked())
-        settings.setValue('timedflash', self.LED4Timedflash.isChecked())
-        settings.endGroup()
-
-        settings.beginGroup("Clock")
-        settings.setValue('digital', self.clockDigital.isChecked())
-        settings.setValue('showSeconds', self.showSeconds.isChecked())
-        settings.setValue('digitalhourcolor', self.getDigitalHourColor().name())
-        settings.setValue('digitalsecondcolor', self.getDigitalSecondColor().name())
-        settings.setValue('digitaldigitcolor', self.getDigitalDigitColor().name())
-        settings.setValue('logopath', self.logoPath.text())
-        settings.endGroup()
-
-        settings.beginGroup("Network")
-        settings.setValue('udpport', self.udpport.displayText())
-        settings.setValue('httpport', self.httpport.displayText())
-        settings.endGroup()
-
-        settings.beginGroup("Formatting")
-        settings.setValue('dateFormat', self.dateFormat.displayText())
-        settings.setValue('textClockLanguage', self.textClockLanguage.currentText())
-        settings.setValue('isAmPm', self.time_am_pm.isChecked())
-        settings.endGroup()
-
-        settings.beginGroup("WeatherWidget")
-        settings.setValue('WeatherWidgetEnabled', self.weatherWidgetEnabled.isChecked())
-        settings.setValue('WeatherWidgetCode', self.weatherWidgetCode.toPlainText())
-        settings.endGroup()
+        for (group, key), (default, valuetype, setter, getter) in self.bindings.items():
+            value = getter()
+            # OASSettings skips unchanged values itself and has to hold every key for a full resync
+            if self.oacmode != True and self.savedValues.get((group, key)) == value:
+                continue
+            settings.beginGroup(group)
+            settings.setValue(key, value)
+            settings.endGroup()
+            self.savedValues[(group, key)] = value
 
         if self.oacmode == True:
-            # send oac a signal the the config has changed
-            self.sigConfigChanged.emit(self.row, self.readJsonFromConfig())
+            # send oac a signal what has changed
+            delta = self.settings.takeDelta()
+            if delta:
+                self.sigConfigChanged.emit(self.row, json.dumps(delta))
 
     def applySettings(self):
         # apply settings button pressed
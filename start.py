@@ -38,19 +38,31 @@
 import os
 import sys
 import re
+import json
+import time
 from datetime import datetime
 
 from PyQt5.QtGui import QCursor, QPalette, QColor, QKeySequence, QIcon, QPixmap
 from PyQt5.QtWidgets import QApplication, QWidget, QColorDialog, QShortcut, QDialog, QLineEdit, QVBoxLayout, QLabel
-from PyQt5.QtCore import Qt, pyqtSignal, QSettings, QCoreApplication, QTimer, QObject, QVariant, QDate, QThread
+from PyQt5.QtCore import Qt, pyqtSignal, QSettings, QCoreApplication, QTimer, QObject, QVariant, QDate, QThread, \
+    QSocketNotifier
 from PyQt5.QtNetwork import QUdpSocket, QHostAddress, QHostInfo, QNetworkInterface
 from mainscreen import Ui_MainScreen
 import ntplib
 import signal
 import socket
-from settings_functions import Settings, versionString, weatherWidgetFallback
-from urllib.parse import unquote
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from settings_functions import Settings, SettingsCache, versionString
+from airtimer import AirTimer
+from scheduler import TickScheduler
+from warningmanager import WarningManager
+from commanddispatcher import CommandDispatcher, CommandBatch
+from screenstate import ScreenState
+from metrics import MetricsRegistry
+from instrumentation import Instrumentation
+from websocketserver import isUpgradeRequest, serveWebSocket
+from weatherwidget import WeatherPanel, providerForSource
+from urllib.parse import unquote, urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 #HOST = '127.0.0.1'
 HOST = '0.0.0.0'
@@ -58,8 +70,6 @@ HOST = '0.0.0.0'
 
 class MainScreen(QWidget, Ui_MainScreen):
     getTimeWindow: QDialog
-    ntpHadWarning: bool
-    ntpWarnMessage: str
 
     def __init__(self):
         QWidget.__init__(self)
@@ -67,6 +77,22 @@ class MainScreen(QWidget, Ui_MainScreen):
         self.setupUi(self)
 
         self.settings = Settings()
+        # what the screen shows, pushed to web panels
+        self.screenState = ScreenState()
+        self.setupMetrics()
+        # timing probes, toggled with Ctrl+I or CMD:PROFILE_ON/OFF
+        self.instrumentation = Instrumentation()
+        # typed snapshot of the config, refreshed on sigConfigFinished only
+        self.settingsCache = SettingsCache()
+        # date and format the date label was rendered for
+        self.dateKey = None
+        # all timers share one scheduler wakeup
+        self.scheduler = TickScheduler(self)
+        self.scheduler.jobObserver = self.observeJob
+        # QWebEngineView or native WeatherPanel of the weather widget, created on demand
+        self.weatherView = None
+        self.weatherPanel = None
+        self.setupConfigBindings()
         self.restoreSettingsFromConfig()
         # quit app from settings window
         self.settings.sigExitOAS.connect(self.exitOAS)
@@ -75,21 +101,17 @@ class MainScreen(QWidget, Ui_MainScreen):
         self.settings.sigConfigFinished.connect(self.configFinished)
         self.settings.sigConfigClosed.connect(self.configClosed)
 
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
-        settings.beginGroup("General")
-        if settings.value('fullscreen', True, type=bool):
+        if self.settingsCache.fullscreen:
             self.showFullScreen()
             app.setOverrideCursor(QCursor(Qt.BlankCursor))
-        settings.endGroup()
-        print("Loading Settings from: ", settings.fileName())
+        print("Loading Settings from: ", QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen").fileName())
 
         self.labelWarning.hide()
 
-        # init warning prio array (0-2
-        self.warnings = ["", "", ""]
 
         # add hotkey bindings
         QShortcut(QKeySequence("Ctrl+F"), self, self.toggleFullScreen)
+        QShortcut(QKeySequence("Ctrl+I"), self, self.toggleInstrumentation)
         QShortcut(QKeySequence("F"), self, self.toggleFullScreen)
         QShortcut(QKeySequence(16777429), self, self.toggleFullScreen)  # 'Display' Key on OAS USB Keyboard
         QShortcut(QKeySequence(16777379), self, self.shutdown_host)  # 'Calculator' Key on OAS USB Keyboard
@@ -126,92 +148,72 @@ class MainScreen(QWidget, Ui_MainScreen):
         self.LED3on = False
         self.LED4on = False
 
-        # Setup and start timers
-        self.ctimer = QTimer()
-        self.ctimer.timeout.connect(self.constantUpdate)
-        self.ctimer.start(100)
-        # LED timers
-        self.timerLED1 = QTimer()
-        self.timerLED1.timeout.connect(self.toggleLED1)
-        self.timerLED2 = QTimer()
-        self.timerLED2.timeout.connect(self.toggleLED2)
-        self.timerLED3 = QTimer()
-        self.timerLED3.timeout.connect(self.toggleLED3)
-        self.timerLED4 = QTimer()
-        self.timerLED4.timeout.connect(self.toggleLED4)
-
-        # Setup OnAir Timers
-        self.timerAIR1 = QTimer()
-        self.timerAIR1.timeout.connect(self.updateAIR1Seconds)
-        self.Air1Seconds = 0
+        # Setup and start timers, all of them share one scheduler wakeup
+        self.clockWidget.setScheduler(self.scheduler)
+        self.clockWidget.paintObserver = self.observeClockPaint
+        # warnings (priority 0-2) are shown by the warning manager
+        self.warningManager = WarningManager(self.scheduler, self)
+        self.warningManager.warningChanged.connect(self.showWarning)
+        self.warningManager.warningsChanged.connect(lambda warnings: self.screenState.set("warnings", warnings))
+        # date and text clock only change on full minutes
+        self.minuteTimer = self.scheduler.timer(self.minuteUpdate, aligned=True)
+        self.minuteTimer.start(60000)
+        # LED timers, flashing in phase with the clock tick
+        self.timerLED1 = self.scheduler.timer(self.toggleLED1, aligned=True)
+        self.timerLED2 = self.scheduler.timer(self.toggleLED2, aligned=True)
+        self.timerLED3 = self.scheduler.timer(self.toggleLED3, aligned=True)
+        self.timerLED4 = self.scheduler.timer(self.toggleLED4, aligned=True)
+
+        # Setup OnAir Timers, one shared display tick for all of them
+        self.airTimers = {1: AirTimer(), 2: AirTimer(), 3: AirTimer(), 4: AirTimer()}
+        self.airLabels = {1: "Mic", 2: "Phone", 3: "Timer", 4: "Stream"}
+        self.timerAIR = self.scheduler.timer(self.updateAIRSeconds)
+        self.timerAIR.setSingleShot(True)
         self.statusAIR1 = False
-
-        self.timerAIR2 = QTimer()
-        self.timerAIR2.timeout.connect(self.updateAIR2Seconds)
-        self.Air2Seconds = 0
         self.statusAIR2 = False
-
-        self.timerAIR3 = QTimer()
-        self.timerAIR3.timeout.connect(self.updateAIR3Seconds)
-        self.Air3Seconds = 0
         self.statusAIR3 = False
-        self.radioTimerMode = 0  # count up mode
-
-        self.timerAIR4 = QTimer()
-        self.timerAIR4.timeout.connect(self.updateAIR4Seconds)
-        self.Air4Seconds = 0
         self.statusAIR4 = False
-        self.streamTimerMode = 0  # count up mode
 
         # Setup NTP Check Thread
         self.checkNTPOffset = checkNTPOffsetThread(self)
+        self.checkNTPOffset.ntpStatusChanged.connect(self.setNTPstatus)
+        self.checkNTPOffset.ntpMeasured.connect(self.setNTPmeasurement)
 
         # Setup check NTP Timer
-        self.ntpHadWarning = True
-        self.ntpWarnMessage = ""
-        self.timerNTP = QTimer()
-        self.timerNTP.timeout.connect(self.triggerNTPcheck)
+        self.timerNTP = self.scheduler.timer(self.triggerNTPcheck)
         # initial check
         self.timerNTP.start(1000)
 
         # Setup UDP Socket
-        self.udpsock = QUdpSocket()
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
-        settings.beginGroup("Network")
-        port = int(settings.value('udpport', 3310))
-        settings.endGroup()
-        self.udpsock.bind(port, QUdpSocket.ShareAddress)
-        self.udpsock.readyRead.connect(self.cmdHandler)
+        self.setupCommands()
+        self.udpsock = None
+        self.udpConfig = None
+        self.setupUdpSocket()
 
         # Setup HTTP Server
         self.httpd = HttpDaemon(self)
+        self.httpd.commandReceived.connect(self.commands.dispatch, Qt.QueuedConnection)
+        self.httpd.batchReceived.connect(self.commands.runBatch, Qt.QueuedConnection)
         self.httpd.start()
 
         # display all host addresses
         self.displayAllHostaddresses()
 
         # set NTP warning
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
-        settings.beginGroup("NTP")
-        if settings.value('ntpcheck', True, type=bool):
-            self.ntpHadWarning = True
-            self.ntpWarnMessage = "waiting for NTP status check"
-        settings.endGroup()
+        if self.settingsCache.ntpCheck:
+            self.setNTPstatus("waiting for NTP status check")
 
     def radioTimerStartStop(self):
         self.startStopAIR3()
 
     def radioTimerReset(self):
-        self.resetAIR3()
-        self.radioTimerMode = 0  # count up mode
+        self.resetAIR3()  # count up mode
 
     def radioTimerSet(self, seconds):
-        self.Air3Seconds = seconds
-        if seconds > 0:
-            self.radioTimerMode = 1  # count down mode
-        else:
-            self.radioTimerMode = 0  # count up mode
-        self.AirLabel_3.setText("Timer\n%d:%02d" % (self.Air3Seconds / 60, self.Air3Seconds % 60))
+        # seconds > 0 switches to count down mode
+        self.airTimers[3].reset(max(0, seconds))
+        self.updateAIRLabel(3)
+        self.scheduleAIRTick()
 
     def getTimerDialog(self):
         # generate and display timer input window
@@ -253,8 +255,7 @@ class MainScreen(QWidget, Ui_MainScreen):
         self.startStopAIR4()
 
     def streamTimerReset(self):
-        self.resetAIR4()
-        self.streamTimerMode = 0  # count up mode
+        self.resetAIR4()  # count up mode
 
     def showsettings(self):
         global app
@@ -274,198 +275,203 @@ class MainScreen(QWidget, Ui_MainScreen):
         self.setCurrentSongText(", ".join(["%s" % addr for addr in v4addrs]))
         self.setNewsText(", ".join(["%s" % (addr) for addr in v6addrs]))
 
+    def setupCommands(self):
+        # UDP command table, see CommandDispatcher
+        # commands that only set a displayed value (label, LED, warning) are coalesced per frame,
+        # AIR commands start, stop and reset timers and always run in order
+        commands = CommandDispatcher(self.scheduler)
+        commands.register("NOW", self.setCurrentSongText, coalesce=True)
+        commands.register("NEXT", self.setNewsText, coalesce=True)
+        commands.register("LED1", lambda value: self.ledLogic(1, value != "OFF"), coalesce=True)
+        commands.register("LED2", lambda value: self.ledLogic(2, value != "OFF"), coalesce=True)
+        commands.register("LED3", lambda value: self.ledLogic(3, value != "OFF"), coalesce=True)
+        commands.register("LED4", lambda value: self.ledLogic(4, value != "OFF"), coalesce=True)
+        commands.register("WARN", self.setUdpWarning, coalesce=True)
+        commands.register("AIR1", lambda value: self.setAIR1(value != "OFF"))
+        commands.register("AIR2", lambda value: self.setAIR2(value != "OFF"))
+        commands.registerValues("AIR3", {"OFF": self.stopAIR3,
+                                         "ON": self.startAIR3,
+                                         "RESET": self.radioTimerReset,
+                                         "TOGGLE": self.radioTimerStartStop})
+        commands.register("AIR3TIME", lambda value: self.radioTimerSet(int(value)))
+        commands.register("PROBE", self.answerProbe, withSender=True)
+        commands.registerValues("AIR4", {"OFF": lambda: self.setAIR4(False),
+                                         "ON": lambda: self.setAIR4(True),
+                                         "RESET": self.streamTimerReset})
+        commands.registerValues("CMD", {"REBOOT": self.reboot_host,
+                                        "SHUTDOWN": self.shutdown_host,
+                                        "QUIT": QApplication.quit,
+                                        "PROFILE_ON": lambda: self.instrumentation.setEnabled(True),
+                                        "PROFILE_OFF": lambda: self.instrumentation.setEnabled(False),
+                                        "PROFILE_DUMP": self.instrumentation.dump})
+
+        settings = self.settings
+        color = settings.getColorFromName
+        commands.registerConf("General", "stationname", settings.StationName.setText)
+        commands.registerConf("General", "slogan", settings.Slogan.setText)
+        commands.registerConf("General", "stationcolor", lambda content: settings.setStationNameColor(color(content)))
+        commands.registerConf("General", "slogancolor", lambda content: settings.setSloganColor(color(content)))
+
+        for led in range(1, 5):
+            group = "LED%d" % led
+            commands.registerConf(group, "used", self.confCheckBox(getattr(settings, group)))
+            commands.registerConf(group, "text", getattr(settings, "LED%dText" % led).setText)
+            commands.registerConf(group, "activebgcolor",
+                                  lambda content, setter=getattr(settings, "setLED%dBGColor" % led): setter(color(content)))
+            commands.registerConf(group, "activetextcolor",
+                                  lambda content, setter=getattr(settings, "setLED%dFGColor" % led): setter(color(content)))
+            commands.registerConf(group, "autoflash", self.confCheckBox(getattr(settings, "LED%dAutoflash" % led)))
+            commands.registerConf(group, "timedflash", self.confCheckBox(getattr(settings, "LED%dTimedflash" % led)))
+
+        commands.registerConf("Clock", "digital", self.confClockDigital)
+        commands.registerConf("Clock", "showseconds", self.confShowSeconds)
+        commands.registerConf("Clock", "digitalhourcolor", lambda content: settings.setDigitalHourColor(color(content)))
+        commands.registerConf("Clock", "digitalsecondcolor",
+                              lambda content: settings.setDigitalSecondColor(color(content)))
+        commands.registerConf("Clock", "digitaldigitcolor", lambda content: settings.setDigitalDigitColor(color(content)))
+        commands.registerConf("Clock", "logopath", settings.setLogoPath)
+        commands.registerConf("Network", "udpport", settings.udpport.setText)
+        commands.registerConf("Network", "multicast", self.confCheckBox(settings.multicast))
+        commands.registerConf("Network", "multicastgroup", settings.multicastgroup.setText)
+        commands.registerConf("Network", "multicastgroups", settings.multicastgroups.setText)
+        commands.registerConf("CONF", "APPLY", self.confApply)
+        self.commands = commands
+
+    @staticmethod
+    def confCheckBox(checkbox):
+        return lambda content: checkbox.setChecked(content.strip().lower() in ("true", "1", "yes", "on"))
+
+    def confClockDigital(self, content):
+        if content == "True":
+            self.settings.clockDigital.setChecked(True)
+            self.settings.clockAnalog.setChecked(False)
+        if content == "False":
+            self.settings.clockDigital.setChecked(False)
+            self.settings.clockAnalog.setChecked(True)
+
+    def confShowSeconds(self, content):
+        if content in ("True", "False"):
+            self.settings.showSeconds.setChecked(content == "True")
+
+    def confApply(self, content):
+        if content == "TRUE":
+            # apply and save settings
+            self.settings.applySettings()
+
+    def answerProbe(self, sender, token):
+        # PROBE:token is sent back to the sender once the commands before it are applied,
+        # used by utils/oas_loadgen.py to measure latency
+        if sender is not None:
+            host, port = sender
+            self.udpsock.writeDatagram(("PROBE:" + token).encode(), host, port)
+
+    def setUdpWarning(self, value):
+        if value:
+            self.addWarning(value, 1, key="udp")
+        else:
+            self.removeWarning(1, key="udp")
+
+    def setupUdpSocket(self):
+        # (re)bind only if port or multicast settings changed
+        config = self.settingsCache
+        groups = [config.multicastGroup] + config.multicastGroups if config.multicast else []
+        udpConfig = (config.udpPort, groups)
+        if udpConfig == self.udpConfig:
+            return
+        self.udpConfig = udpConfig
+        if self.udpsock:
+            self.udpsock.close()
+            self.udpsock.deleteLater()
+
+        self.udpsock = QUdpSocket(self)
+        if groups:
+            # multicast needs an IPv4 socket, unicast datagrams still arrive on it
+            self.udpsock.bind(QHostAddress(QHostAddress.AnyIPv4), config.udpPort,
+                              QUdpSocket.ShareAddress | QUdpSocket.ReuseAddressHint)
+            for group in groups:
+                self.joinMulticastGroup(group)
+        else:
+            self.udpsock.bind(config.udpPort, QUdpSocket.ShareAddress)
+        self.udpsock.readyRead.connect(self.cmdHandler)
+
+    def joinMulticastGroup(self, group):
+        address = QHostAddress(group)
+        if not address.isMulticast():
+            print("invalid multicast group: %s" % group)
+            return
+        # join on every interface that can receive multicast, not only the default route
+        joined = False
+        for interface in QNetworkInterface.allInterfaces():
+            flags = interface.flags()
+            if flags & QNetworkInterface.IsUp and flags & QNetworkInterface.CanMulticast:
+                joined = self.udpsock.joinMulticastGroup(address, interface) or joined
+        if not joined and not self.udpsock.joinMulticastGroup(address):
+            print("could not join multicast group %s: %s" % (group, self.udpsock.errorString()))
+
     def cmdHandler(self):
+        handlerStart = time.perf_counter()
         while self.udpsock.hasPendingDatagrams():
             data, host, port = self.udpsock.readDatagram(self.udpsock.pendingDatagramSize())
-            # print("DATA: ", data)
-            lines = data.splitlines()
-            for line in lines:
-                # print("Line:", line)
-                try:
-                    (command, value) = line.decode('utf_8').split(':', 1)
-                except ValueError:
-                    return
-                command = str(command)
-                value = str(value)
-                # print("command: >" + command + "<")
-                # print("value: >" + value + "<")
-                if command == "NOW":
-                    self.setCurrentSongText(value)
-                if command == "NEXT":
-                    self.setNewsText(value)
-                if command == "LED1":
-                    if value == "OFF":
-                        self.ledLogic(1, False)
-                    else:
-                        self.ledLogic(1, True)
-                if command == "LED2":
-                    if value == "OFF":
-                        self.ledLogic(2, False)
-                    else:
-                        self.ledLogic(2, True)
-                if command == "LED3":
-                    if value == "OFF":
-                        self.ledLogic(3, False)
-                    else:
-                        self.ledLogic(3, True)
-                if command == "LED4":
-                    if value == "OFF":
-                        self.ledLogic(4, False)
-                    else:
-                        self.ledLogic(4, True)
-                if command == "WARN":
-                    if value:
-                        self.addWarning(value, 1)
-                    else:
-                        self.removeWarning(1)
-
-                if command == "AIR1":
-                    if value == "OFF":
-                        self.setAIR1(False)
-                    else:
-                        self.setAIR1(True)
-
-                if command == "AIR2":
-                    if value == "OFF":
-                        self.setAIR2(False)
-                    else:
-                        self.setAIR2(True)
-
-                if command == "AIR3":
-                    if value == "OFF":
-                        self.stopAIR3()
-                    if value == "ON":
-                        self.startAIR3()
-                    if value == "RESET":
-                        self.radioTimerReset()
-                    if value == "TOGGLE":
-                        self.radioTimerStartStop()
-
-                if command == "AIR3TIME":
-                    self.radioTimerSet(int(value))
-
-                if command == "AIR4":
-                    if value == "OFF":
-                        self.setAIR4(False)
-                    if value == "ON":
-                        self.setAIR4(True)
-                    if value == "RESET":
-                        self.streamTimerReset()
-
-                if command == "CMD":
-                    if value == "REBOOT":
-                        self.reboot_host()
-                    if value == "SHUTDOWN":
-                        self.shutdown_host()
-                    if value == "QUIT":
-                        QApplication.quit()
-
-                if command == "CONF":
-                    # split group, config and values and apply them
-                    try:
-                        (group, paramvalue) = value.split(':', 1)
-                        (param, content) = paramvalue.split('=', 1)
-                        # print "CONF:", param, content
-                    except ValueError:
-                        return
-
-                    if group == "General":
-                        if param == "stationname":
-                            self.settings.StationName.setText(content)
-                        if param == "slogan":
-                            self.settings.Slogan.setText(content)
-                        if param == "stationcolor":
-                            self.settings.setStationNameColor(self.settings.getColorFromName(content))
-                        if param == "slogancolor":
-                            self.settings.setSloganColor(self.settings.getColorFromName(content))
-
-                    if group == "LED1":
-                        if param == "used":
-                            self.settings.LED1.setChecked(QVariant(content).toBool())
-                        if param == "text":
-                            self.settings.LED1Text.setText(content)
-                        if param == "activebgcolor":
-                            self.settings.setLED1BGColor(self.settings.getColorFromName(content))
-                        if param == "activetextcolor":
-                            self.settings.setLED1FGColor(self.settings.getColorFromName(content))
-                        if param == "autoflash":
-                            self.settings.LED1Autoflash.setChecked(QVariant(content).toBool())
-                        if param == "timedflash":
-                            self.settings.LED1Timedflash.setChecked(QVariant(content).toBool())
-
-                    if group == "LED2":
-                        if param == "used":
-                            self.settings.LED2.setChecked(QVariant(content).toBool())
-                        if param == "text":
-                            self.settings.LED2Text.setText(content)
-                        if param == "activebgcolor":
-                            self.settings.setLED2BGColor(self.settings.getColorFromName(content))
-                        if param == "activetextcolor":
-                            self.settings.setLED2FGColor(self.settings.getColorFromName(content))
-                        if param == "autoflash":
-                            self.settings.LED2Autoflash.setChecked(QVariant(content).toBool())
-                        if param == "timedflash":
-                            self.settings.LED2Timedflash.setChecked(QVariant(content).toBool())
-
-                    if group == "LED3":
-                        if param == "used":
-                            self.settings.LED3.setChecked(QVariant(content).toBool())
-                        if param == "text":
-                            self.settings.LED3Text.setText(content)
-                        if param == "activebgcolor":
-                            self.settings.setLED3BGColor(self.settings.getColorFromName(content))
-                        if param == "activetextcolor":
-                            self.settings.setLED3FGColor(self.settings.getColorFromName(content))
-                        if param == "autoflash":
-                            self.settings.LED3Autoflash.setChecked(QVariant(content).toBool())
-                        if param == "timedflash":
-                            self.settings.LED3Timedflash.setChecked(QVariant(content).toBool())
-
-                    if group == "LED4":
-                        if param == "used":
-                            self.settings.LED4.setChecked(QVariant(content).toBool())
-                        if param == "text":
-                            self.settings.LED4Text.setText(content)
-                        if param == "activebgcolor":
-                            self.settings.setLED4BGColor(self.settings.getColorFromName(content))
-                        if param == "activetextcolor":
-                            self.settings.setLED4FGColor(self.settings.getColorFromName(content))
-                        if param == "autoflash":
-                            self.settings.LED4Autoflash.setChecked(QVariant(content).toBool())
-                        if param == "timedflash":
-                            self.settings.LED4Timedflash.setChecked(QVariant(content).toBool())
-
-                    if group == "Clock":
-                        if param == "digital":
-                            if content == "True":
-                                self.settings.clockDigital.setChecked(True)
-                                self.settings.clockAnalog.setChecked(False)
-                            if content == "False":
-                                self.settings.clockAnalog.setChecked(False)
-                                self.settings.clockDigital.setChecked(True)
-                        if param == "showseconds":
-                            if content == "True":
-                                self.settings.showSeconds.setChecked(True)
-                            if content == "False":
-                                self.settings.showSeconds.setChecked(False)
-                        if param == "digitalhourcolor":
-                            self.settings.setDigitalHourColor(self.settings.getColorFromName(content))
-                        if param == "digitalsecondcolor":
-                            self.settings.setDigitalSecondColor(self.settings.getColorFromName(content))
-                        if param == "digitaldigitcolor":
-                            self.settings.setDigitalDigitColor(self.settings.getColorFromName(content))
-                        if param == "logopath":
-                            self.settings.setLogoPath(content)
-
-                    if group == "Network":
-                        if param == "udpport":
-                            self.settings.udpport.setText(content)
-
-                    if group == "CONF":
-                        if param == "APPLY":
-                            if content == "TRUE":
-                                # apply and save settings
-                                self.settings.applySettings()
+            self.metricDatagrams.inc()
+            self.commands.dispatch(data, (host, port))
+        self.instrumentation.record("cmdHandler", time.perf_counter() - handlerStart)
+
+    def setupMetrics(self):
+        # served on /metrics, see MetricsRegistry
+        metrics = MetricsRegistry()
+        self.metricDatagrams = metrics.counter("oas_udp_datagrams_total", "UDP datagrams received")
+        self.metricCommands = metrics.labeledCounter("oas_commands_total", "Commands received by command",
+                                                     "command")
+        self.metricParseErrors = metrics.counter("oas_command_parse_errors_total",
+                                                 "Malformed command lines and values")
+        self.metricUnknownCommands = metrics.counter("oas_unknown_commands_total", "Lines with an unknown command")
+        self.metricCoalesced = metrics.counter("oas_commands_coalesced_total",
+                                               "Commands replaced by a later one in the same frame")
+        self.metricHandlerErrors = metrics.counter("oas_command_handler_errors_total",
+                                                   "Commands whose handler raised an exception")
+        self.metricHttpRequests = metrics.labeledCounter("oas_http_requests_total", "HTTP requests by status code",
+                                                         "code", (200, 304, 400, 404, 413, 503))
+        self.metricClockPaint = metrics.histogram("oas_clock_paint_seconds", "Duration of ClockWidget.paintEvent")
+        self.metricTimerLateness = metrics.histogram("oas_timer_lateness_seconds",
+                                                     "How late scheduled timers ran")
+        self.metricWakeups = metrics.counter("oas_scheduler_wakeups_total", "Wakeups of the tick scheduler")
+        self.metricWakeupRate = metrics.gauge("oas_scheduler_wakeups_per_second",
+                                              "Wakeups of the tick scheduler per second over the last 10 seconds")
+        self.metricNTPOffset = metrics.gauge("oas_ntp_offset_seconds", "Last measured offset of the system clock")
+        self.metricNTPCheck = metrics.histogram("oas_ntp_check_seconds", "Duration of NTP checks")
+        self.metricSettingsReads = metrics.counter("oas_settings_backend_reads_total",
+                                                   "Values read from the settings backend")
+        metrics.addCollector(self.collectMetrics)
+        self.metrics = metrics
+
+    def collectMetrics(self, metrics):
+        # copy counters kept by other objects, called on every scrape
+        commands = self.commands
+        self.metricCommands.update(commands.counters)
+        self.metricParseErrors.set(commands.parseErrors)
+        self.metricUnknownCommands.set(commands.unknownCommands)
+        self.metricCoalesced.set(commands.coalesced)
+        self.metricHandlerErrors.set(commands.handlerErrors)
+        self.metricWakeups.set(self.scheduler.wakeups)
+        self.metricWakeupRate.set(self.scheduler.wakeupsPerSecond())
+        self.metricSettingsReads.set(self.settingsCache.backendReads)
+
+    def toggleInstrumentation(self):
+        # dump what was recorded when switching off
+        if self.instrumentation.enabled:
+            self.instrumentation.dump()
+        self.instrumentation.toggle()
+
+    def observeClockPaint(self, stage, seconds):
+        if stage == "paintEvent":
+            self.metricClockPaint.observe(seconds)
+        self.instrumentation.record(stage, seconds)
+
+    def observeJob(self, job, lateness, duration):
+        self.metricTimerLateness.observe(lateness)
+        if self.instrumentation.enabled:
+            self.instrumentation.record("lateness." + job.name, lateness)
+            self.instrumentation.record("timer." + job.name, duration)
 
     def manualToggleLED1(self):
         if self.LED1on:
@@ -552,7 +558,7 @@ class MainScreen(QWidget, Ui_MainScreen):
                     self.timerLED1.start(500)
                 if self.settings.LED1Timedflash.isChecked():
                     self.timerLED1.start(500)
-                    QTimer.singleShot(20000, self.unsetLED1)
+                    self.scheduler.singleShot(20000, self.unsetLED1)
                 self.setLED1(state)
                 self.LED1on = state
             if led == 2:
@@ -560,7 +566,7 @@ class MainScreen(QWidget, Ui_MainScreen):
                     self.timerLED2.start(500)
                 if self.settings.LED2Timedflash.isChecked():
                     self.timerLED2.start(500)
-                    QTimer.singleShot(20000, self.unsetLED2)
+                    self.scheduler.singleShot(20000, self.unsetLED2)
                 self.setLED2(state)
                 self.LED2on = state
             if led == 3:
@@ -568,7 +574,7 @@ class MainScreen(QWidget, Ui_MainScreen):
                     self.timerLED3.start(500)
                 if self.settings.LED3Timedflash.isChecked():
                     self.timerLED3.start(500)
-                    QTimer.singleShot(20000, self.unsetLED3)
+                    self.scheduler.singleShot(20000, self.unsetLED3)
                 self.setLED3(state)
                 self.LED3on = state
             if led == 4:
@@ -576,7 +582,7 @@ class MainScreen(QWidget, Ui_MainScreen):
                     self.timerLED4.start(500)
                 if self.settings.LED4Timedflash.isChecked():
                     self.timerLED4.start(500)
-                    QTimer.singleShot(20000, self.unsetLED4)
+                    self.scheduler.singleShot(20000, self.unsetLED4)
                 self.setLED4(state)
                 self.LED4on = state
 
@@ -598,6 +604,8 @@ class MainScreen(QWidget, Ui_MainScreen):
                 self.timerLED4.stop()
                 self.LED4on = state
 
+        self.screenState.set("led%d" % led, bool(state))
+
     def setStationColor(self, newcolor):
         palette = self.labelStation.palette()
         palette.setColor(QPalette.WindowText, newcolor)
@@ -608,52 +616,71 @@ class MainScreen(QWidget, Ui_MainScreen):
         palette.setColor(QPalette.WindowText, newcolor)
         self.labelSlogan.setPalette(palette)
 
-    def restoreSettingsFromConfig(self):
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
-        settings.beginGroup("General")
-        self.labelStation.setText(settings.value('stationname', 'Radio Eriwan'))
-        self.labelSlogan.setText(settings.value('slogan', 'Your question is our motivation'))
-        self.setStationColor(self.settings.getColorFromName(settings.value('stationcolor', '#FFAA00')))
-        self.setSloganColor(self.settings.getColorFromName(settings.value('slogancolor', '#FFAA00')))
-        settings.endGroup()
-
-        settings.beginGroup("LED1")
-        self.setLED1Text(settings.value('text', 'ON AIR'))
-        settings.endGroup()
-
-        settings.beginGroup("LED2")
-        self.setLED2Text(settings.value('text', 'PHONE'))
-        settings.endGroup()
-
-        settings.beginGroup("LED3")
-        self.setLED3Text(settings.value('text', 'DOORBELL'))
-        settings.endGroup()
-
-        settings.beginGroup("LED4")
-        self.setLED4Text(settings.value('text', 'ARI'))
-        settings.endGroup()
-
-        settings.beginGroup("Clock")
-        self.clockWidget.setClockMode(settings.value('digital', True, type=bool))
-        self.clockWidget.setDigiHourColor(
-            self.settings.getColorFromName(settings.value('digitalhourcolor', '#3232FF')))
-        self.clockWidget.setDigiSecondColor(
-            self.settings.getColorFromName(settings.value('digitalsecondcolor', '#FF9900')))
-        self.clockWidget.setDigiDigitColor(
-            self.settings.getColorFromName(settings.value('digitaldigitcolor', '#3232FF')))
-        self.clockWidget.setLogo(
-            settings.value('logopath', ':/astrastudio_logo/images/astrastudio_transparent.png'))
-        self.clockWidget.setShowSeconds(settings.value('showSeconds', False, type=bool))
-        settings.endGroup()
-
-        settings.beginGroup("Formatting")
-        self.clockWidget.setAmPm(settings.value('isAmPm', False, type=bool))
-        settings.endGroup()
-
-        settings.beginGroup("WeatherWidget")
-        self.weatherWidget.setVisible(settings.value('WeatherWidgetEnabled', False, type=bool))
-        if settings.value('WeatherWidgetEnabled', False, type=bool):
-            widgetHtml = """      
+    def setupConfigBindings(self):
+        # settings cache attributes and the setter that applies them to the screen,
+        # a setter only runs again if one of its attributes changed
+        config = self.settingsCache
+        color = self.settings.getColorFromName
+        self.configBindings = [
+            (('stationName',), lambda: self.setStation(config.stationName)),
+            (('slogan',), lambda: self.setSlogan(config.slogan)),
+            (('stationColor',), lambda: self.setStationColor(color(config.stationColor))),
+            (('sloganColor',), lambda: self.setSloganColor(color(config.sloganColor))),
+            (('ledText',), self.applyLEDTexts),
+            (('clockDigital',), lambda: self.clockWidget.setClockMode(config.clockDigital)),
+            (('digitalHourColor',), lambda: self.clockWidget.setDigiHourColor(color(config.digitalHourColor))),
+            (('digitalSecondColor',), lambda: self.clockWidget.setDigiSecondColor(color(config.digitalSecondColor))),
+            (('digitalDigitColor',), lambda: self.clockWidget.setDigiDigitColor(color(config.digitalDigitColor))),
+            (('logoPath',), lambda: self.clockWidget.setLogo(config.logoPath)),
+            (('showSeconds',), lambda: self.clockWidget.setShowSeconds(config.showSeconds)),
+            (('isAmPm',), lambda: self.clockWidget.setAmPm(config.isAmPm)),
+            (('weatherWidgetEnabled', 'weatherWidgetCode', 'weatherWidgetSource'), self.applyWeatherWidget),
+            # date format, language or am/pm might have changed
+            (('dateFormat',), self.updateDate),
+            (('textClockLanguage', 'isAmPm'), self.updateBacktimingText),
+        ]
+
+    def restoreSettingsFromConfig(self, changed=None):
+        # apply the settings cache to the screen, only the given attributes if changed is not None
+        for names, setter in self.configBindings:
+            if changed is None or not changed.isdisjoint(names):
+                setter()
+
+    def applyLEDTexts(self):
+        config = self.settingsCache
+        self.setLED1Text(config.ledText[1])
+        self.setLED2Text(config.ledText[2])
+        self.setLED3Text(config.ledText[3])
+        self.setLED4Text(config.ledText[4])
+
+    def applyWeatherWidget(self):
+        # weatherWidget is just the container, it holds the native panel if a weather data source is set
+        # and the web view otherwise. the web engine is only loaded and kept alive while it is in use
+        config = self.settingsCache
+        self.weatherWidget.setVisible(config.weatherWidgetEnabled)
+        native = config.weatherWidgetEnabled and bool(config.weatherWidgetSource)
+        web = config.weatherWidgetEnabled and not native
+        if not web and self.weatherView is not None:
+            self.weatherView.deleteLater()
+            self.weatherView = None
+        if not native and self.weatherPanel is not None:
+            self.weatherPanel.stop()
+            self.weatherPanel.deleteLater()
+            self.weatherPanel = None
+        if native:
+            if self.weatherPanel is None:
+                self.weatherPanel = WeatherPanel(self.scheduler, self.weatherWidget)
+                self.weatherLayout().addWidget(self.weatherPanel)
+            self.weatherPanel.setProvider(providerForSource(config.weatherWidgetSource))
+            return
+        if not web:
+            return
+        if self.weatherView is None:
+            from PyQt5.QtWebEngineWidgets import QWebEngineView
+            self.weatherView = QWebEngineView(self.weatherWidget)
+            self.weatherLayout().addWidget(self.weatherView)
+        # only called if the code changed or the view was just created, setHtml reloads the page
+        widgetHtml = """      
 <style type="text/css">
 body {
     overflow:hidden;
@@ -664,31 +691,32 @@ body {
 }
 </style>
 <body>
-""" + settings.value('WeatherWidgetCode', weatherWidgetFallback) + "</body>"
-            self.weatherWidget.setHtml(widgetHtml);
-        settings.endGroup()
-
-    def constantUpdate(self):
-        # slot for constant timer timeout
+""" + config.weatherWidgetCode + "</body>"
+        self.weatherView.setHtml(widgetHtml)
+
+    def weatherLayout(self):
+        layout = self.weatherWidget.layout()
+        if layout is None:
+            layout = QVBoxLayout(self.weatherWidget)
+            layout.setContentsMargins(0, 0, 0, 0)
+        return layout
+
+    def minuteUpdate(self):
+        # slot for the minute timer, fires on every full minute
         self.updateDate()
         self.updateBacktimingText()
-        self.updateBacktimingSeconds()
-        self.updateNTPstatus()
-        self.processWarnings()
 
     def updateDate(self):
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
-        settings.beginGroup("Formatting")
-        now = datetime.now()
-        self.setLeftText(QDate.currentDate().toString(settings.value('dateFormat', 'dddd, dd. MMMM yyyy')))
-        settings.endGroup()
+        # only format the date again after midnight or a format change
+        dateKey = (QDate.currentDate(), self.settingsCache.dateFormat)
+        if dateKey == self.dateKey:
+            return
+        self.dateKey = dateKey
+        self.setLeftText(dateKey[0].toString(dateKey[1]))
 
     def updateBacktimingText(self):
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
-        settings.beginGroup("Formatting")
-        textClockLang = settings.value('textClockLanguage', 'English')
-        isampm = settings.value('isAmPm', False, type=bool)
-        settings.endGroup()
+        textClockLang = self.settingsCache.textClockLanguage
+        isampm = self.settingsCache.isAmPm
 
         string = ""
         now = datetime.now()
@@ -740,109 +768,139 @@ body {
         remain_seconds = 60 - second
         self.setBacktimingSecs(remain_seconds)
 
-    def updateNTPstatus(self):
-        if self.ntpHadWarning and len(self.ntpWarnMessage):
-            self.addWarning(self.ntpWarnMessage, 0)
+    def setNTPmeasurement(self, offset, latency):
+        self.screenState.set("ntpOffset", offset)
+        self.metricNTPOffset.set(offset)
+        self.metricNTPCheck.observe(latency)
+
+    def setNTPstatus(self, message):
+        # slot for the NTP check, an empty message clears the warning
+        self.screenState.set("ntp", message)
+        if message:
+            self.addWarning(message, 0, key="ntp")
         else:
-            self.ntpWarnMessage = ""
-            self.removeWarning(0)
+            self.removeWarning(0, key="ntp")
 
     def toggleFullScreen(self):
         global app
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
-        settings.beginGroup("General")
-        if not settings.value('fullscreen', True, type=bool):
+        if not self.settingsCache.fullscreen:
             self.showFullScreen()
             app.setOverrideCursor(QCursor(Qt.BlankCursor))
-            settings.setValue('fullscreen', True)
+            self.settingsCache.setFullscreen(True)
         else:
             self.showNormal()
             app.setOverrideCursor(QCursor(Qt.ArrowCursor))
-            settings.setValue('fullscreen', False)
-        settings.endGroup()
+            self.settingsCache.setFullscreen(False)
+
+    @property
+    def Air1Seconds(self):
+        return self.airTimers[1].seconds()
+
+    @property
+    def Air2Seconds(self):
+        return self.airTimers[2].seconds()
+
+    @property
+    def Air3Seconds(self):
+        return self.airTimers[3].seconds()
+
+    @property
+    def Air4Seconds(self):
+        return self.airTimers[4].seconds()
+
+    @property
+    def radioTimerMode(self):
+        # 0: count up mode, 1: count down mode
+        return 1 if self.airTimers[3].isCountdown() else 0
+
+    @property
+    def streamTimerMode(self):
+        # 0: count up mode, 1: count down mode
+        return 1 if self.airTimers[4].isCountdown() else 0
+
+    def updateAIRLabel(self, air):
+        seconds = self.airTimers[air].seconds()
+        text = "%s\n%d:%02d" % (self.airLabels[air], seconds / 60, seconds % 60)
+        self.screenState.update({"air%dSeconds" % air: seconds,
+                                 "radioTimerMode": self.radioTimerMode,
+                                 "streamTimerMode": self.streamTimerMode})
+        self.setLabelText(getattr(self, "AirLabel_%d" % air), text)
+
+    def setAIRStyle(self, air, active):
+        self.screenState.set("air%d" % air, active)
+        if active:
+            style = "color: #000000; background-color: #FF0000"
+        else:
+            style = "color:" + self.settingsCache.ledInactiveTextColor + \
+                    ";background-color:" + self.settingsCache.ledInactiveBGColor
+        getattr(self, "AirIcon_%d" % air).setStyleSheet(style)
+        getattr(self, "AirLabel_%d" % air).setStyleSheet(style)
+
+    def scheduleAIRTick(self):
+        # arm the shared display tick for the next change of any running timer
+        running = [timer.nextChange() for timer in self.airTimers.values() if timer.isRunning()]
+        if running:
+            # wake up just after the displayed second has changed
+            self.timerAIR.start(int(min(running) * 1000) + 5)
+        else:
+            self.timerAIR.stop()
+
+    def updateAIRSeconds(self):
+        for air, timer in self.airTimers.items():
+            if not timer.isRunning():
+                continue
+            if timer.isExpired():
+                # countdown finished, stop and switch back to count up mode
+                timer.reset()
+                getattr(self, "stopAIR%d" % air)()
+            self.updateAIRLabel(air)
+        self.scheduleAIRTick()
 
     def setAIR1(self, action):
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
+        timer = self.airTimers[1]
         if action:
-            self.Air1Seconds = 0
-            self.AirLabel_1.setStyleSheet("color: #000000; background-color: #FF0000")
-            self.AirIcon_1.setStyleSheet("color: #000000; background-color: #FF0000")
-            self.AirLabel_1.setText("Mic\n%d:%02d" % (self.Air1Seconds / 60, self.Air1Seconds % 60))
+            timer.reset()
+            timer.start()
+            self.setAIRStyle(1, True)
             self.statusAIR1 = True
-            # AIR1 timer
-            self.timerAIR1.start(1000)
         else:
-            settings.beginGroup("LEDS")
-            self.AirIcon_1.setStyleSheet("color:" + settings.value('inactivetextcolor',
-                                                                   '#555555') + ";background-color:" + settings.value(
-                'inactivebgcolor', '#222222'))
-            self.AirLabel_1.setStyleSheet("color:" + settings.value('inactivetextcolor',
-                                                                    '#555555') + ";background-color:" + settings.value(
-                'inactivebgcolor', '#222222'))
-            settings.endGroup()
+            timer.stop()
+            self.setAIRStyle(1, False)
             self.statusAIR1 = False
-            self.timerAIR1.stop()
-
-    def updateAIR1Seconds(self):
-        self.Air1Seconds += 1
-        self.AirLabel_1.setText("Mic\n%d:%02d" % (self.Air1Seconds / 60, self.Air1Seconds % 60))
+        self.updateAIRLabel(1)
+        self.scheduleAIRTick()
 
     def setAIR2(self, action):
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
+        timer = self.airTimers[2]
         if action:
-            self.Air2Seconds = 0
-            self.AirLabel_2.setStyleSheet("color: #000000; background-color: #FF0000")
-            self.AirIcon_2.setStyleSheet("color: #000000; background-color: #FF0000")
-            self.AirLabel_2.setText("Phone\n%d:%02d" % (self.Air2Seconds / 60, self.Air2Seconds % 60))
+            timer.reset()
+            timer.start()
+            self.setAIRStyle(2, True)
             self.statusAIR2 = True
-            # AIR2 timer
-            self.timerAIR2.start(1000)
         else:
-            settings.beginGroup("LEDS")
-            self.AirIcon_2.setStyleSheet("color:" + settings.value('inactivetextcolor',
-                                                                   '#555555') + ";background-color:" + settings.value(
-                'inactivebgcolor', '#222222'))
-            self.AirLabel_2.setStyleSheet("color:" + settings.value('inactivetextcolor',
-                                                                    '#555555') + ";background-color:" + settings.value(
-                'inactivebgcolor', '#222222'))
-            settings.endGroup()
+            timer.stop()
+            self.setAIRStyle(2, False)
             self.statusAIR2 = False
-            self.timerAIR2.stop()
-
-    def updateAIR2Seconds(self):
-        self.Air2Seconds += 1
-        self.AirLabel_2.setText("Phone\n%d:%02d" % (self.Air2Seconds / 60, self.Air2Seconds % 60))
+        self.updateAIRLabel(2)
+        self.scheduleAIRTick()
 
     def resetAIR3(self):
-        self.timerAIR3.stop()
-        self.Air3Seconds = 0
-        self.AirLabel_3.setText("Timer\n%d:%02d" % (self.Air3Seconds / 60, self.Air3Seconds % 60))
-        if self.statusAIR3 == True:
-            self.timerAIR3.start(1000)
+        self.airTimers[3].reset()
+        self.updateAIRLabel(3)
+        self.scheduleAIRTick()
 
     def setAIR3(self, action):
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
+        timer = self.airTimers[3]
         if action:
-            self.AirLabel_3.setStyleSheet("color: #000000; background-color: #FF0000")
-            self.AirIcon_3.setStyleSheet("color: #000000; background-color: #FF0000")
-            self.AirLabel_3.setText("Timer\n%d:%02d" % (self.Air3Seconds / 60, self.Air3Seconds % 60))
+            timer.start()
+            self.setAIRStyle(3, True)
             self.statusAIR3 = True
-            # substract initial second on countdown with display update
-            if self.radioTimerMode == 1 and self.Air3Seconds > 1:
-                self.updateAIR3Seconds()
-            # AIR3 timer
-            self.timerAIR3.start(1000)
         else:
-            settings.beginGroup("LEDS")
-            self.AirIcon_3.setStyleSheet("color:" + settings.value('inactivetextcolor',
-                                                                   '#555555') + ";background-color:" + settings.value(
-                'inactivebgcolor', '#222222'))
-            self.AirLabel_3.setStyleSheet("color:" + settings.value('inactivetextcolor',
-                                                                    '#555555') + ";background-color:" + settings.value(
-                'inactivebgcolor', '#222222'))
-            settings.endGroup()
+            timer.stop()
+            self.setAIRStyle(3, False)
             self.statusAIR3 = False
-            self.timerAIR3.stop()
+        self.updateAIRLabel(3)
+        self.scheduleAIRTick()
 
     def startStopAIR3(self):
         if self.statusAIR3 == False:
@@ -856,46 +914,23 @@ body {
     def stopAIR3(self):
         self.setAIR3(False)
 
-    def updateAIR3Seconds(self):
-        if self.radioTimerMode == 0:  # count up mode
-            self.Air3Seconds += 1
-        else:
-            self.Air3Seconds -= 1
-            if self.Air3Seconds < 1:
-                self.stopAIR3()
-                self.radioTimerMode = 0
-        self.AirLabel_3.setText("Timer\n%d:%02d" % (self.Air3Seconds / 60, self.Air3Seconds % 60))
-
     def resetAIR4(self):
-        self.timerAIR4.stop()
-        self.Air4Seconds = 0
-        self.AirLabel_4.setText("Stream\n%d:%02d" % (self.Air4Seconds / 60, self.Air4Seconds % 60))
-        if self.statusAIR4 == True:
-            self.timerAIR4.start(1000)
+        self.airTimers[4].reset()
+        self.updateAIRLabel(4)
+        self.scheduleAIRTick()
 
     def setAIR4(self, action):
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
+        timer = self.airTimers[4]
         if action:
-            self.AirLabel_4.setStyleSheet("color: #000000; background-color: #FF0000")
-            self.AirIcon_4.setStyleSheet("color: #000000; background-color: #FF0000")
-            self.AirLabel_4.setText("Stream\n%d:%02d" % (self.Air4Seconds / 60, self.Air4Seconds % 60))
+            timer.start()
+            self.setAIRStyle(4, True)
             self.statusAIR4 = True
-            # substract initial second on countdown with display update
-            if self.streamTimerMode == 1 and self.Air4Seconds > 1:
-                self.updateAIR4Seconds()
-            # AIR4 timer
-            self.timerAIR4.start(1000)
         else:
-            settings.beginGroup("LEDS")
-            self.AirIcon_4.setStyleSheet("color:" + settings.value('inactivetextcolor',
-                                                                   '#555555') + ";background-color:" + settings.value(
-                'inactivebgcolor', '#222222'))
-            self.AirLabel_4.setStyleSheet("color:" + settings.value('inactivetextcolor',
-                                                                    '#555555') + ";background-color:" + settings.value(
-                'inactivebgcolor', '#222222'))
-            settings.endGroup()
+            timer.stop()
+            self.setAIRStyle(4, False)
             self.statusAIR4 = False
-            self.timerAIR4.stop()
+        self.updateAIRLabel(4)
+        self.scheduleAIRTick()
 
     def startStopAIR4(self):
         if self.statusAIR4 == False:
@@ -909,24 +944,11 @@ body {
     def stopAIR4(self):
         self.setAIR4(False)
 
-    def updateAIR4Seconds(self):
-        if self.streamTimerMode == 0:  # count up mode
-            self.Air4Seconds += 1
-        else:
-            self.Air4Seconds -= 1
-            if self.Air4Seconds < 1:
-                self.stopAIR4()
-                self.radioTimerMode = 0
-        self.AirLabel_4.setText("Stream\n%d:%02d" % (self.Air4Seconds / 60, self.Air4Seconds % 60))
-
     def triggerNTPcheck(self):
         print("NTP Check triggered")
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
-        settings.beginGroup("NTP")
-        ntpcheck = settings.value('ntpcheck', True, type=bool)
-        settings.endGroup()
-        if not ntpcheck:
+        if not self.settingsCache.ntpCheck:
             self.timerNTP.stop()
+            self.setNTPstatus("")
             return
         else:
             self.timerNTP.stop()
@@ -935,84 +957,65 @@ body {
 
 
     def setLED1(self, action):
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
+        config = self.settingsCache
         if action:
-            settings.beginGroup("LED1")
-            self.buttonLED1.setStyleSheet("color:" + settings.value('activetextcolor',
-                                                                    '#FFFFFF') + ";background-color:" + settings.value(
-                'activebgcolor', '#FF0000'))
-            settings.endGroup()
+            self.buttonLED1.setStyleSheet("color:" + config.ledActiveTextColor[1] +
+                                           ";background-color:" + config.ledActiveBGColor[1])
             self.statusLED1 = True
         else:
-            settings.beginGroup("LEDS")
-            self.buttonLED1.setStyleSheet("color:" + settings.value('inactivetextcolor',
-                                                                    '#555555') + ";background-color:" + settings.value(
-                'inactivebgcolor', '#222222'))
-            settings.endGroup()
+            self.buttonLED1.setStyleSheet("color:" + config.ledInactiveTextColor +
+                                           ";background-color:" + config.ledInactiveBGColor)
             self.statusLED1 = False
 
     def setLED2(self, action):
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
+        config = self.settingsCache
         if action:
-            settings.beginGroup("LED2")
-            self.buttonLED2.setStyleSheet("color:" + settings.value('activetextcolor',
-                                                                    '#FFFFFF') + ";background-color:" + settings.value(
-                'activebgcolor', '#DCDC00'))
-            settings.endGroup()
+            self.buttonLED2.setStyleSheet("color:" + config.ledActiveTextColor[2] +
+                                           ";background-color:" + config.ledActiveBGColor[2])
             self.statusLED2 = True
         else:
-            settings.beginGroup("LEDS")
-            self.buttonLED2.setStyleSheet("color:" + settings.value('inactivetextcolor',
-                                                                    '#555555') + ";background-color:" + settings.value(
-                'inactivebgcolor', '#222222'))
-            settings.endGroup()
+            self.buttonLED2.setStyleSheet("color:" + config.ledInactiveTextColor +
+                                           ";background-color:" + config.ledInactiveBGColor)
             self.statusLED2 = False
 
     def setLED3(self, action):
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
+        config = self.settingsCache
         if action:
-            settings.beginGroup("LED3")
-            self.buttonLED3.setStyleSheet("color:" + settings.value('activetextcolor',
-                                                                    '#FFFFFF') + ";background-color:" + settings.value(
-                'activebgcolor', '#00C8C8'))
-            settings.endGroup()
+            self.buttonLED3.setStyleSheet("color:" + config.ledActiveTextColor[3] +
+                                           ";background-color:" + config.ledActiveBGColor[3])
             self.statusLED3 = True
         else:
-            settings.beginGroup("LEDS")
-            self.buttonLED3.setStyleSheet("color:" + settings.value('inactivetextcolor',
-                                                                    '#555555') + ";background-color:" + settings.value(
-                'inactivebgcolor', '#222222'))
-            settings.endGroup()
+            self.buttonLED3.setStyleSheet("color:" + config.ledInactiveTextColor +
+                                           ";background-color:" + config.ledInactiveBGColor)
             self.statusLED3 = False
 
     def setLED4(self, action):
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
+        config = self.settingsCache
         if action:
-            settings.beginGroup("LED4")
-            self.buttonLED4.setStyleSheet("color:" + settings.value('activetextcolor',
-                                                                    '#FFFFFF') + ";background-color:" + settings.value(
-                'activebgcolor', '#FF00FF'))
-            settings.endGroup()
+            self.buttonLED4.setStyleSheet("color:" + config.ledActiveTextColor[4] +
+                                           ";background-color:" + config.ledActiveBGColor[4])
             self.statusLED4 = True
         else:
-            settings.beginGroup("LEDS")
-            self.buttonLED4.setStyleSheet("color:" + settings.value('inactivetextcolor',
-                                                                    '#555555') + ";background-color:" + settings.value(
-                'inactivebgcolor', '#222222'))
-            settings.endGroup()
+            self.buttonLED4.setStyleSheet("color:" + config.ledInactiveTextColor +
+                                           ";background-color:" + config.ledInactiveBGColor)
             self.statusLED4 = False
 
+    def setLabelText(self, label, text):
+        # skip relayout of labels if the text did not change
+        if label.text() != text:
+            label.setText(text)
+
     def setStation(self, text):
-        self.labelStation.setText(text)
+        self.setLabelText(self.labelStation, text)
 
     def setSlogan(self, text):
-        self.labelSlogan.setText(text)
+        self.setLabelText(self.labelSlogan, text)
 
     def setLeftText(self, text):
-        self.labelTextLeft.setText(text)
+        self.setLabelText(self.labelTextLeft, text)
 
     def setRightText(self, text):
-        self.labelTextRight.setText(text)
+        self.setLabelText(self.labelTextRight, text)
 
     def setLED1Text(self, text):
         self.buttonLED1.setText(text)
@@ -1027,34 +1030,30 @@ body {
         self.buttonLED4.setText(text)
 
     def setCurrentSongText(self, text):
-        self.labelCurrentSong.setText(text)
+        self.setLabelText(self.labelCurrentSong, text)
+        self.screenState.set("now", text)
 
     def setNewsText(self, text):
-        self.labelNews.setText(text)
+        self.setLabelText(self.labelNews, text)
+        self.screenState.set("next", text)
 
     def setBacktimingSecs(self, value):
         pass
         # self.labelSeconds.setText( str(value) )
 
-    def addWarning(self, text, priority=0):
-        self.warnings[priority] = text
-
-    def removeWarning(self, priority=0):
-        self.warnings[priority] = ""
-
-    def processWarnings(self):
-        warningAvailable = False
+    def addWarning(self, text, priority=0, ttl=None, key=None):
+        # without a key there is one warning slot per priority
+        self.warningManager.addWarning(priority if key is None else key, text, priority, ttl)
 
-        for warning in self.warnings:
-            if len(warning) > 0:
-                lastwarning = warning
-                warningAvailable = True
-        if warningAvailable:
-            self.showWarning(lastwarning)
-        else:
-            self.hideWarning()
+    def removeWarning(self, priority=0, key=None):
+        self.warningManager.removeWarning(priority if key is None else key)
 
     def showWarning(self, text):
+        # slot for the warning manager, called when the visible warning changes
+        self.screenState.set("warning", text)
+        if not text:
+            self.hideWarning()
+            return
         self.labelCurrentSong.hide()
         self.labelNews.hide()
         self.labelWarning.setText(text)
@@ -1077,14 +1076,12 @@ body {
     def configClosed(self):
         global app
         # hide mouse cursor if in fullscreen mode
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
-        settings.beginGroup("General")
-        if settings.value('fullscreen', True, type=bool):
+        if self.settingsCache.fullscreen:
             app.setOverrideCursor(QCursor(Qt.BlankCursor));
-        settings.endGroup()
 
     def configFinished(self):
-        self.restoreSettingsFromConfig()
+        self.restoreSettingsFromConfig(self.settingsCache.load())
+        self.setupUdpSocket()
 
     def reboot_host(self):
         self.addWarning("SYSTEM REBOOT IN PROGRESS", 2)
@@ -1109,6 +1106,10 @@ body {
 
 
 class checkNTPOffsetThread(QThread):
+    # warning message, empty if the clock is synchronized
+    ntpStatusChanged = pyqtSignal(str)
+    # offset of the system clock and duration of the check in seconds
+    ntpMeasured = pyqtSignal(float, float)
 
     def __init__(self, oas):
         self.oas = oas
@@ -1119,64 +1120,112 @@ class checkNTPOffsetThread(QThread):
 
     def run(self):
         print("entered checkNTPOffsetThread.run")
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
-        settings.beginGroup("NTP")
-        ntpserver = str(settings.value('ntpcheckserver', 'pool.ntp.org'))
-        settings.endGroup()
+        ntpserver = str(self.oas.settingsCache.ntpCheckServer)
         max_deviation = 0.3
         c = ntplib.NTPClient()
         try:
+            checkStart = time.monotonic()
             response = c.request(ntpserver)
+            self.ntpMeasured.emit(response.offset, time.monotonic() - checkStart)
             if response.offset > max_deviation or response.offset < -max_deviation:
                 print("offset too big: %f while checking %s" % (response.offset, ntpserver))
-                self.oas.ntpWarnMessage = "Clock not NTP synchronized: offset too big"
-                self.oas.ntpHadWarning = True
+                self.ntpStatusChanged.emit("Clock not NTP synchronized: offset too big")
             else:
-                if self.oas.ntpHadWarning:
-                    self.oas.ntpHadWarning = False
+                self.ntpStatusChanged.emit("")
         except socket.timeout:
             print("NTP error: timeout while checking NTP %s" % ntpserver)
-            self.oas.ntpWarnMessage = "Clock not NTP synchronized"
-            self.oas.ntpHadWarning = True
+            self.ntpStatusChanged.emit("Clock not NTP synchronized")
         except socket.gaierror:
             print("NTP error: socket error while checking NTP %s" % ntpserver)
-            self.oas.ntpWarnMessage = "Clock not NTP synchronized"
-            self.oas.ntpHadWarning = True
+            self.ntpStatusChanged.emit("Clock not NTP synchronized")
         except ntplib.NTPException as e:
             print("NTP error:", e)
-            self.oas.ntpWarnMessage = str(e)
-            self.oas.ntpHadWarning = True
+            self.ntpStatusChanged.emit(str(e))
 
 
 class HttpDaemon(QThread):
-    def run(self):
-        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
-        settings.beginGroup("Network")
-        port = int(settings.value('httpport', 8010))
-        settings.endGroup()
+    # commands received via HTTP, delivered queued to the GUI thread
+    commandReceived = pyqtSignal(bytes)
+    # CommandBatch of a POST request, run at once in the GUI thread
+    batchReceived = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        QThread.__init__(self, parent)
+        # the port is read once, a changed port needs a restart as before
+        self.port = parent.settingsCache.httpPort
+        self.screenState = parent.screenState
+        self.metrics = parent.metrics
+        self.requestCounter = parent.metricHttpRequests
+        try:
+            self._server = OASHTTPServer((HOST, self.port), OASHTTPRequestHandler)
+            self._server.httpDaemon = self
+        except OSError as e:
+            print("HTTP server could not listen on port %d: %s" % (self.port, e))
+            self._server = None
 
-        handler = OASHTTPRequestHandler
-        self._server = HTTPServer((HOST, port), handler)
-        self._server.serve_forever()
+    def run(self):
+        if self._server:
+            self._server.serve_forever()
 
     def stop(self):
-        self._server.shutdown()
-        self._server.socket.close()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
         self.wait()
 
 
+class OASHTTPServer(ThreadingHTTPServer):
+    # one daemon thread per connection, slow clients don't block others
+    daemon_threads = True
+    httpDaemon = None
+
+
 class OASHTTPRequestHandler(BaseHTTPRequestHandler):
     server_version = "OnAirScreen/%s" % versionString
+    # keep-alive, every response needs a Content-Length
+    protocol_version = "HTTP/1.1"
+    # close idle keep-alive connections
+    timeout = 60
+    # longest ?wait= of /status in seconds
+    maxWait = 55
+    # limits of POST /cmd
+    maxBody = 1024 * 1024
+    batchTimeout = 10
+    # headers and body are separate writes, don't wait for delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_request(self, code='-', size='-'):
+        # called for every response, errors are still logged by send_error
+        self.server.httpDaemon.requestCounter.inc(int(code))
+
+    def sendBody(self, body, contentType="text/plain; charset=utf-8", headers=()):
+        self.send_response(200)
+        self.send_header("Content-Type", contentType)
+        for header in headers:
+            self.send_header(*header)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
 
     # handle HEAD request
     def do_HEAD(self):
-        self.send_response(200)
-        self.send_header("Content-type", "text/html")
-        self.end_headers()
+        self.sendBody(b"", "text/html")
 
     # handle GET command
     def do_GET(self):
-        print(self.path)
+        if self.path == '/ws' and isUpgradeRequest(self.headers):
+            serveWebSocket(self, self.server.httpDaemon.screenState)
+            return
+
+        url = urlsplit(self.path)
+        if url.path == '/status':
+            self.sendStatus(parse_qs(url.query))
+            return
+        if url.path == '/metrics':
+            self.sendBody(self.server.httpDaemon.metrics.render(), "text/plain; version=0.0.4; charset=utf-8")
+            return
+
         if self.path.startswith('/?cmd'):
             try:
                 cmd, message = unquote(str(self.path)[5:]).split("=", 1)
@@ -1185,23 +1234,9 @@ class OASHTTPRequestHandler(BaseHTTPRequestHandler):
                 return
 
             if len(message) > 0:
-                self.send_response(200)
-
-                # send header first
-                self.send_header('Content-type', 'text-html')
-                self.end_headers()
-
-                settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
-                settings.beginGroup("Network")
-                port = int(settings.value('udpport', 3310))
-                settings.endGroup()
-
-                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                sock.sendto(message.encode(), ("127.0.0.1", port))
-
-                # send file content to client
-                self.wfile.write(message.encode())
-                self.wfile.write("\n".encode())
+                data = message.encode()
+                self.server.httpDaemon.commandReceived.emit(data)
+                self.sendBody(data + b"\n")
                 return
             else:
                 self.send_error(400, 'no command was given')
@@ -1209,6 +1244,73 @@ class OASHTTPRequestHandler(BaseHTTPRequestHandler):
 
         self.send_error(404, 'file not found')
 
+    # handle POST of several commands
+    def do_POST(self):
+        # body: one command per line or a JSON array of commands, answered
+        # with a JSON array of {"command", "result"} in the same order
+        if urlsplit(self.path).path != '/cmd':
+            self.send_error(404, 'file not found')
+            return
+        try:
+            length = int(self.headers["Content-Length"])
+        except (TypeError, ValueError):
+            length = -1
+        if length < 0:
+            self.send_error(400, 'Content-Length required')
+            return
+        if length > self.maxBody:
+            self.send_error(413, 'too many commands')
+            return
+        body = self.rfile.read(length)
+        try:
+            text = body.decode('utf_8')
+            if text.lstrip().startswith('['):
+                lines = json.loads(text)
+                if not all(isinstance(line, str) for line in lines):
+                    raise ValueError("commands must be strings")
+            else:
+                lines = [line for line in text.splitlines() if line]
+        except ValueError as e:
+            self.send_error(400, 'malformed command list: %s' % e)
+            return
+
+        batch = CommandBatch(lines)
+        self.server.httpDaemon.batchReceived.emit(batch)
+        if not batch.done.wait(self.batchTimeout) and batch.cancel():
+            # none of the commands ran and none will, the client may safely resend them
+            self.send_error(503, 'commands were not processed in time')
+            return
+        # the batch started just before the timeout, it finishes at once
+        batch.done.wait()
+        results = [{"command": line, "result": result} for line, result in zip(lines, batch.results)]
+        self.sendBody(json.dumps(results).encode(), "application/json")
+
+    def sendStatus(self, query):
+        # JSON snapshot of the screen state, the ETag is its version
+        # with ?wait=seconds the request blocks until the state differs from the If-None-Match
+        # version, or without that header until the next change after the request
+        screenState = self.server.httpDaemon.screenState
+        try:
+            known = int(self.headers.get("If-None-Match", "").strip(' W/"'))
+        except ValueError:
+            known = None
+        if "wait" in query:
+            try:
+                wait = min(max(float(query["wait"][0]), 0.0), self.maxWait)
+            except ValueError:
+                self.send_error(400, 'wait needs a number of seconds')
+                return
+            screenState.waitForChange(screenState.version if known is None else known, wait)
+
+        version, body = screenState.snapshotJson()
+        etag = '"%d"' % version
+        if known == version:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.sendBody(body, "application/json", (("ETag", etag), ("Cache-Control", "no-cache")))
+
 
 ###################################
 # App SIGINT handler
@@ -1224,14 +1326,20 @@ def sigint_handler(*args):
 ###################################
 if __name__ == "__main__":
     signal.signal(signal.SIGINT, sigint_handler)
+    # needed to load QtWebEngineWidgets after the application was created
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
     icon = QIcon()
     icon.addPixmap(QPixmap(":/oas_icon/oas_icon.png"), QIcon.Normal, QIcon.Off)
     app.setWindowIcon(icon)
 
-    timer = QTimer()
-    timer.start(100)
-    timer.timeout.connect(lambda: None)
+    # wake up the event loop for pending signals instead of polling for them
+    signalReader, signalWriter = socket.socketpair()
+    signalReader.setblocking(False)
+    signalWriter.setblocking(False)
+    signal.set_wakeup_fd(signalWriter.fileno())
+    signalNotifier = QSocketNotifier(signalReader.fileno(), QSocketNotifier.Read)
+    signalNotifier.activated.connect(lambda: signalReader.recv(64))
 
     mainscreen = MainScreen()
     mainscreen.setWindowIcon(icon)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# test_clockwidget.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+import unittest
+
+from tests import application, FakeClock
+
+import clockwidget
+import scheduler
+
+
+class ClockTimerTest(unittest.TestCase):
+    # ClockWidget driven by its own single shot timer
+
+    def setUp(self):
+        application()
+        self.clock = FakeClock()
+        self.realTime = clockwidget.pytime
+        clockwidget.pytime = self.clock
+        self.widget = clockwidget.ClockWidget()
+
+    def tearDown(self):
+        self.widget.timer.stop()
+        clockwidget.pytime = self.realTime
+
+    def testArmsForNextHalfSecond(self):
+        self.assertEqual(self.widget.nextTickWall, 1000000.5)
+        self.assertAlmostEqual(self.widget.nextTickMono, 500.25)
+        self.assertTrue(self.widget.timer.isActive())
+
+    def testTickOnBoundary(self):
+        self.clock.advance(0.252)
+        self.widget.timerFired()
+        self.assertEqual(self.widget.clockSteps, 0)
+        self.assertAlmostEqual(self.widget.tickLateness[-1], 2.0, places=3)
+        self.assertEqual(self.widget.nextTickWall, 1000001.0)
+
+    def testEarlyWakeupWaits(self):
+        self.clock.advance(0.2)
+        self.widget.timerFired()
+        self.assertEqual(len(self.widget.tickLateness), 0)
+        self.assertEqual(self.widget.nextTickWall, 1000000.5)
+        self.assertTrue(self.widget.timer.isActive())
+
+    def testWallClockStep(self):
+        self.clock.advance(0.25)
+        self.clock.wall += 30
+        self.widget.timerFired()
+        self.assertEqual(self.widget.clockSteps, 1)
+        self.assertEqual(len(self.widget.tickLateness), 0)
+        # realigned to the stepped wall clock
+        self.assertEqual(self.widget.nextTickWall, 1000031.0)
+
+
+class ClockSchedulerTest(unittest.TestCase):
+    # ClockWidget driven by a TickScheduler job
+
+    def setUp(self):
+        application()
+        self.clock = FakeClock()
+        self.realTimes = clockwidget.pytime, scheduler.time
+        clockwidget.pytime = scheduler.time = self.clock
+        self.scheduler = scheduler.TickScheduler()
+        self.widget = clockwidget.ClockWidget()
+        self.widget.setScheduler(self.scheduler)
+
+    def tearDown(self):
+        self.scheduler.wakeupTimer.stop()
+        clockwidget.pytime, scheduler.time = self.realTimes
+
+    def testTicks(self):
+        for i in range(3):
+            self.clock.advance(0.5)
+            self.scheduler.run()
+        self.assertEqual(len(self.widget.tickLateness), 3)
+        self.assertEqual(self.widget.clockSteps, 0)
+
+    def testWallClockStep(self):
+        self.clock.advance(0.25)
+        self.scheduler.run()
+        self.clock.advance(0.5)
+        self.clock.wall += 30
+        self.scheduler.run()
+        self.assertEqual(self.widget.clockSteps, 1)
+        # realigned to the next half second of the stepped wall clock
+        self.assertAlmostEqual(self.widget.timer.deadline, self.clock.mono + 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
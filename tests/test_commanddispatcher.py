@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# test_commanddispatcher.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+import unittest
+
+from tests import application, FakeClock
+
+import scheduler
+from commanddispatcher import CommandBatch, CommandDispatcher
+
+
+class DispatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def record(self, name):
+        return lambda value: self.calls.append((name, value))
+
+    def raising(self, exception):
+        def handler(value):
+            raise exception
+        return handler
+
+    def setupCommands(self, commands):
+        commands.register("NOW", self.record("NOW"), coalesce=True)
+        commands.register("LED1", self.record("LED1"), coalesce=True)
+        commands.register("AIR1", self.record("AIR1"))
+        commands.register("BOOM", self.raising(RuntimeError("boom")))
+        commands.register("NUMBER", lambda value: self.calls.append(("NUMBER", int(value))))
+        commands.register("PROBE", lambda sender, value: self.calls.append(("PROBE", sender, value)),
+                          withSender=True)
+        commands.registerConf("LED1", "text", self.record("CONF LED1 text"))
+        return commands
+
+
+class ImmediateDispatchTest(DispatcherTestCase):
+    # without a scheduler every line runs as soon as it is parsed
+
+    def setUp(self):
+        DispatcherTestCase.setUp(self)
+        self.commands = self.setupCommands(CommandDispatcher())
+
+    def testLines(self):
+        self.commands.dispatch(b"NOW:Song \xc3\xa4\r\n\nAIR1:ON\nCONF:LED1:text=MIC=1\nPROBE:42", ("host", 1))
+        self.assertEqual(self.calls, [("NOW", "Song ä"), ("AIR1", "ON"), ("CONF LED1 text", "MIC=1"),
+                                      ("PROBE", ("host", 1), "42")])
+        self.assertEqual(self.commands.counters["NOW"], 1)
+        self.assertEqual(self.commands.counters["CONF"], 1)
+
+    def testBrokenLinesAreSkipped(self):
+        self.commands.dispatch(b"garbage\nFOO:1\nCONF:broken\nCONF:LED1:nothing=1\nNOW:\xff\nNOW:ok")
+        self.assertEqual(self.calls, [("NOW", "ok")])
+        self.assertEqual(self.commands.parseErrors, 3)
+        self.assertEqual(self.commands.unknownCommands, 1)
+
+    def testHandlerErrorKeepsRestOfDatagram(self):
+        self.commands.dispatch(b"BOOM:1\nNUMBER:abc\nNOW:after")
+        self.assertEqual(self.calls, [("NOW", "after")])
+        self.assertEqual(self.commands.handlerErrors, 1)
+        self.assertEqual(self.commands.parseErrors, 1)
+
+    def testBatchResults(self):
+        results = self.commands.dispatchBatch(["NOW:a", "BOOM:1", "FOO:1", "NUMBER:abc", "NUMBER:3"])
+        self.assertEqual(results, ["ok", "error: boom", "error: unknown command",
+                                   "error: invalid literal for int() with base 10: 'abc'", "ok"])
+        self.assertEqual(self.calls, [("NOW", "a"), ("NUMBER", 3)])
+
+    def testCancelledBatchDoesNotRun(self):
+        batch = CommandBatch(["NOW:late"])
+        self.assertTrue(batch.cancel())
+        self.commands.runBatch(batch)
+        self.assertEqual(self.calls, [])
+        self.assertIsNone(batch.results)
+
+    def testRunningBatchCannotBeCancelled(self):
+        batch = CommandBatch(["NOW:a"])
+        self.commands.runBatch(batch)
+        self.assertFalse(batch.cancel())
+        self.assertTrue(batch.done.is_set())
+        self.assertEqual(batch.results, ["ok"])
+
+
+class FrameDispatchTest(DispatcherTestCase):
+    # with a scheduler commands wait for the frame, flush() is called by hand
+
+    def setUp(self):
+        DispatcherTestCase.setUp(self)
+        application()
+        self.realTime = scheduler.time
+        scheduler.time = FakeClock()
+        self.scheduler = scheduler.TickScheduler()
+        self.commands = self.setupCommands(CommandDispatcher(self.scheduler))
+
+    def tearDown(self):
+        self.scheduler.wakeupTimer.stop()
+        scheduler.time = self.realTime
+
+    def testCoalescesDisplayValues(self):
+        self.commands.dispatch(b"NOW:a\nLED1:ON\nNOW:b\nLED1:OFF")
+        self.assertEqual(self.calls, [])
+        self.assertTrue(self.commands.flushTimer.isActive())
+        self.commands.flush()
+        self.assertEqual(self.calls, [("NOW", "b"), ("LED1", "OFF")])
+        self.assertEqual(self.commands.coalesced, 2)
+        self.assertFalse(self.commands.flushTimer.isActive())
+
+    def testStatefulCommandsRunInOrder(self):
+        self.commands.dispatch(b"AIR1:ON\nAIR1:OFF\nAIR1:ON")
+        self.commands.flush()
+        self.assertEqual(self.calls, [("AIR1", "ON"), ("AIR1", "OFF"), ("AIR1", "ON")])
+        self.assertEqual(self.commands.coalesced, 0)
+
+    def testNoCoalescingAcrossStatefulCommands(self):
+        self.commands.dispatch(b"NOW:a\nAIR1:ON\nNOW:b\nNOW:c")
+        self.commands.flush()
+        self.assertEqual(self.calls, [("NOW", "a"), ("AIR1", "ON"), ("NOW", "c")])
+
+    def testHandlerErrorKeepsRestOfFrame(self):
+        self.commands.dispatch(b"NOW:a\nBOOM:1\nAIR1:ON")
+        self.commands.flush()
+        self.assertEqual(self.calls, [("NOW", "a"), ("AIR1", "ON")])
+        self.assertEqual(self.commands.handlerErrors, 1)
+
+    def testBatchRunsAfterWaitingFrame(self):
+        self.commands.dispatch(b"NOW:waiting")
+        self.assertEqual(self.commands.dispatchBatch(["AIR1:ON"]), ["ok"])
+        self.assertEqual(self.calls, [("NOW", "waiting"), ("AIR1", "ON")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# test_mainscreen.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+import shutil
+import tempfile
+import unittest
+
+from PyQt5.QtCore import QSettings
+
+from tests import application
+
+import start
+
+
+class MainScreenTestCase(unittest.TestCase):
+    # a MainScreen with its config in a temporary directory, no NTP check and free ports
+
+    def setUp(self):
+        start.app = application()
+        self.path = tempfile.mkdtemp()
+        QSettings.setPath(QSettings.NativeFormat, QSettings.UserScope, self.path)
+        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
+        for key, value in (("General/fullscreen", False), ("NTP/ntpcheck", False),
+                           ("Network/udpport", "0"), ("Network/httpport", "0")):
+            settings.setValue(key, value)
+        settings.sync()
+        self.screen = start.MainScreen()
+
+    def tearDown(self):
+        self.screen.httpd.stop()
+        self.screen.udpsock.close()
+        self.screen.scheduler.wakeupTimer.stop()
+        self.screen.hide()
+        shutil.rmtree(self.path)
+
+
+class SettingsReadsTest(MainScreenTestCase):
+    # hot paths only read the SettingsCache, the backend is read on load only
+
+    def testNoBackendReadsInHotPaths(self):
+        reads = self.screen.settingsCache.backendReads
+        self.assertGreater(reads, 0)
+        commands = self.screen.commands
+        for i in range(3):
+            commands.dispatch(b"NOW:song %d\nNEXT:news\nLED1:ON\nLED2:OFF\nWARN:fire\nWARN:\n"
+                              b"AIR1:ON\nAIR3TIME:30\nAIR3:ON\nAIR4:ON\nCONF:LED1:text=MIC" % i)
+            commands.flush()
+            self.screen.updateAIRSeconds()
+            self.screen.toggleLED1()
+            self.screen.minuteUpdate()
+            self.screen.clockWidget.schedulerFired()
+            self.screen.clockWidget.repaint()
+        self.assertEqual(self.screen.labelCurrentSong.text(), "song 2")
+        self.assertEqual(self.screen.settingsCache.backendReads, reads)
+        self.assertIn(b"oas_settings_backend_reads_total %d\n" % reads, self.screen.metrics.render())
+
+
+
+class SchedulerJobsTest(MainScreenTestCase):
+    def testIdleWakeups(self):
+        # after the first NTP check the clock tick is the only job faster than a minute on an idle screen
+        self.screen.triggerNTPcheck()
+        scheduler = self.screen.scheduler
+        periodic = sorted(job.interval for deadline, seq, job, generation in scheduler.queue
+                          if generation == job.generation and not job.singleShot)
+        self.assertEqual(periodic, [0.5, 60.0])
+        self.assertIn(b"oas_scheduler_wakeups_per_second ", self.screen.metrics.render())
+
+
+if __name__ == '__main__':
+    unittest.main()
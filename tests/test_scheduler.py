@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# test_scheduler.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+import unittest
+
+from tests import application, FakeClock
+
+import scheduler
+from scheduler import TickScheduler
+
+
+class TickSchedulerTest(unittest.TestCase):
+    # run() is called by hand, the clock only moves when the test advances it
+
+    def setUp(self):
+        application()
+        self.clock = FakeClock()
+        self.realTime = scheduler.time
+        scheduler.time = self.clock
+        self.scheduler = TickScheduler()
+        self.runs = []
+
+    def tearDown(self):
+        self.scheduler.wakeupTimer.stop()
+        scheduler.time = self.realTime
+
+    def job(self, name, msec, singleShot=True, aligned=False):
+        job = self.scheduler.timer(lambda: self.runs.append(name), aligned=aligned, name=name)
+        job.setSingleShot(singleShot)
+        job.start(msec)
+        return job
+
+    def testWakeupCoversJobsWithinWindow(self):
+        self.job("a", 100)
+        self.job("b", 103)
+        self.job("c", 120)
+        # delays are rounded up to whole ms
+        self.assertIn(self.scheduler.wakeupTimer.interval(), (103, 104))
+        self.clock.advance(0.104)
+        self.scheduler.run()
+        self.assertEqual(self.runs, ["a", "b"])
+        self.assertIn(self.scheduler.wakeupTimer.interval(), (16, 17))
+
+    def testWakeupsPerSecond(self):
+        self.job("tick", 500, singleShot=False)
+        for i in range(30):
+            self.clock.advance(0.5)
+            self.scheduler.run()
+        self.assertEqual(self.scheduler.wakeups, 30)
+        # only the wakeups of the last 10 seconds count
+        self.assertEqual(self.scheduler.wakeupsPerSecond(), 2.0)
+        self.assertEqual(self.scheduler.wakeupsPerSecond(window=5.0), 2.0)
+
+    def testNeverEarly(self):
+        self.job("a", 100)
+        self.clock.advance(0.099)
+        self.scheduler.run()
+        self.assertEqual(self.runs, [])
+        self.clock.advance(0.0011)
+        self.scheduler.run()
+        self.assertEqual(self.runs, ["a"])
+
+    def testAlignedToWallClock(self):
+        job = self.job("clock", 500, singleShot=False, aligned=True)
+        # wall clock is at .25, the next half second boundary is 250 ms away
+        self.assertAlmostEqual(job.deadline, 500.25)
+        self.clock.advance(0.26)
+        self.scheduler.run()
+        self.assertAlmostEqual(job.lateness, 0.01)
+        self.assertAlmostEqual(job.deadline, 500.75)
+
+    def testPeriodicSkipsMissedRuns(self):
+        job = self.job("tick", 100, singleShot=False)
+        self.clock.advance(0.35)
+        self.scheduler.run()
+        self.assertEqual(self.runs, ["tick"])
+        self.assertAlmostEqual(job.deadline, 500.45)
+
+    def testStop(self):
+        job = self.job("a", 100)
+        job.stop()
+        self.assertFalse(job.isActive())
+        self.assertFalse(self.scheduler.wakeupTimer.isActive())
+        self.clock.advance(1)
+        self.scheduler.run()
+        self.assertEqual(self.runs, [])
+
+    def testRestartsDoNotPileUp(self):
+        job = self.job("air", 100)
+        # every restart leaves the earlier entry below the top of the heap
+        for i in range(10000):
+            job.start(100000 - i)
+        self.assertLessEqual(len(self.scheduler.queue), 200)
+        self.clock.advance(100)
+        self.scheduler.run()
+        self.assertEqual(self.runs, ["air"])
+        self.assertEqual(self.scheduler.queue, [])
+        self.assertEqual(self.scheduler.stale, 0)
+
+    def testJobObserver(self):
+        observed = []
+        self.scheduler.jobObserver = lambda job, lateness, duration: observed.append((job.name, lateness))
+        self.job("a", 100)
+        self.clock.advance(0.102)
+        self.scheduler.run()
+        self.assertEqual(observed[0][0], "a")
+        self.assertAlmostEqual(observed[0][1], 0.002)
+
+
+if __name__ == '__main__':
+    unittest.main()
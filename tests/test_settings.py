@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# test_settings.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+import json
+import shutil
+import tempfile
+import unittest
+
+from PyQt5.QtCore import QSettings
+
+from tests import application
+
+from settings_functions import OASSettings, Settings, decodePointer, encodePointer
+
+
+def setValues(settings, group, **values):
+    settings.beginGroup(group)
+    for name, value in values.items():
+        settings.setValue(name, value)
+    settings.endGroup()
+
+
+class OASSettingsDeltaTest(unittest.TestCase):
+    def setUp(self):
+        self.local = OASSettings()
+        self.local.load({"LED1": {"text": "ON AIR", "used": True}}, 3)
+        self.remote = OASSettings()
+        self.remote.load({"LED1": {"text": "ON AIR", "used": True}}, 3)
+
+    def sync(self):
+        delta = self.local.takeDelta()
+        if delta is not None:
+            # deltas travel as JSON
+            self.assertIsNotNone(self.remote.applyDelta(json.loads(json.dumps(delta))))
+        return delta
+
+    def testReplace(self):
+        setValues(self.local, "LED1", text="MIC")
+        delta = self.sync()
+        self.assertEqual(delta, {"base": 3, "version": 4,
+                                 "ops": [{"op": "replace", "path": "/LED1/text", "value": "MIC"}]})
+        self.assertEqual(self.remote.config, self.local.config)
+        self.assertEqual(self.remote.version, 4)
+
+    def testUnchangedValuesAreNoDelta(self):
+        setValues(self.local, "LED1", text="ON AIR", used=True)
+        self.assertIsNone(self.local.takeDelta())
+        setValues(self.local, "LED1", text="MIC")
+        setValues(self.local, "LED1", text="ON AIR")
+        self.assertIsNone(self.local.takeDelta())
+        self.assertEqual(self.local.version, 3)
+
+    def testAddedThenSetIsOneAdd(self):
+        setValues(self.local, "LED2", text="PHONE")
+        setValues(self.local, "LED2", text="CALL")
+        delta = self.sync()
+        self.assertEqual(delta["ops"], [{"op": "add", "path": "/LED2/text", "value": "CALL"}])
+        self.assertEqual(self.remote.config["LED2"], {"text": "CALL"})
+        # known to the peer from now on
+        setValues(self.local, "LED2", text="PHONE")
+        self.assertEqual(self.sync()["ops"], [{"op": "replace", "path": "/LED2/text", "value": "PHONE"}])
+
+    def testAddedThenRemovedIsNoOp(self):
+        setValues(self.local, "LED2", text="PHONE")
+        self.local.beginGroup("LED2")
+        self.local.remove("text")
+        self.local.endGroup()
+        self.assertIsNone(self.local.takeDelta())
+
+    def testRemove(self):
+        self.local.beginGroup("LED1")
+        self.local.remove("used")
+        self.local.endGroup()
+        delta = self.sync()
+        self.assertEqual(delta["ops"], [{"op": "remove", "path": "/LED1/used"}])
+        self.assertEqual(self.remote.config["LED1"], {"text": "ON AIR"})
+
+    def testPointerEscaping(self):
+        for group, name in (("a/b", "c~d"), ("~1", "/~0/"), ("plain", "")):
+            self.assertEqual(decodePointer(encodePointer(group, name)), (group, name))
+        self.assertEqual(encodePointer("a/b", "c~d"), "/a~1b/c~0d")
+        setValues(self.local, "odd/group", **{"key~/name": 1})
+        self.sync()
+        self.assertEqual(self.remote.config["odd/group"], {"key~/name": 1})
+
+    def testVersionMismatch(self):
+        setValues(self.local, "LED1", text="MIC")
+        first = self.local.takeDelta()
+        setValues(self.local, "LED1", text="PHONE")
+        second = self.local.takeDelta()
+        self.assertIsNone(self.remote.applyDelta(second))
+        self.assertEqual(self.remote.config["LED1"]["text"], "ON AIR")
+        self.assertEqual(self.remote.applyDelta(first), [("LED1", "text")])
+        self.assertEqual(self.remote.applyDelta(second), [("LED1", "text")])
+        self.assertEqual(self.remote.config["LED1"]["text"], "PHONE")
+
+    def testMalformedDeltaIsNotApplied(self):
+        valid = {"op": "replace", "path": "/LED1/text", "value": "MIC"}
+        for op in ({"op": "replace", "path": "/LED1/text/extra", "value": "x"}, {"op": "replace", "path": "LED1/text",
+                   "value": "x"}, {"path": "/LED1/text", "value": "x"}, {"op": "add", "value": "x"},
+                   {"op": "add", "path": "/LED1/text"}, {"op": "move", "path": "/LED1/text"}, "remove", None):
+            self.assertIsNone(self.remote.applyDelta({"base": 3, "version": 4, "ops": [valid, op]}))
+        self.assertIsNone(self.remote.applyDelta({"base": 3, "ops": [valid]}))
+        self.assertIsNone(self.remote.applyDelta([valid]))
+        self.assertEqual(self.remote.config["LED1"]["text"], "ON AIR")
+        self.assertEqual(self.remote.version, 3)
+        self.assertRaises(ValueError, decodePointer, "/a/b/c")
+        self.assertRaises(ValueError, decodePointer, "a")
+
+    def testTypedValues(self):
+        setValues(self.local, "LED3", used="false", text="DOOR")
+        self.local.beginGroup("LED3")
+        self.assertIs(self.local.value("used", True, type=bool), False)
+        self.assertEqual(self.local.value("missing", "x"), "x")
+        self.local.endGroup()
+
+
+class SettingsDialogTest(unittest.TestCase):
+    # the dialog on the screen itself, backed by QSettings in a temporary directory
+
+    def setUp(self):
+        application()
+        self.path = tempfile.mkdtemp()
+        QSettings.setPath(QSettings.NativeFormat, QSettings.UserScope, self.path)
+        self.dialog = Settings()
+
+    def tearDown(self):
+        self.dialog.hide()
+        shutil.rmtree(self.path)
+
+    def backend(self, group, key):
+        settings = QSettings(QSettings.UserScope, "astrastudio", "OnAirScreen")
+        settings.beginGroup(group)
+        value = settings.value(key)
+        settings.endGroup()
+        return value
+
+    def testApplyWritesChangedValues(self):
+        self.dialog.LED1Text.setText("MIC")
+        self.dialog.applySettings()
+        self.assertEqual(self.backend("LED1", "text"), "MIC")
+
+    def testApplyAfterReset(self):
+        self.dialog.LED1Text.setText("MIC")
+        self.dialog.StationName.setText("Radio Y")
+        self.dialog.applySettings()
+        self.dialog.resetSettings()
+        self.assertIsNone(self.backend("LED1", "text"))
+        self.dialog.applySettings()
+        self.assertEqual(self.backend("LED1", "text"), "MIC")
+        self.assertEqual(self.backend("General", "stationname"), "Radio Y")
+        self.assertEqual(self.backend("General", "slogan"), "Your question is our motivation")
+
+
+class SettingsDialogSyncTest(unittest.TestCase):
+    # two settings dialogs in OAC mode, like the controller and its copy of a screen
+
+    def setUp(self):
+        application()
+        self.controller = Settings(oacmode=True)
+        self.screen = Settings(oacmode=True)
+        self.sent = []
+        self.resyncs = []
+        self.controller.sigConfigChanged.connect(lambda row, config: self.sent.append(config))
+        self.screen.sigConfigResync.connect(self.resyncs.append)
+        self.controller.readConfigFromJson(2, json.dumps({"LED1": {"text": "ON AIR"}}))
+        self.screen.readConfigFromJson(2, self.controller.readVersionedJsonFromConfig())
+
+    def testDeltaIsTheNormalPayload(self):
+        self.controller.LED1Text.setText("MIC")
+        self.screen.LED2Text.setText("not restored")
+        self.controller.getSettingsFromDialog()
+        self.assertEqual(len(self.sent), 1)
+        delta = json.loads(self.sent[-1])
+        self.assertEqual(delta["ops"], [{"op": "replace", "path": "/LED1/text", "value": "MIC"}])
+        self.screen.readConfigFromJson(2, self.sent[-1])
+        self.assertEqual(self.screen.LED1Text.text(), "MIC")
+        self.assertEqual(self.screen.LED2Text.text(), "not restored")
+        self.assertEqual(self.resyncs, [])
+
+    def testNothingSentWithoutChanges(self):
+        self.controller.getSettingsFromDialog()
+        self.assertEqual(self.sent, [])
+
+    def testLoadedValuesAreNormalized(self):
+        self.controller.readConfigFromJson(2, json.dumps({
+            "General": {"stationcolor": "#FFAA00"},
+            "LED1": {"used": "true", "autoflash": "false"},
+            "Clock": {"digital": "True"},
+        }))
+        self.controller.getSettingsFromDialog()
+        self.assertEqual(self.sent, [])
+        self.controller.readConfigFromJson(2, json.dumps({"version": 7, "config": {"LEDS": {"inactivebgcolor": "#ABCDEF"}}}))
+        self.controller.getSettingsFromDialog()
+        self.assertEqual(self.sent, [])
+
+    def testStaleDeltaResyncsWithFullConfig(self):
+        self.controller.LED1Text.setText("MIC")
+        self.controller.getSettingsFromDialog()
+        self.controller.LED1Text.setText("PHONE")
+        self.controller.getSettingsFromDialog()
+        self.screen.readConfigFromJson(2, self.sent[-1])
+        self.assertEqual(self.resyncs, [2])
+        self.assertEqual(self.screen.LED1Text.text(), "ON AIR")
+        self.controller.sendFullConfig()
+        self.screen.readConfigFromJson(2, self.sent[-1])
+        self.assertEqual(self.screen.LED1Text.text(), "PHONE")
+        self.assertEqual(self.screen.settings.version, self.controller.settings.version)
+
+    def testMalformedInputAsksForResync(self):
+        for message in ("not json", "[]", json.dumps({"config": {"LED1": "text"}}),
+                        json.dumps({"base": 0, "version": 1, "ops": [{"op": "replace", "path": "/LED1/text/x",
+                                                                        "value": "MIC"}]}),
+                        json.dumps({"base": 0, "version": 1, "ops": [{"path": "/LED1/text", "value": "MIC"}]})):
+            self.screen.readConfigFromJson(2, message)
+        self.assertEqual(self.resyncs, [2] * 5)
+        self.assertEqual(self.screen.LED1Text.text(), "ON AIR")
+
+
+if __name__ == '__main__':
+    unittest.main()
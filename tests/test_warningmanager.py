@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# test_warningmanager.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+import unittest
+
+from tests import application, FakeClock
+
+import scheduler
+import warningmanager
+
+
+class WarningManagerTest(unittest.TestCase):
+    def setUp(self):
+        application()
+        self.clock = FakeClock()
+        self.realTimes = warningmanager.time, scheduler.time
+        warningmanager.time = scheduler.time = self.clock
+        self.manager = warningmanager.WarningManager(scheduler.TickScheduler())
+        self.shown = []
+        self.manager.warningChanged.connect(self.shown.append)
+
+    def tearDown(self):
+        self.manager.timer.stop()
+        warningmanager.time, scheduler.time = self.realTimes
+
+    def testReplaceTextUnderSameKey(self):
+        self.manager.addWarning("udp", "first", 1)
+        self.manager.addWarning("udp", "second", 1)
+        self.assertEqual(self.shown, ["first", "second"])
+        self.assertEqual(self.manager.currentWarning(), "second")
+        self.assertEqual(self.manager.activeWarnings(), ["second"])
+
+    def testSameWarningIsNotEmittedAgain(self):
+        self.manager.addWarning("ntp", "waiting for NTP status check")
+        self.manager.addWarning("ntp", "waiting for NTP status check")
+        self.assertEqual(self.shown, ["waiting for NTP status check"])
+
+    def testHigherPriorityWins(self):
+        self.manager.addWarning("ntp", "Clock not NTP synchronized", 0)
+        self.manager.addWarning("udp", "STUDIO FIRE", 2)
+        self.manager.removeWarning("udp")
+        self.assertEqual(self.shown, ["Clock not NTP synchronized", "STUDIO FIRE", "Clock not NTP synchronized"])
+
+    def testExpiry(self):
+        self.manager.addWarning("udp", "short", 1, ttl=10)
+        self.clock.advance(10)
+        self.manager.update()
+        self.assertEqual(self.shown, ["short", ""])
+        self.assertEqual(self.manager.activeWarnings(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
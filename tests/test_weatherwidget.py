@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# test_weatherwidget.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+import json
+import os
+import tempfile
+import unittest
+
+from tests import application, FakeClock
+
+import scheduler
+import weatherwidget
+
+DATA = {"location": "SANKT AUGUSTIN", "condition": "Cloudy", "temperature": 12.5, "unit": "°C"}
+
+
+class WeatherCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.realTime = weatherwidget.time
+        weatherwidget.time = self.clock
+        self.cache = weatherwidget.WeatherCache(ttl=600)
+
+    def tearDown(self):
+        weatherwidget.time = self.realTime
+
+    def testEmpty(self):
+        self.assertEqual(self.cache.get("weather.json"), (None, False))
+
+    def testFreshWithinTtl(self):
+        self.cache.put("weather.json", DATA)
+        self.clock.advance(599)
+        self.assertEqual(self.cache.get("weather.json"), (DATA, True))
+
+    def testStaleAfterTtl(self):
+        self.cache.put("weather.json", DATA)
+        self.clock.advance(600)
+        self.assertEqual(self.cache.get("weather.json"), (DATA, False))
+        self.assertEqual(self.cache.get("other.json"), (None, False))
+
+    def testWallClockStepDoesNotExpire(self):
+        self.cache.put("weather.json", DATA)
+        self.clock.wall += 3600
+        self.assertEqual(self.cache.get("weather.json"), (DATA, True))
+
+
+class ProviderTest(unittest.TestCase):
+    def testProviderForSource(self):
+        self.assertIsInstance(weatherwidget.providerForSource("http://example.com/w.json"),
+                              weatherwidget.HttpProvider)
+        self.assertIsInstance(weatherwidget.providerForSource("https://example.com/w.json"),
+                              weatherwidget.HttpProvider)
+        self.assertIsInstance(weatherwidget.providerForSource("/tmp/w.json"), weatherwidget.JsonFileProvider)
+
+    def testJsonFile(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", encoding="utf-8", delete=False) as f:
+            json.dump(DATA, f)
+        self.addCleanup(os.unlink, f.name)
+        provider = weatherwidget.providerForSource("file://" + f.name)
+        self.assertEqual(provider.source, "file://" + f.name)
+        self.assertEqual(provider.path, f.name)
+        self.assertEqual(provider.fetch(), DATA)
+
+    def testFormatTemperature(self):
+        self.assertEqual(weatherwidget.formatTemperature(12.5, "°C"), "12°C")
+        self.assertEqual(weatherwidget.formatTemperature("7.6", "°"), "8°")
+        self.assertEqual(weatherwidget.formatTemperature("n/a", "°C"), "n/a")
+
+
+class WeatherPanelTest(unittest.TestCase):
+    # results are handed to the panel directly, no fetch thread is started
+
+    def setUp(self):
+        application()
+        self.clock = FakeClock()
+        self.realTimes = weatherwidget.time, scheduler.time
+        weatherwidget.time = scheduler.time = self.clock
+        self.scheduler = scheduler.TickScheduler()
+        self.cache = weatherwidget.WeatherCache(ttl=600)
+        self.cache.put("weather.json", DATA)
+        self.panel = weatherwidget.WeatherPanel(self.scheduler, cache=self.cache)
+        self.panel.resize(200, 100)
+        self.panel.setProvider(weatherwidget.JsonFileProvider("weather.json"))
+
+    def tearDown(self):
+        self.panel.stop()
+        weatherwidget.time, scheduler.time = self.realTimes
+
+    def testFreshCacheIsUsed(self):
+        self.assertEqual(self.panel.data, DATA)
+        self.assertFalse(self.panel.stale)
+        self.assertIsNone(self.panel.fetchThread)
+
+    def testFailureKeepsLastGoodData(self):
+        generation = self.panel.dataGeneration
+        self.panel.fetchFailed("weather.json", "not found")
+        self.assertEqual(self.panel.data, DATA)
+        self.assertTrue(self.panel.stale)
+        self.assertEqual(self.panel.dataGeneration, generation + 1)
+        # a second failure changes nothing that is drawn
+        self.panel.fetchFailed("weather.json", "not found")
+        self.assertEqual(self.panel.dataGeneration, generation + 1)
+
+    def testFetchedClearsStale(self):
+        self.panel.fetchFailed("weather.json", "not found")
+        generation = self.panel.dataGeneration
+        self.panel.fetched("weather.json", DATA)
+        self.assertFalse(self.panel.stale)
+        self.assertEqual(self.panel.dataGeneration, generation + 1)
+
+    def testUnchangedDataKeepsGeneration(self):
+        generation = self.panel.dataGeneration
+        self.panel.fetched("weather.json", dict(DATA))
+        self.assertEqual(self.panel.dataGeneration, generation)
+
+    def testOtherSourceIsIgnored(self):
+        other = dict(DATA, location="BONN")
+        generation = self.panel.dataGeneration
+        self.panel.fetched("other.json", other)
+        self.panel.fetchFailed("other.json", "not found")
+        self.assertEqual(self.panel.data, DATA)
+        self.assertFalse(self.panel.stale)
+        self.assertEqual(self.panel.dataGeneration, generation)
+        # still cached for a panel showing that source
+        self.assertEqual(self.cache.get("other.json"), (other, True))
+
+    def testLayerIsReusedUntilDataChanges(self):
+        layer = self.panel.layer()
+        self.assertIs(self.panel.layer(), layer)
+        self.panel.fetched("weather.json", dict(DATA, temperature=20))
+        self.assertIsNot(self.panel.layer(), layer)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# test_websocketserver.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+import json
+import socket
+import struct
+import unittest
+
+import websocketserver
+from screenstate import ScreenState
+from websocketserver import ClientConnection, FrameError, acceptKey, encodeFrame, receiveFrame
+
+
+def clientFrame(payload, opcode=websocketserver.OPCODE_TEXT, mask=b"\x11\x22\x33\x44", length=None):
+    # frame as a browser sends it, length overrides the announced payload length
+    length = len(payload) if length is None else length
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, 0x80 | length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, length)
+    return header + mask + bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+
+
+def serverFrame(data):
+    # (opcode, payload) of an unmasked server frame
+    first, second = data[0], data[1]
+    length = second & 0x7F
+    offset = 2
+    if length == 126:
+        length = struct.unpack("!H", data[2:4])[0]
+        offset = 4
+    elif length == 127:
+        length = struct.unpack("!Q", data[2:10])[0]
+        offset = 10
+    return first & 0x0F, data[offset:offset + length]
+
+
+class FramingTest(unittest.TestCase):
+    def setUp(self):
+        self.server, self.client = socket.socketpair()
+        self.server.settimeout(1)
+
+    def tearDown(self):
+        self.server.close()
+        self.client.close()
+
+    def testAcceptKey(self):
+        # example of RFC 6455
+        self.assertEqual(acceptKey("dGhlIHNhbXBsZSBub25jZQ=="), "s3pPLMBiTxaQ9kYGzzhZRbK+xOo=")
+
+    def testEncodeFrameLengths(self):
+        for size in (0, 125, 126, 65535, 65536):
+            opcode, payload = serverFrame(encodeFrame(b"x" * size))
+            self.assertEqual((opcode, len(payload)), (websocketserver.OPCODE_TEXT, size))
+
+    def testReceiveMaskedFrames(self):
+        for size in (5, 300):
+            payload = bytes(range(256)) * 2
+            self.client.sendall(clientFrame(payload[:size]))
+            self.assertEqual(receiveFrame(self.server), (websocketserver.OPCODE_TEXT, payload[:size]))
+        self.client.sendall(clientFrame(b"", websocketserver.OPCODE_PING))
+        self.assertEqual(receiveFrame(self.server), (websocketserver.OPCODE_PING, b""))
+
+    def testRejectsUnmaskedFrame(self):
+        self.client.sendall(encodeFrame(b"hello"))
+        with self.assertRaises(FrameError) as context:
+            receiveFrame(self.server)
+        self.assertEqual(context.exception.code, websocketserver.CLOSE_PROTOCOL_ERROR)
+
+    def testRejectsBigFrameBeforeReadingIt(self):
+        # only the header is sent, the payload would never arrive
+        self.client.sendall(clientFrame(b"", length=1 << 40)[:14])
+        with self.assertRaises(FrameError) as context:
+            receiveFrame(self.server)
+        self.assertEqual(context.exception.code, websocketserver.CLOSE_TOO_BIG)
+        self.client.sendall(clientFrame(b"", length=websocketserver.maxFrameSize + 1)[:8])
+        with self.assertRaises(FrameError):
+            receiveFrame(self.server)
+
+    def testBufferedBytesComeFirst(self):
+        frames = clientFrame(b"first") + clientFrame(b"second")
+        self.client.sendall(frames[10:])
+        connection = ClientConnection(self.server, frames[:10])
+        self.assertEqual(receiveFrame(connection)[1], b"first")
+        self.assertEqual(receiveFrame(connection)[1], b"second")
+
+    def testClosedConnection(self):
+        self.client.sendall(clientFrame(b"hello")[:4])
+        self.client.close()
+        with self.assertRaises(ConnectionError):
+            receiveFrame(self.server)
+
+
+class ScreenStateTest(unittest.TestCase):
+    def setUp(self):
+        self.state = ScreenState()
+
+    def testOnlyChangesBumpTheVersion(self):
+        self.state.update({"now": "Song", "led1": True})
+        self.state.set("now", "Song")
+        self.assertEqual(self.state.snapshot(), (1, {"now": "Song", "led1": True}))
+
+    def testSubscribersGetFullStateThenChanges(self):
+        self.state.set("now", "Song")
+        subscriber, frame = self.state.subscribe()
+        self.assertEqual(json.loads(serverFrame(frame)[1]), {"version": 1, "state": {"now": "Song"}})
+        self.state.update({"now": "Song", "next": "News"})
+        frames = subscriber.take()
+        self.assertEqual([json.loads(serverFrame(frame)[1]) for frame in frames],
+                         [{"version": 2, "changes": {"next": "News"}}])
+        self.state.unsubscribe(subscriber)
+
+    def testSnapshotIsCachedPerVersion(self):
+        self.state.set("now", "Song")
+        version, body = self.state.snapshotJson()
+        self.assertIs(self.state.snapshotJson()[1], body)
+        self.state.set("now", "Other")
+        self.assertEqual(json.loads(self.state.snapshotJson()[1])["state"], {"now": "Other"})
+
+    def testWaitForChange(self):
+        self.state.set("now", "Song")
+        self.assertEqual(self.state.waitForChange(0, 0), 1)
+        self.assertEqual(self.state.waitForChange(1, 0.01), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# bench_clockwidget.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+# renders the ClockWidget offscreen into a QImage and reports the cost per frame
+#
+#   python3 utils/bench_clockwidget.py --compare
+#   python3 utils/bench_clockwidget.py --save baseline.json
+#   python3 utils/bench_clockwidget.py --compare baseline.json
+#
+# --compare without a file uses bench_clockwidget_baseline.json next to this script, recorded on the
+# build machine. timings depend on the machine, save an own baseline before comparing anywhere else
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import QApplication
+from clockwidget import ClockWidget
+
+RESOLUTIONS = {"480p": (854, 480), "1080p": (1920, 1080), "4k": (3840, 2160)}
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_clockwidget_baseline.json")
+LOGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "images", "astrastudio_transparent.png")
+# name: (clock mode, show seconds, logo)
+VARIANTS = {
+    "digital": (1, False, ""),
+    "digital-seconds": (1, True, ""),
+    "digital-logo": (1, False, LOGO),
+    "digital-seconds-logo": (1, True, LOGO),
+    "analog": (0, False, ""),
+}
+
+parser = argparse.ArgumentParser(description='Benchmark offscreen rendering of the OnAirScreen ClockWidget.')
+parser.add_argument("-f", "--frames", type=int, help="frames per case (default: 200)", default=200)
+parser.add_argument("-r", "--resolution", action="append", choices=sorted(RESOLUTIONS),
+                    help="resolution to run, can be repeated (default: all)")
+parser.add_argument("-v", "--variant", action="append", choices=sorted(VARIANTS),
+                    help="variant to run, can be repeated (default: all)")
+parser.add_argument("--save", type=str, help="save the results as baseline JSON file")
+parser.add_argument("--compare", type=str, nargs="?", const=BASELINE,
+                    help="compare the results with a baseline JSON file, exits with 1 on regressions "
+                         "(default: %s)" % os.path.basename(BASELINE))
+parser.add_argument("--threshold", type=float, help="allowed slowdown of p50 in percent (default: 10)", default=10.0)
+args = parser.parse_args()
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def benchmark(widget, width, height, frames):
+    widget.resize(width, height)
+    image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    # warm up glyph cache and static layer
+    for i in range(5):
+        widget.render(image)
+
+    times = []
+    for i in range(frames):
+        start = time.perf_counter()
+        widget.render(image)
+        times.append(time.perf_counter() - start)
+
+    # allocations in a separate pass, tracing slows down rendering
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    for i in range(frames):
+        widget.render(image)
+    peak = tracemalloc.get_traced_memory()[1]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+
+    times.sort()
+    return {
+        "fps": frames / sum(times),
+        "p50": percentile(times, 0.5) * 1000,
+        "p90": percentile(times, 0.9) * 1000,
+        "p99": percentile(times, 0.99) * 1000,
+        "max": times[-1] * 1000,
+        "peakKiB": peak / 1024.0,
+        "retainedBlocks": blocks,
+    }
+
+
+app = QApplication(sys.argv)
+widget = ClockWidget()
+widget.timer.stop()
+
+results = {}
+print("%-28s %8s %8s %8s %8s %8s %9s %8s" % ("case", "fps", "p50 ms", "p90 ms", "p99 ms", "max ms", "peak KiB",
+                                              "blocks"))
+for resolution in args.resolution or RESOLUTIONS:
+    width, height = RESOLUTIONS[resolution]
+    for variant in args.variant or VARIANTS:
+        mode, seconds, logo = VARIANTS[variant]
+        widget.setClockMode(mode)
+        widget.setShowSeconds(seconds)
+        widget.setLogo(logo)
+        case = "%s/%s" % (resolution, variant)
+        result = results[case] = benchmark(widget, width, height, args.frames)
+        print("%-28s %8.1f %8.3f %8.3f %8.3f %8.3f %9.1f %8d" % (case, result["fps"], result["p50"], result["p90"],
+                                                                 result["p99"], result["max"], result["peakKiB"],
+                                                                 result["retainedBlocks"]))
+
+if args.save:
+    with open(args.save, "w") as baselineFile:
+        json.dump(results, baselineFile, indent=2, sort_keys=True)
+    print("baseline saved to", args.save)
+
+if args.compare:
+    with open(args.compare) as baselineFile:
+        baseline = json.load(baselineFile)
+    regressions = 0
+    print()
+    print("%-28s %10s %10s %8s" % ("case", "base p50", "p50", "change"))
+    for case, result in results.items():
+        if case not in baseline:
+            continue
+        change = (result["p50"] / baseline[case]["p50"] - 1.0) * 100.0
+        regressed = change > args.threshold
+        regressions += regressed
+        print("%-28s %10.3f %10.3f %+7.1f%%%s" % (case, baseline[case]["p50"], result["p50"], change,
+                                                   "  REGRESSION" if regressed else ""))
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# oas_loadgen.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+# sends realistic automation traffic to OnAirScreen and measures what arrives
+#
+# accepted commands and drops are taken from the /metrics endpoint, latency from
+# PROBE:token commands which OnAirScreen answers after applying what came before
+#
+#   python3 utils/oas_loadgen.py --rate 200 --duration 20
+#   python3 utils/oas_loadgen.py --headless --rate 1000 --lines 5
+
+import argparse
+import os
+import random
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+MIXES = {
+    # command kind: weight
+    "automation": {"now": 30, "next": 20, "led": 25, "air": 15, "conf": 10},
+    "texts": {"now": 60, "next": 40},
+    "leds": {"led": 70, "air": 30},
+    "conf": {"conf": 100},
+}
+
+parser = argparse.ArgumentParser(description='Generate UDP command load for OnAirScreen and measure throughput.')
+parser.add_argument("-i", "--ip", type=str, help="OnAirScreen target IP (default: 127.0.0.1)", default="127.0.0.1")
+parser.add_argument("-p", "--port", type=int, help="OnAirScreen UDP port (default: 3310)", default=3310)
+parser.add_argument("-w", "--httpport", type=int, help="OnAirScreen HTTP port for /metrics (default: 8010)",
+                    default=8010)
+parser.add_argument("-r", "--rate", type=float, help="datagrams per second (default: 100)", default=100.0)
+parser.add_argument("-l", "--lines", type=int, help="commands per datagram (default: 1)", default=1)
+parser.add_argument("-d", "--duration", type=float, help="seconds to send (default: 10)", default=10.0)
+parser.add_argument("-m", "--mix", choices=sorted(MIXES), help="command mix (default: automation)",
+                    default="automation")
+parser.add_argument("--probes", type=float, help="latency probes per second (default: 10)", default=10.0)
+parser.add_argument("--seed", type=int, help="random seed (default: 1)", default=1)
+parser.add_argument("--headless", action='store_true',
+                    help="start OnAirScreen with the offscreen QPA platform for the run")
+args = parser.parse_args()
+
+
+def commandLines(rng, kind):
+    if kind == "now":
+        return ["NOW:Artist %d - Title %d" % (rng.randrange(1000), rng.randrange(1000))]
+    if kind == "next":
+        return ["NEXT:coming up at %02d:%02d" % (rng.randrange(24), rng.randrange(60))]
+    if kind == "led":
+        return ["LED%d:%s" % (rng.randint(1, 4), rng.choice(("ON", "OFF")))]
+    if kind == "air":
+        return [rng.choice(("AIR1:ON", "AIR1:OFF", "AIR2:ON", "AIR2:OFF", "AIR3:TOGGLE", "AIR4:ON", "AIR4:OFF"))]
+    # a burst of settings as sent when a screen is reconfigured, without applying them
+    return ["CONF:General:slogan=Slogan %d" % rng.randrange(1000),
+            "CONF:General:slogancolor=#%06X" % rng.randrange(0x1000000),
+            "CONF:LED%d:text=LED %d" % (rng.randint(1, 4), rng.randrange(100)),
+            "CONF:Clock:showseconds=%s" % rng.choice(("True", "False")),
+            "CONF:Clock:digitalhourcolor=#%06X" % rng.randrange(0x1000000)]
+
+
+def readMetrics():
+    # sample name with labels -> value
+    url = "http://%s:%d/metrics" % (args.ip, args.httpport)
+    with urllib.request.urlopen(url, timeout=5) as response:
+        text = response.read().decode()
+    metrics = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            metrics[name] = float(value)
+    return metrics
+
+
+def total(metrics, prefix):
+    return sum(value for name, value in metrics.items() if name.startswith(prefix + "{") or name == prefix)
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def startHeadless():
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    process = subprocess.Popen([sys.executable, "start.py"], cwd=root, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit("OnAirScreen exited with code %d" % process.returncode)
+        try:
+            readMetrics()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    sys.exit("OnAirScreen did not answer on port %d" % args.httpport)
+
+
+def stopHeadless(process):
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+headless = startHeadless() if args.headless else None
+try:
+    rng = random.Random(args.seed)
+    mix = MIXES[args.mix]
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    target = (args.ip, args.port)
+    before = readMetrics()
+
+    probes = {}
+    latencies = []
+    sentDatagrams = 0
+    sentCommands = 0
+    nextProbe = 0.0
+    probeToken = 0
+
+    def receiveProbes():
+        while True:
+            try:
+                reply = sock.recv(2048)
+            except (BlockingIOError, ConnectionError):
+                return
+            sent = probes.pop(reply.decode(errors="replace"), None)
+            if sent is not None:
+                latencies.append(time.perf_counter() - sent)
+
+    start = time.perf_counter()
+    while True:
+        now = time.perf_counter() - start
+        if now >= args.duration:
+            break
+        wait = start + sentDatagrams / args.rate - time.perf_counter()
+        if wait > 0:
+            receiveProbes()
+            time.sleep(min(wait, 0.01))
+            continue
+
+        lines = []
+        while len(lines) < args.lines:
+            lines += commandLines(rng, rng.choices(kinds, weights)[0])
+        if args.probes > 0 and now >= nextProbe:
+            probeToken += 1
+            token = "PROBE:%d" % probeToken
+            lines.append(token)
+            probes[token] = time.perf_counter()
+            nextProbe = now + 1.0 / args.probes
+        try:
+            sock.sendto("\n".join(lines).encode(), target)
+            sentCommands += len(lines)
+        except BlockingIOError:
+            # local socket buffer full, counted as sent and dropped
+            pass
+        sentDatagrams += 1
+
+    elapsed = time.perf_counter() - start
+    # late probes and the last frame batch
+    drainUntil = time.perf_counter() + 2.0
+    while probes and time.perf_counter() < drainUntil:
+        receiveProbes()
+        time.sleep(0.01)
+    after = readMetrics()
+finally:
+    if headless:
+        stopHeadless(headless)
+
+accepted = after["oas_udp_datagrams_total"] - before["oas_udp_datagrams_total"]
+commands = total(after, "oas_commands_total") - total(before, "oas_commands_total")
+print("sent       %8d datagrams %8d commands in %.1f s (%.0f datagrams/s)" % (sentDatagrams, sentCommands, elapsed,
+                                                                          sentDatagrams / elapsed))
+print("accepted   %8d datagrams %8d commands (%.0f commands/s)" % (accepted, commands, commands / elapsed))
+print("dropped    %8d datagrams (%.2f%%)" % (sentDatagrams - accepted,
+                                            100.0 * (sentDatagrams - accepted) / max(sentDatagrams, 1)))
+for name in ("oas_command_parse_errors_total", "oas_commands_coalesced_total"):
+    print("%-36s %d" % (name, after.get(name, 0) - before.get(name, 0)))
+if latencies:
+    latencies.sort()
+    print("latency    p50 %.2f ms  p90 %.2f ms  p99 %.2f ms  max %.2f ms  (%d of %d probes answered)" % (
+        percentile(latencies, 0.5) * 1000, percentile(latencies, 0.9) * 1000, percentile(latencies, 0.99) * 1000,
+        latencies[-1] * 1000, len(latencies), probeToken))
+elif probeToken:
+    print("latency    no probe answered of %d" % probeToken)
+
+# how the timers of the screen (clock tick included) suffered
+bucket = re.compile(r'oas_timer_lateness_seconds_bucket\{le="([^"]+)"\}')
+runs = after.get("oas_timer_lateness_seconds_count", 0) - before.get("oas_timer_lateness_seconds_count", 0)
+if runs:
+    lateness = after["oas_timer_lateness_seconds_sum"] - before["oas_timer_lateness_seconds_sum"]
+    print("timers     %d runs, mean lateness %.2f ms" % (runs, lateness / runs * 1000))
+    for name in after:
+        match = bucket.match(name)
+        if match and match.group(1) == "0.05":
+            late = runs - (after[name] - before.get(name, 0))
+            print("           %d runs (%.1f%%) more than 50 ms late" % (late, 100.0 * late / runs))
@@ -37,19 +37,180 @@
 
 import socket
 import argparse
+import queue
+import sys
+import threading
+import time
 
-parser = argparse.ArgumentParser(description='Send an UDP API command to OnAirScreen.')
-parser.add_argument("-i", "--ip", type=str, help="OnAirScreen target IP (default: 127.0.0.1)", default="127.0.0.1")
+parser = argparse.ArgumentParser(description='Send UDP API commands to OnAirScreen.',
+                                 epilog='Without a message the commands are read line by line from stdin or --file, '
+                                        'packed into as few datagrams as possible and sent as they come in.')
+parser.add_argument("-i", "--ip", type=str,
+                    help="OnAirScreen target IP, or several comma separated IP[:PORT] (default: 127.0.0.1)",
+                    default="127.0.0.1")
 parser.add_argument("-p", "--port", type=int, help="OnAirScreen target port (default: 3310)", default="3310")
 parser.add_argument("-s", "--silent", help="do not print any information, except for errors", action='store_true')
-parser.add_argument('message', type=str, help="API message to send")
+parser.add_argument("-f", "--file", type=str, help="read commands from file, - for stdin (default: stdin)")
+parser.add_argument("-m", "--mtu", type=int, help="maximum datagram payload in bytes (default: 1400)", default=1400)
+parser.add_argument("-r", "--rate", type=float, help="maximum datagrams per second and target (default: unlimited)")
+parser.add_argument("-l", "--linger", type=float,
+                    help="ms to wait for more lines before sending a partly filled datagram (default: 20)",
+                    default=20.0)
+parser.add_argument('message', type=str, nargs='?', help="API message to send")
 args = parser.parse_args()
 
-UDP_IP = args.ip
-UDP_PORT = args.port
-MESSAGE = args.message
 
-if not args.silent:
-    print("IP:", UDP_IP, "| PORT:",UDP_PORT, "| Message:", MESSAGE)
-sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-sock.sendto(bytes(MESSAGE, "utf-8"), (UDP_IP, UDP_PORT))
\ No newline at end of file
+def parseTargets(spec, defaultPort):
+    # returns (name, host, port) per comma separated IP[:PORT]
+    targets = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.partition(":")
+        targets.append((entry, host, int(port) if port else defaultPort))
+    return targets
+
+
+class Target(threading.Thread):
+    # sends the datagrams of one target from its own thread with its own socket and rate limit,
+    # so a target that is slow to resolve or to send to does not hold up the others
+    def __init__(self, label, host, port, interval):
+        threading.Thread.__init__(self, daemon=True)
+        self.label = label
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.payloads = queue.Queue()
+        self.datagrams = 0
+        self.bytes = 0
+        self.errors = 0
+
+    def run(self):
+        try:
+            # resolved once, the name is not looked up again per datagram
+            address = socket.getaddrinfo(self.host, self.port, socket.AF_INET, socket.SOCK_DGRAM)[0][4]
+        except socket.gaierror as e:
+            print("invalid target %s: %s" % (self.label, e), file=sys.stderr)
+            address = None
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        nextSend = 0.0
+        while True:
+            payload = self.payloads.get()
+            if payload is None:
+                break
+            if address is None:
+                self.errors += 1
+                continue
+            if self.interval:
+                now = time.monotonic()
+                if now < nextSend:
+                    time.sleep(nextSend - now)
+                nextSend = max(now, nextSend) + self.interval
+            try:
+                sock.sendto(payload, address)
+                self.datagrams += 1
+                self.bytes += len(payload)
+            except OSError as e:
+                self.errors += 1
+                print("error sending to %s: %s" % (self.label, e), file=sys.stderr)
+        sock.close()
+
+
+class Sender:
+    def __init__(self, targets, mtu, rate):
+        interval = 1.0 / rate if rate else 0.0
+        self.targets = [Target(label, host, port, interval) for label, host, port in targets]
+        for target in self.targets:
+            target.start()
+        self.mtu = mtu
+        self.pending = []
+        self.pendingSize = 0
+        self.datagrams = 0
+        self.lines = 0
+
+    def add(self, line):
+        data = line.encode("utf-8")
+        # lines are separated by a newline in the datagram
+        if self.pending and self.pendingSize + 1 + len(data) > self.mtu:
+            self.flush()
+        if len(data) > self.mtu:
+            print("warning: line of %d bytes exceeds the MTU of %d" % (len(data), self.mtu), file=sys.stderr)
+        self.pending.append(data)
+        self.pendingSize += len(data) + (1 if len(self.pending) > 1 else 0)
+        self.lines += 1
+
+    def flush(self):
+        if not self.pending:
+            return
+        payload = b"\n".join(self.pending)
+        self.pending = []
+        self.pendingSize = 0
+        # every target gets the datagram at the same time through its own queue
+        for target in self.targets:
+            target.payloads.put(payload)
+        self.datagrams += 1
+
+    def close(self):
+        # waits until all targets sent everything
+        for target in self.targets:
+            target.payloads.put(None)
+        for target in self.targets:
+            target.join()
+
+    def errors(self):
+        return sum(target.errors for target in self.targets)
+
+
+def readLines(source, lines):
+    for line in source:
+        line = line.rstrip("\r\n")
+        if line:
+            lines.put(line)
+    lines.put(None)
+
+
+try:
+    targets = parseTargets(args.ip, args.port)
+except ValueError as e:
+    sys.exit("invalid target %s: %s" % (args.ip, e))
+sender = Sender(targets, args.mtu, args.rate)
+start = time.monotonic()
+
+if args.message is not None:
+    if not args.silent:
+        print("IP:", args.ip, "| PORT:", args.port, "| Message:", args.message)
+    sender.pending = [args.message.encode("utf-8")]
+    sender.flush()
+else:
+    if args.file and args.file != "-":
+        source = open(args.file, encoding="utf-8")
+    else:
+        source = sys.stdin
+    # a reader thread lets partly filled datagrams go out when the input pauses
+    lines = queue.Queue()
+    threading.Thread(target=readLines, args=(source, lines), daemon=True).start()
+    try:
+        while True:
+            try:
+                line = lines.get(timeout=args.linger / 1000.0 if sender.pending else None)
+            except queue.Empty:
+                sender.flush()
+                continue
+            if line is None:
+                break
+            sender.add(line)
+    except KeyboardInterrupt:
+        pass
+    sender.flush()
+sender.close()
+
+if not args.silent and args.message is None:
+    elapsed = time.monotonic() - start
+    print("sent %d lines in %d datagrams in %.1f s" % (sender.lines, sender.datagrams, elapsed), file=sys.stderr)
+    for target in sender.targets:
+        print("  %s: %d datagrams, %d bytes%s" % (target.label, target.datagrams, target.bytes,
+                                                 ", %d errors" % target.errors if target.errors else ""),
+              file=sys.stderr)
+
+sys.exit(1 if sender.errors() else 0)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# warningmanager.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+import heapq
+import itertools
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class WarningEntry:
+    def __init__(self, key, text, priority, expires, seq):
+        self.key = key
+        self.text = text
+        self.priority = priority
+        self.expires = expires  # monotonic, None never expires
+        self.seq = seq
+
+
+class WarningManager(QObject):
+    # shows the warnings of the highest priority, rotating if there are several
+    # warningChanged is emitted with the visible text, "" if no warning is left
+    warningChanged = pyqtSignal(str)
+    # all active warning texts, highest priority first
+    warningsChanged = pyqtSignal(list)
+    rotationInterval = 5.0
+
+    def __init__(self, scheduler, parent=None):
+        QObject.__init__(self, parent)
+        self.warnings = {}
+        self.priorityQueue = []  # heap of (-priority, seq, entry)
+        self.expiryQueue = []  # heap of (expires, seq, entry)
+        self.sequence = itertools.count()
+        self.visible = None
+        # text of the last warningChanged, the visible entry may be replaced under the same key
+        self.shownText = ""
+        self.active = []
+        self.nextRotation = None
+        self.timer = scheduler.timer(self.update, name="warnings")
+        self.timer.setSingleShot(True)
+
+    def addWarning(self, key, text, priority=0, ttl=None):
+        # a warning with the same key is replaced
+        old = self.warnings.get(key)
+        if old is not None and old.text == text and old.priority == priority and ttl is None and old.expires is None:
+            return
+        expires = time.monotonic() + ttl if ttl else None
+        entry = WarningEntry(key, text, priority, expires, next(self.sequence))
+        self.warnings[key] = entry
+        heapq.heappush(self.priorityQueue, (-priority, entry.seq, entry))
+        if expires is not None:
+            heapq.heappush(self.expiryQueue, (expires, entry.seq, entry))
+        if self.visible is old and old is not None:
+            self.visible = entry
+        self.update()
+
+    def removeWarning(self, key):
+        if self.warnings.pop(key, None) is not None:
+            self.update()
+
+    def currentWarning(self):
+        return self.visible.text if self.visible else ""
+
+    def activeWarnings(self):
+        entries = sorted(self.warnings.values(), key=lambda entry: (-entry.priority, entry.seq))
+        return [entry.text for entry in entries]
+
+    def isCurrent(self, entry):
+        return self.warnings.get(entry.key) is entry
+
+    def update(self):
+        now = time.monotonic()
+        while self.expiryQueue and (self.expiryQueue[0][0] <= now or not self.isCurrent(self.expiryQueue[0][2])):
+            entry = heapq.heappop(self.expiryQueue)[2]
+            if self.isCurrent(entry):
+                del self.warnings[entry.key]
+        while self.priorityQueue and not self.isCurrent(self.priorityQueue[0][2]):
+            heapq.heappop(self.priorityQueue)
+
+        if not self.priorityQueue:
+            self.visible = None
+            self.nextRotation = None
+        else:
+            priority = self.priorityQueue[0][2].priority
+            top = sorted((entry for entry in self.warnings.values() if entry.priority == priority),
+                         key=lambda entry: entry.seq)
+            if self.visible not in top:
+                self.visible = top[0]
+                self.nextRotation = now + self.rotationInterval
+            elif self.nextRotation is None or now >= self.nextRotation:
+                self.visible = top[(top.index(self.visible) + 1) % len(top)]
+                self.nextRotation = now + self.rotationInterval
+            if len(top) < 2:
+                self.nextRotation = None
+
+        deadlines = [self.expiryQueue[0][0]] if self.expiryQueue else []
+        if self.nextRotation is not None:
+            deadlines.append(self.nextRotation)
+        if deadlines:
+            self.timer.start(max(0, int((min(deadlines) - now) * 1000) + 1))
+        else:
+            self.timer.stop()
+
+        if self.currentWarning() != self.shownText:
+            self.shownText = self.currentWarning()
+            self.warningChanged.emit(self.shownText)
+        active = self.activeWarnings()
+        if active != self.active:
+            self.active = active
+            self.warningsChanged.emit(active)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# weatherwidget.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+import json
+import math
+import time
+from urllib.request import urlopen
+
+from PyQt5.QtCore import Qt, QThread, QRectF, pyqtSignal
+from PyQt5.QtGui import QPainter, QPixmap, QFont, QColor
+from PyQt5.QtWidgets import QWidget
+
+
+# weather data is a flat JSON object, missing keys are left out when drawing:
+# {"location": "SANKT AUGUSTIN", "condition": "Cloudy", "temperature": 12.5, "high": 15, "low": 8, "unit": "°C"}
+
+class JsonFileProvider:
+    def __init__(self, path):
+        self.source = path
+        self.path = path[len("file://"):] if path.startswith("file://") else path
+
+    def fetch(self):
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)
+
+
+class HttpProvider:
+    timeout = 5
+
+    def __init__(self, url):
+        self.source = url
+
+    def fetch(self):
+        with urlopen(self.source, timeout=self.timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+
+def providerForSource(source):
+    # URLs are fetched via HTTP, everything else is a local JSON file
+    if source.startswith("http://") or source.startswith("https://"):
+        return HttpProvider(source)
+    return JsonFileProvider(source)
+
+
+class WeatherCache:
+    # last good data per source, shared so a re-created panel does not fetch again within the TTL
+    def __init__(self, ttl=600):
+        self.ttl = ttl
+        self.entries = {}  # source -> (data, monotonic time of the fetch)
+
+    def get(self, source):
+        # return (data, fresh), data is None if the source was never fetched successfully
+        entry = self.entries.get(source)
+        if entry is None:
+            return None, False
+        data, fetched = entry
+        return data, time.monotonic() - fetched < self.ttl
+
+    def put(self, source, data):
+        self.entries[source] = (data, time.monotonic())
+
+
+weatherCache = WeatherCache()
+
+
+class WeatherFetchThread(QThread):
+    # fetches once from a provider, results are delivered queued to the GUI thread
+    fetched = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+    # running threads, kept referenced until they finished even if their panel is gone
+    running = set()
+
+    def __init__(self, provider):
+        QThread.__init__(self)
+        self.provider = provider
+        WeatherFetchThread.running.add(self)
+        self.finished.connect(lambda: WeatherFetchThread.running.discard(self))
+
+    def run(self):
+        try:
+            data = self.provider.fetch()
+            if not isinstance(data, dict):
+                raise ValueError("weather data is not an object")
+        except Exception as e:
+            self.failed.emit(self.provider.source, str(e))
+            return
+        self.fetched.emit(self.provider.source, data)
+
+
+class WeatherPanel(QWidget):
+    # native replacement for the weatherwidget.io web view
+    # shows the last good data of the provider, dimmed if the last fetch failed
+    retryInterval = 30
+
+    def __init__(self, scheduler, parent=None, cache=weatherCache):
+        QWidget.__init__(self, parent)
+        self.cache = cache
+        self.provider = None
+        self.data = None
+        self.stale = False
+        # bumped whenever data or stale change, part of the layer key
+        self.dataGeneration = 0
+        self.fetchThread = None
+        self.layerKey = None
+        self.layerPixmap = None
+        self.timer = scheduler.timer(self.refresh, name="weather")
+        self.timer.setSingleShot(True)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+    def setProvider(self, provider):
+        if self.provider is not None and provider.source == self.provider.source:
+            return
+        self.provider = provider
+        self.data, fresh = self.cache.get(provider.source)
+        self.stale = False
+        self.dataChanged()
+        if fresh:
+            self.timer.start(int(self.cache.ttl * 1000))
+        else:
+            self.refresh()
+
+    def refresh(self):
+        if self.provider is None or self.fetchThread is not None:
+            return
+        self.fetchThread = WeatherFetchThread(self.provider)
+        self.fetchThread.fetched.connect(self.fetched)
+        self.fetchThread.failed.connect(self.fetchFailed)
+        self.fetchThread.start()
+
+    def stop(self):
+        # the running fetch is left to finish on its own, its result is dropped
+        self.timer.stop()
+        if self.fetchThread is not None:
+            self.fetchThread.fetched.disconnect(self.fetched)
+            self.fetchThread.failed.disconnect(self.fetchFailed)
+            self.fetchThread = None
+        self.provider = None
+
+    def fetched(self, source, data):
+        self.fetchThread = None
+        self.cache.put(source, data)
+        if self.provider is None or source != self.provider.source:
+            return
+        if data != self.data or self.stale:
+            self.data = data
+            self.stale = False
+            self.dataChanged()
+        self.timer.start(int(self.cache.ttl * 1000))
+
+    def fetchFailed(self, source, message):
+        self.fetchThread = None
+        if self.provider is None or source != self.provider.source:
+            return
+        print("weather error: %s: %s" % (source, message))
+        if not self.stale:
+            self.stale = True
+            self.dataChanged()
+        self.timer.start(self.retryInterval * 1000)
+
+    def dataChanged(self):
+        self.dataGeneration += 1
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.layer())
+
+    def layer(self):
+        # return the rendered panel, drawn again only when size, data or state change
+        dpr = self.devicePixelRatioF()
+        background = self.palette().window()
+        key = (self.width(), self.height(), dpr, self.dataGeneration, background.color().rgba())
+        if key != self.layerKey:
+            layer = QPixmap(math.ceil(self.width() * dpr), math.ceil(self.height() * dpr))
+            layer.setDevicePixelRatio(dpr)
+            layer.fill(Qt.transparent)
+            painter = QPainter(layer)
+            painter.fillRect(QRectF(0, 0, self.width(), self.height()), background)
+            painter.setRenderHints(QPainter.Antialiasing | QPainter.TextAntialiasing)
+            if self.data:
+                self.paintWeather(painter, self.data)
+            painter.end()
+            self.layerPixmap = layer
+            self.layerKey = key
+        return self.layerPixmap
+
+    def paintWeather(self, painter, data):
+        width = self.width()
+        height = self.height()
+        margin = 8
+        unit = data.get("unit", "°")
+        painter.setPen(QColor("#888888") if self.stale else QColor("#FFFFFF"))
+
+        font = QFont()
+        font.setPixelSize(max(8, int(height * 0.12)))
+        font.setBold(True)
+        painter.setFont(font)
+        painter.drawText(QRectF(margin, margin, width - 2 * margin, height * 0.2),
+                         Qt.AlignLeft | Qt.AlignVCenter, str(data.get("location", "")))
+
+        if "temperature" in data:
+            font.setPixelSize(max(8, int(height * 0.38)))
+            painter.setFont(font)
+            painter.drawText(QRectF(margin, height * 0.22, width * 0.6, height * 0.5),
+                             Qt.AlignLeft | Qt.AlignVCenter, formatTemperature(data["temperature"], unit))
+
+        font.setBold(False)
+        font.setPixelSize(max(8, int(height * 0.13)))
+        painter.setFont(font)
+        limits = []
+        if "high" in data:
+            limits.append("H %s" % formatTemperature(data["high"], unit))
+        if "low" in data:
+            limits.append("L %s" % formatTemperature(data["low"], unit))
+        painter.drawText(QRectF(width * 0.6, height * 0.22, width * 0.4 - margin, height * 0.5),
+                         Qt.AlignRight | Qt.AlignVCenter, "\n".join(limits))
+        painter.drawText(QRectF(margin, height * 0.74, width - 2 * margin, height * 0.2),
+                         Qt.AlignLeft | Qt.AlignVCenter, str(data.get("condition", "")))
+
+
+def formatTemperature(value, unit):
+    try:
+        return "%d%s" % (round(float(value)), unit)
+    except (TypeError, ValueError):
+        return str(value)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+# OnAirScreen
+# Copyright (c) 2012-2019 Sascha Ludwig, astrastudio.de
+# All rights reserved.
+#
+# websocketserver.py
+# This file is part of OnAirScreen
+#
+# You may use this file under the terms of the BSD license as follows:
+#
+# "Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#   * Redistributions of source code must retain the above copyright
+#     notice, this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright
+#     notice, this list of conditions and the following disclaimer in
+#     the documentation and/or other materials provided with the
+#     distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE."
+#
+#############################################################################
+
+# minimal RFC 6455 server side, enough to push text messages to web panels
+
+import base64
+import hashlib
+import select
+import struct
+
+GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+CLOSE_PROTOCOL_ERROR = 1002
+CLOSE_TOO_BIG = 1009
+
+# panels send nothing but pings and close frames
+maxFrameSize = 65536
+
+
+class FrameError(ValueError):
+    # broken or unacceptable client frame, code is sent in the close frame
+    def __init__(self, code, reason):
+        ValueError.__init__(self, reason)
+        self.code = code
+
+
+class ClientConnection:
+    # socket of the client, bytes the http handler already read ahead are returned first
+    def __init__(self, sock, buffered=b""):
+        self.sock = sock
+        self.buffered = buffered
+
+    def recv(self, count):
+        if self.buffered:
+            data = self.buffered[:count]
+            self.buffered = self.buffered[count:]
+            return data
+        return self.sock.recv(count)
+
+
+def acceptKey(key):
+    return base64.b64encode(hashlib.sha1(key.strip().encode() + GUID).digest()).decode()
+
+
+def encodeFrame(payload, opcode=OPCODE_TEXT):
+    # single unmasked frame with FIN set, servers never mask
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def receiveExactly(connection, count):
+    data = b""
+    while len(data) < count:
+        chunk = connection.recv(count - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        data += chunk
+    return data
+
+
+def receiveFrame(connection, maxSize=None):
+    # returns (opcode, payload) of a masked client frame
+    # the length is checked before the payload is read, FrameError for unmasked or too big frames
+    first, second = receiveExactly(connection, 2)
+    if not second & 0x80:
+        raise FrameError(CLOSE_PROTOCOL_ERROR, "unmasked client frame")
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", receiveExactly(connection, 2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", receiveExactly(connection, 8))[0]
+    if length > (maxFrameSize if maxSize is None else maxSize):
+        raise FrameError(CLOSE_TOO_BIG, "frame too big")
+    mask = receiveExactly(connection, 4)
+    payload = bytearray(receiveExactly(connection, length))
+    for i in range(length):
+        payload[i] ^= mask[i % 4]
+    return first & 0x0F, bytes(payload)
+
+
+def isUpgradeRequest(headers):
+    return headers.get("Upgrade", "").lower() == "websocket" and headers.get("Sec-WebSocket-Key")
+
+
+def serveWebSocket(handler, screenState, pingInterval=30):
+    # runs in the thread of the http request handler until the client goes away
+    handler.send_response(101, "Switching Protocols")
+    handler.send_header("Upgrade", "websocket")
+    handler.send_header("Connection", "Upgrade")
+    handler.send_header("Sec-WebSocket-Accept", acceptKey(handler.headers["Sec-WebSocket-Key"]))
+    handler.end_headers()
+    handler.wfile.flush()
+    handler.close_connection = True
+
+    connection = handler.connection
+    # a first frame may have arrived together with the handshake and sit in rfile
+    connection.settimeout(0)
+    client = ClientConnection(connection, handler.rfile.read(len(handler.rfile.peek(maxFrameSize))))
+    connection.settimeout(10)
+    subscriber, frame = screenState.subscribe()
+    try:
+        connection.sendall(frame)
+        while True:
+            if client.buffered:
+                readable = [connection]
+            else:
+                readable, _, _ = select.select([connection, subscriber.wakeupReader], [], [], pingInterval)
+            if not readable:
+                connection.sendall(encodeFrame(b"", OPCODE_PING))
+                continue
+            if subscriber.wakeupReader in readable:
+                frames = subscriber.take()
+                if subscriber.overflow:
+                    break
+                if frames:
+                    connection.sendall(b"".join(frames))
+            if connection in readable:
+                opcode, payload = receiveFrame(client)
+                if opcode == OPCODE_CLOSE:
+                    connection.sendall(encodeFrame(payload[:2], OPCODE_CLOSE))
+                    break
+                if opcode == OPCODE_PING:
+                    connection.sendall(encodeFrame(payload, OPCODE_PONG))
+                # messages from panels are ignored, commands go through /?cmd=
+    except FrameError as e:
+        try:
+            connection.sendall(encodeFrame(struct.pack("!H", e.code), OPCODE_CLOSE))
+        except OSError:
+            pass
+    except (OSError, ValueError):
+        pass
+    finally:
+        screenState.unsubscribe(subscriber)